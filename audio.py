@@ -0,0 +1,135 @@
+import struct
+import numpy as np
+
+# Formatos de muestra admitidos: (código de formato WAV, bits) -> (dtype, escala a [-1, 1])
+SAMPLE_FORMATS = {
+    (1, 8): (np.uint8, None),
+    (1, 16): (np.dtype("<i2"), 32768.0),
+    (1, 32): (np.dtype("<i4"), 2147483648.0),
+    (3, 32): (np.dtype("<f4"), 1.0),
+}
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+def read_wav_layout(path):
+    """Lee la cabecera RIFF y devuelve (sample_rate, canales, formato, bits, offset de datos, bytes de datos)"""
+    with open(path, "rb") as wav:
+        riff, _, wave_id = struct.unpack("<4sI4s", wav.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path} no es un archivo WAV")
+
+        fmt = None
+        while True:
+            header = wav.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: no se encontró el bloque de datos")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = wav.read(chunk_size)
+                wav.seek(chunk_size % 2, 1)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"{path}: falta el bloque fmt")
+                format_code, channels, sample_rate = struct.unpack("<HHI", fmt[:8])
+                bits = struct.unpack("<H", fmt[14:16])[0]
+                if format_code == WAVE_FORMAT_EXTENSIBLE:
+                    # El formato real está en el subformato (primeros 2 bytes del GUID)
+                    format_code = struct.unpack("<H", fmt[24:26])[0]
+                return sample_rate, channels, format_code, bits, wav.tell(), chunk_size
+            else:
+                # Saltar bloques desconocidos (LIST, fact, ...) con su relleno
+                wav.seek(chunk_size + chunk_size % 2, 1)
+
+def wav_chunks(path, chunk_frames=8192, loop=False):
+    """Generador de bloques (n, 2) en [-1, 1] leídos de un WAV mapeado en memoria.
+
+    Canal izquierdo -> columna 0, derecho -> columna 1 (un WAV mono se duplica).
+    La memoria usada es constante: solo se convierte el bloque actual.
+    """
+    sample_rate, channels, format_code, bits, offset, size = read_wav_layout(path)
+    if (format_code, bits) not in SAMPLE_FORMATS:
+        raise ValueError(f"{path}: formato de muestra no admitido ({format_code}, {bits} bits)")
+    dtype, scale = SAMPLE_FORMATS[(format_code, bits)]
+
+    frame_count = size // (channels * np.dtype(dtype).itemsize)
+    frames = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(frame_count, channels))
+    while True:
+        for start in range(0, frame_count, chunk_frames):
+            block = np.asarray(frames[start:start + chunk_frames, :2], dtype=np.float32)
+            if scale is None:
+                block = (block - 128.0) / 128.0  # PCM de 8 bits sin signo
+            else:
+                block /= scale
+            if channels == 1:
+                block = np.repeat(block, 2, axis=1)
+            yield block
+        if not loop or frame_count == 0:
+            return
+
+def resample_chunks(chunks, input_rate, output_rate):
+    """Remuestrea una secuencia de bloques (n, 2) con interpolación lineal, sin cortes entre bloques"""
+    step = input_rate / output_rate
+    position = 0.0  # siguiente muestra de salida, en índices de entrada
+    base = 0  # índice de entrada del primer frame del bloque actual
+    previous = None  # último frame del bloque anterior
+    for block in chunks:
+        if previous is not None:
+            # El último frame anterior permite interpolar a través del borde
+            block = np.concatenate((previous, block))
+            start = base - 1
+        else:
+            start = base
+        last = start + len(block) - 1
+
+        if position <= last:
+            count = int((last - position) // step) + 1
+            positions = position + step * np.arange(count)
+            indices = np.arange(start, last + 1)
+            yield np.column_stack((np.interp(positions, indices, block[:, 0]),
+                                   np.interp(positions, indices, block[:, 1])))
+            position += count * step
+
+        base = last + 1
+        previous = block[-1:]
+
+class WavXYSource:
+    """Fuente XY para el CRT: izquierda a las placas horizontales, derecha a las verticales.
+
+    read(n) entrega las siguientes n muestras ya remuestreadas a la frecuencia de
+    muestreo interna del haz.
+    """
+    def __init__(self, path, output_rate, chunk_frames=8192, loop=True):
+        self.path = path
+        self.sample_rate, _, _, _, _, _ = read_wav_layout(path)
+        self.output_rate = output_rate
+        self.chunk_frames = chunk_frames
+        self.loop = loop
+        self.rewind()
+
+    def rewind(self):
+        chunks = wav_chunks(self.path, self.chunk_frames, self.loop)
+        self.pipeline = resample_chunks(chunks, self.sample_rate, self.output_rate)
+        self.pending = np.zeros((0, 2))
+        self.samples_read = 0
+        self.finished = False
+
+    @property
+    def position(self):
+        """Segundos del archivo ya reproducidos (incluye las vueltas si se repite)"""
+        return self.samples_read / self.output_rate
+
+    def read(self, count):
+        """Las siguientes `count` muestras (puede devolver menos si el archivo terminó)"""
+        parts = [self.pending]
+        available = len(self.pending)
+        while available < count and not self.finished:
+            block = next(self.pipeline, None)
+            if block is None:
+                self.finished = True
+                break
+            parts.append(block)
+            available += len(block)
+
+        samples = np.concatenate(parts) if len(parts) > 1 else self.pending
+        self.pending = samples[count:]
+        self.samples_read += min(count, len(samples))
+        return samples[:count]
@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+# Sin ventana ni audio: drivers "dummy" de SDL
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from calculos import LISSAJOUS_RATIOS
+from engine import Mode
+from main import CRTSimulation
+from profiler import FrameProfiler
+from thumbnails import ThumbnailRenderer
+
+# Barrido por defecto
+PERSISTENCE_TIMES = [0.1, 1.0, 10.0]
+WINDOW_SIZES = [(1200, 720), (1920, 1080)]
+
+# Etapas que se reportan en cada caso
+REPORTED_STAGES = ['frame', 'update_simulation', 'draw_crt_screen', 'draw_glowing_circle',
+                   'draw_control_panel', 'flip']
+
+# Diferencias menores que esto (ms) se consideran ruido al comparar
+MIN_STAGE_DELTA_MS = 0.05
+
+def benchmark_cases(persistence_times=PERSISTENCE_TIMES, window_sizes=WINDOW_SIZES, ratios=None):
+    """Lista de casos: Manual y cada proporción de Lissajous, por persistencia y tamaño de ventana"""
+    if ratios is None:
+        ratios = LISSAJOUS_RATIOS
+    cases = []
+    for width, height in window_sizes:
+        for persistence_time in persistence_times:
+            cases.append({'mode': Mode.MANUAL.value, 'ratio': None,
+                          'persistence_time': persistence_time, 'window': [width, height]})
+            for ratio in ratios:
+                cases.append({'mode': Mode.LISSAJOUS.value, 'ratio': list(ratio),
+                              'persistence_time': persistence_time, 'window': [width, height]})
+    for case in cases:
+        case['name'] = case_name(case)
+    return cases
+
+def case_name(case):
+    """Nombre estable del caso (clave para comparar contra la línea base)"""
+    mode = case['mode'].lower()
+    if case['ratio']:
+        mode += f"-{case['ratio'][0]}:{case['ratio'][1]}"
+    width, height = case['window']
+    return f"{mode}-p{case['persistence_time']:g}-{width}x{height}"
+
+def prepare_case(simulation, case):
+    """Configura la simulación para el caso y la lleva al estado estable"""
+    if list(simulation.screen.get_size()) != case['window']:
+        simulation.resize_window(case['window'])
+
+    simulation.engine.reset()
+    simulation.current_mode = Mode(case['mode'])
+    simulation.persistence_time = case['persistence_time']
+    if case['ratio']:
+        simulation.freq_horizontal, simulation.freq_vertical = case['ratio']
+        simulation.selected_ratio_index = LISSAJOUS_RATIOS.index(tuple(case['ratio']))
+    else:
+        # Haz desviado fuera del centro en modo Manual
+        simulation.vertical_voltage = 250.0
+        simulation.horizontal_voltage = -150.0
+    simulation.slider_manager.update_sliders_from_values()
+
+    # Llenar el fósforo: simular una persistencia completa antes de medir
+    simulation.engine.run_for(case['persistence_time'])
+    simulation.damage.invalidate_all()
+
+def run_case(simulation, case, frames=120, warmup_frames=10, dt=1 / 60):
+    """Ejecuta `frames` frames sin límite de FPS y devuelve el resultado del caso"""
+    prepare_case(simulation, case)
+    for _ in range(warmup_frames):
+        simulation.run_frame(dt)
+
+    # Profiler nuevo por caso, con draw_glowing_circle medido aparte
+    profiler = FrameProfiler(simulation)
+    profiler.instrument(simulation.visualization, 'draw_glowing_circle')
+    profiler.enable()
+    simulation.profiler = profiler
+
+    start = time.perf_counter()
+    try:
+        for _ in range(frames):
+            simulation.run_frame(dt)
+    finally:
+        profiler.remove_instruments()
+        profiler.disable()
+        simulation.thumbnails.close()
+    elapsed = time.perf_counter() - start
+
+    stats = profiler.summary()
+    return {
+        **case,
+        'frames': frames,
+        'fps': frames / elapsed,
+        'allocations': stats['surfaces_allocated'],
+        'phosphor_points': stats['phosphor_points']['p50'],
+        'stages': {name: stats[name] for name in REPORTED_STAGES},
+    }
+
+def run_benchmarks(cases, frames=120, progress=True):
+    simulation = CRTSimulation()
+    # Sin miniaturas: ni pool de procesos ni escrituras en la caché del usuario durante la medición
+    simulation.thumbnails = ThumbnailRenderer(size=simulation.thumbnails.size, cache_dir=None, workers=0)
+    results = []
+    for i, case in enumerate(cases):
+        result = run_case(simulation, case, frames=frames)
+        results.append(result)
+        if progress:
+            print(f"[{i + 1}/{len(cases)}] {case['name']}: {result['fps']:.1f} fps, "
+                  f"frame p50 {result['stages']['frame']['p50']:.2f} ms", file=sys.stderr)
+    pygame.quit()
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'frames_per_case': frames,
+        },
+        'cases': results,
+    }
+
+def compare(results, baseline, threshold=0.15):
+    """Compara contra una línea base; devuelve la lista de regresiones encontradas"""
+    baseline_cases = {case['name']: case for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        reference = baseline_cases.get(case['name'])
+        if reference is None:
+            continue
+
+        if case['fps'] < reference['fps'] * (1 - threshold):
+            regressions.append((case['name'], 'fps', reference['fps'], case['fps']))
+
+        for stage in REPORTED_STAGES:
+            old = reference['stages'].get(stage, {}).get('p50')
+            new = case['stages'][stage]['p50']
+            if old is not None and new > old * (1 + threshold) and new - old > MIN_STAGE_DELTA_MS:
+                regressions.append((case['name'], f"{stage} p50 ms", old, new))
+
+        if case['allocations']['p50'] > reference['allocations']['p50']:
+            regressions.append((case['name'], 'allocations p50',
+                                reference['allocations']['p50'], case['allocations']['p50']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sin pantalla de la simulación del CRT")
+    parser.add_argument("--output", default="benchmark.json", help="Archivo JSON de resultados")
+    parser.add_argument("--frames", type=int, default=120, help="Frames medidos por caso")
+    parser.add_argument("--persistence", type=float, nargs="+", default=PERSISTENCE_TIMES,
+                        help="Tiempos de persistencia (s)")
+    parser.add_argument("--sizes", nargs="+", default=[f"{w}x{h}" for w, h in WINDOW_SIZES],
+                        help="Tamaños de ventana, p. ej. 1200x720")
+    parser.add_argument("--ratios", nargs="+", default=None,
+                        help="Proporciones de Lissajous a medir, p. ej. 1:1 3:2 (por defecto todas)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON de referencia para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Tolerancia relativa antes de marcar una regresión")
+    args = parser.parse_args()
+
+    window_sizes = [tuple(int(v) for v in size.split("x")) for size in args.sizes]
+    ratios = None
+    if args.ratios:
+        ratios = [tuple(int(v) for v in ratio.split(":")) for ratio in args.ratios]
+
+    cases = benchmark_cases(args.persistence, window_sizes, ratios)
+    results = run_benchmarks(cases, frames=args.frames)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"{len(cases)} casos guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESIÓN {name}: {metric} {old:.2f} -> {new:.2f}")
+        if regressions:
+            sys.exit(1)
+        print("Sin regresiones")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+class LRUCache:
+    """Caché acotada con desalojo del elemento usado menos recientemente"""
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """Devuelve el valor guardado (o None) y lo marca como usado recientemente"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Guarda un valor desalojando los más antiguos si se supera el tamaño"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.evict_oldest()
+
+    def evict_oldest(self):
+        """Elimina la entrada usada menos recientemente y la devuelve"""
+        return self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        """Contadores para ajustar el tamaño de la caché"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class TextRenderCache(LRUCache):
+    """Caché de superficies de texto ya renderizadas"""
+    def render(self, font, text, antialias, color):
+        """Equivalente a font.render(text, antialias, color) pero reutilizando superficies"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.get(key)
+        if surface is None:
+            surface = font.render(text, antialias, color)
+            self.put(key, surface)
+        return surface
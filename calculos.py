@@ -1,22 +1,93 @@
-import math
+import numpy as np
+from modes import Mode
+
+# Proporciones de frecuencia (horizontal, vertical) del grid de Lissajous
+LISSAJOUS_RATIOS = [
+    (1, 1), (1, 2), (2, 1), (1, 3), 
+    (3, 1), (2, 3), (3, 2), (1, 4), 
+    (4, 1), (3, 4), (4, 3), (2, 5),
+    (5, 2), (3, 5), (5, 3), (4, 5), 
+    (5, 4), (1, 6), (6, 1), (5, 6)
+]
+
+def lissajous_positions(times, freq_horizontal, freq_vertical, phase_horizontal, phase_vertical,
+                        screen_x, screen_y, screen_size):
+    """Calcula de una vez las posiciones en pantalla para un vector de tiempos (modo Lissajous)"""
+    amplitude = screen_size / 2.2
+    x_deflection = amplitude * np.sin(2 * np.pi * freq_horizontal * times + phase_horizontal)
+    y_deflection = amplitude * np.sin(2 * np.pi * freq_vertical * times + phase_vertical)
+    
+    # Convertir a coordenadas de pantalla (truncando igual que int())
+    screen_xs = (screen_x + screen_size // 2 + x_deflection).astype(np.int32)
+    screen_ys = (screen_y + screen_size // 2 - y_deflection).astype(np.int32)  # Y invertida
+    return screen_xs, screen_ys
 
 class Calculos:
     def __init__(self, crt_simulation):
         self.crt = crt_simulation
     
+    def deflection_voltages(self, times=None):
+        """Voltajes de deflexión (horizontal, vertical) actuales o para un arreglo de tiempos"""
+        if self.crt.current_mode == Mode.MANUAL:
+            return self.crt.horizontal_voltage, self.crt.vertical_voltage
+        
+        if self.crt.current_mode == Mode.AUDIO_XY:
+            # Última muestra de audio del paso (el audio no se puede evaluar en cualquier tiempo)
+            horizontal, vertical = self.crt.audio_voltages
+            if not len(horizontal):
+                return 0.0, 0.0
+            return horizontal[-1], vertical[-1]
+        
+        if self.crt.current_mode == Mode.TIME_BASE:
+            # Última muestra visible del barrido (0 V con el haz apagado)
+            horizontal, vertical = self.crt.sweep_voltages
+            if not len(horizontal):
+                return 0.0, 0.0
+            return horizontal[-1], vertical[-1]
+        
+        # En modo Lissajous, la forma de onda de cada canal (tabla precalculada)
+        if times is None:
+            times = self.crt.time
+        amplitude = self.crt.lissajous_voltage_amplitude
+        channels = self.crt.channels
+        horizontal = amplitude * channels['horizontal'].block(times, self.crt.freq_horizontal, self.crt.phase_horizontal)
+        vertical = amplitude * channels['vertical'].block(times, self.crt.freq_vertical, self.crt.phase_vertical)
+        return horizontal, vertical
+    
+    def to_screen(self, x_deflection, y_deflection):
+        """Convierte una deflexión en metros a coordenadas de pantalla"""
+        pixels_per_meter = (self.crt.crt_screen_size / 2) / self.crt.optics.screen_half_width
+        screen_x = self.crt.crt_screen_x + self.crt.crt_screen_size // 2 + x_deflection * pixels_per_meter
+        screen_y = self.crt.crt_screen_y + self.crt.crt_screen_size // 2 - y_deflection * pixels_per_meter  # Y invertida
+        return screen_x, screen_y
+    
     def calculate_electron_position(self):
-        """Calcula la posición del electrón en la pantalla del CRT"""
-        if self.crt.current_mode.value == "Manual":
-            # En modo manual, la posición es directamente proporcional al voltaje
-            x_deflection = (self.crt.horizontal_voltage / self.crt.max_deflection_voltage) * (self.crt.crt_screen_size / 2)
-            y_deflection = (self.crt.vertical_voltage / self.crt.max_deflection_voltage) * (self.crt.crt_screen_size / 2)
-        else:
-            # En modo Lissajous, usar funciones sinusoidales
-            x_deflection = (self.crt.crt_screen_size / 2.2) * math.sin(2 * math.pi * self.crt.freq_horizontal * self.crt.time + self.crt.phase_horizontal)
-            y_deflection = (self.crt.crt_screen_size / 2.2) * math.sin(2 * math.pi * self.crt.freq_vertical * self.crt.time + self.crt.phase_vertical)
+        """Calcula la posición del electrón en la pantalla del CRT (None si choca con una placa)"""
+        horizontal, vertical = self.deflection_voltages()
+        x_deflection, y_deflection, reaches = self.crt.optics.screen_deflection(
+            float(horizontal), float(vertical), self.crt.acceleration_voltage)
+        if not reaches:
+            return None
         
-        # Convertir a coordenadas de pantalla
-        screen_x = self.crt.crt_screen_x + self.crt.crt_screen_size // 2 + x_deflection
-        screen_y = self.crt.crt_screen_y + self.crt.crt_screen_size // 2 - y_deflection  # Y invertida
+        screen_x, screen_y = self.to_screen(x_deflection, y_deflection)
+        return int(screen_x), int(screen_y)
+    
+    def calculate_electron_positions(self, times):
+        """Versión vectorizada para un arreglo de tiempos.
+
+        Devuelve (xs, ys, reaches): reaches indica qué muestras llegan a la pantalla.
+        """
+        return self.positions_from_voltages(*self.deflection_voltages(times))
+    
+    def positions_from_voltages(self, horizontal, vertical, acceleration_voltage=None):
+        """Posiciones en pantalla para arreglos de voltajes de deflexión (horizontal, vertical).
         
-        return int(screen_x), int(screen_y)
\ No newline at end of file
+        Devuelve (xs, ys, reaches) igual que calculate_electron_positions.
+        Sin acceleration_voltage se usa el voltaje de aceleración actual.
+        """
+        if acceleration_voltage is None:
+            acceleration_voltage = self.crt.acceleration_voltage
+        x_deflection, y_deflection, reaches = self.crt.optics.screen_deflection(
+            horizontal, vertical, acceleration_voltage)
+        screen_x, screen_y = self.to_screen(x_deflection, y_deflection)
+        return screen_x.astype(np.int32), screen_y.astype(np.int32), reaches
@@ -0,0 +1,48 @@
+import pygame
+
+class DamageTracker:
+    """Registra las regiones de la pantalla que cambiaron en el frame actual"""
+    def __init__(self, crt_simulation):
+        self.crt = crt_simulation
+        self.rects = []
+        self.states = {}
+        self.full_redraw = True
+
+    def invalidate_all(self):
+        """Fuerza a redibujar y presentar la ventana completa en el siguiente frame"""
+        self.full_redraw = True
+        self.states.clear()
+
+    def begin_region(self, key, rect, state, force=False, group='main'):
+        """Indica si una región debe redibujarse.
+
+        Si su estado cambió desde el último frame se restaura el fondo
+        estático bajo el rectángulo y se registra como región sucia. El
+        rectángulo está en coordenadas de diseño del grupo de la interfaz.
+        """
+        unchanged = key in self.states and self.states[key] == state
+        if unchanged and not force and not self.full_redraw:
+            return False
+
+        self.states[key] = state
+        if not self.full_redraw:
+            rect = self.crt.layout.rect(*rect, group)
+            self.crt.screen.blit(self.crt.compositor.background, rect, rect)
+            self.rects.append(rect)
+        return True
+
+    def present(self):
+        """Envía a la pantalla solo las regiones que cambiaron"""
+        window = self.crt.window
+        if self.crt.screen is not window:
+            # Render interno de otro tamaño: una sola copia escalada a toda la ventana
+            if self.full_redraw or self.rects:
+                pygame.transform.smoothscale(self.crt.screen, window.get_size(), window)
+                pygame.display.flip()
+        elif self.full_redraw:
+            pygame.display.flip()
+        elif self.rects:
+            pygame.display.update(self.rects)
+
+        self.rects = []
+        self.full_redraw = False
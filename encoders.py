@@ -0,0 +1,123 @@
+import struct
+import zlib
+import numpy as np
+
+# Codificadores de imágenes sin dependencias extra (solo NumPy y zlib), para
+# usarse en procesos de trabajo sin pygame. Los arreglos son (alto, ancho, 3).
+
+def encode_png(pixels):
+    """Codifica un arreglo RGB uint8 como PNG"""
+    height, width, _ = pixels.shape
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    # Cada fila va precedida por el tipo de filtro (0 = sin filtro)
+    rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 0] = 0
+    rows[:, 1:] = pixels.reshape(height, width * 3)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)) + chunk(b"IEND", b""))
+
+def quantize(pixels, colors=256):
+    """Reduce la imagen a una paleta de hasta `colors` colores.
+
+    Devuelve (índices por píxel, paleta (colors, 3)). Se agrupa en RGB de 5 bits y
+    se conservan los colores más frecuentes; el resto se asigna al más cercano.
+    """
+    reduced = (pixels >> 3).astype(np.uint16).reshape(-1, 3)
+    keys = (reduced[:, 0] << 10) | (reduced[:, 1] << 5) | reduced[:, 2]
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    unique_rgb = np.stack(((unique >> 10) & 31, (unique >> 5) & 31, unique & 31), axis=1) * 8 + 4
+
+    if len(unique) <= colors:
+        palette = unique_rgb
+        indices = inverse
+    else:
+        keep = np.argsort(-counts)[:colors]
+        palette = unique_rgb[keep]
+        distance = ((unique_rgb[:, None, :].astype(np.int32) - palette[None, :, :]) ** 2).sum(axis=2)
+        indices = distance.argmin(axis=1)[inverse]
+
+    full_palette = np.zeros((colors, 3), dtype=np.uint8)
+    full_palette[:len(palette)] = palette
+    return indices.astype(np.uint8), full_palette
+
+def lzw_encode(indices, min_code_size=8):
+    """Compresión LZW de GIF (códigos de largo variable, de 9 a 12 bits)"""
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+
+    output = bytearray()
+    bit_buffer = 0
+    bit_count = 0
+
+    code_size = min_code_size + 1
+    next_code = end_code + 1
+    table = {}
+
+    def emit(code):
+        nonlocal bit_buffer, bit_count
+        bit_buffer |= code << bit_count
+        bit_count += code_size
+        while bit_count >= 8:
+            output.append(bit_buffer & 0xFF)
+            bit_buffer >>= 8
+            bit_count -= 8
+
+    emit(clear_code)
+    data = indices.tobytes()
+    prefix = data[0]
+    for value in data[1:]:
+        key = (prefix << 8) | value
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        emit(prefix)
+        if next_code == 4096:
+            # Tabla llena: reiniciar
+            emit(clear_code)
+            table = {}
+            code_size = min_code_size + 1
+            next_code = end_code + 1
+        else:
+            table[key] = next_code
+            if next_code == 1 << code_size:
+                code_size += 1
+            next_code += 1
+        prefix = value
+
+    emit(prefix)
+    emit(end_code)
+    if bit_count:
+        output.append(bit_buffer & 0xFF)
+    return bytes(output)
+
+def gif_header(width, height):
+    """Cabecera GIF89a sin paleta global y con repetición infinita"""
+    screen = struct.pack("<6sHHBBB", b"GIF89a", width, height, 0x70, 0, 0)
+    loop = b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00"
+    return screen + loop
+
+GIF_TRAILER = b"\x3B"
+
+def encode_gif_frame(pixels, delay_cs):
+    """Un cuadro GIF completo (control, descriptor, paleta local y datos LZW)"""
+    height, width, _ = pixels.shape
+    indices, palette = quantize(pixels)
+    control = struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x04, delay_cs, 0, 0)
+    descriptor = struct.pack("<BHHHHB", 0x2C, 0, 0, width, height, 0x87)
+
+    data = lzw_encode(indices)
+    blocks = bytearray([8])  # tamaño mínimo de código
+    for start in range(0, len(data), 255):
+        block = data[start:start + 255]
+        blocks.append(len(block))
+        blocks += block
+    blocks.append(0)
+    return control + descriptor + palette.tobytes() + bytes(blocks)
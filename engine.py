@@ -0,0 +1,291 @@
+import numpy as np
+from modes import Mode
+from calculos import Calculos
+from phosphor import LiveSampleCounter, PhosphorScreen
+from optics import ElectronOptics
+from ensemble import BeamEnsemble
+from waveforms import WaveformGenerator
+from timebase import TimeBase
+from figures import FigureCache
+
+class SimulationEngine:
+    """Motor de la simulación del CRT, independiente de pygame.
+
+    Avanza en pasos de tiempo fijos: el haz, el decaimiento del fósforo y
+    los timestamps dependen solo del tiempo simulado, no de los FPS.
+    """
+    def __init__(self, screen_x, screen_y, screen_size, timestep=1 / 240, beam_sample_rate=20000.0,
+                 ensemble_size=4096, timebase_oversampling=4):
+        self.timestep = timestep  # segundos simulados por paso
+        self.max_frame_time = 0.25  # tiempo real máximo que se simula por frame
+        self.accumulator = 0.0
+
+        # Modo actual
+        self.current_mode = Mode.MANUAL
+        self.paused = False
+
+        # Rangos para los controles
+        self.max_voltage = 1000.0
+        self.max_deflection_voltage = 500.0
+        self.max_persistence_time = 10.0  # segundos
+
+        # Geometría del tubo (placas y pantalla) para calcular la deflexión real
+        self.optics = ElectronOptics()
+        # Amplitud de los voltajes del modo Lissajous
+        self.lissajous_voltage_amplitude = self.max_deflection_voltage / 1.1
+        # Generador de forma de onda de cada canal (una placa por canal)
+        self.channels = {'horizontal': WaveformGenerator(), 'vertical': WaveformGenerator()}
+
+        # Fuente de audio estéreo del modo XY (audio.WavXYSource) o None
+        self.audio_source = None
+        # Voltajes (horizontal, vertical) de las muestras de audio del último paso
+        self.audio_voltages = (np.zeros(0), np.zeros(0))
+
+        # Base de tiempo del modo Y-T (diente de sierra y disparo), muestreada más rápido
+        # que el haz para que las señales de kHz no se vean como polígonos
+        self.timebase = TimeBase(beam_sample_rate * timebase_oversampling)
+        # Voltajes (horizontal, vertical) de las muestras visibles del último paso en modo Y-T
+        self.sweep_voltages = (np.zeros(0), np.zeros(0))
+
+        # Haz como conjunto de electrones (tamaño del punto según la óptica);
+        # ensemble_size electrones por paso de simulación
+        self.ensemble = BeamEnsemble(self.optics, size=ensemble_size)
+        self.ensemble_enabled = False
+
+        # Grabador de la sesión (recording.SessionRecorder) o None
+        self.recorder = None
+
+        # Pantalla del CRT
+        self.crt_screen_x = screen_x
+        self.crt_screen_y = screen_y
+        self.crt_screen_size = screen_size
+
+        # Muestreo interno del haz e intensidad depositada por segundo de permanencia
+        self.beam_sample_rate = beam_sample_rate  # Hz
+        self.beam_energy = 20000.0
+
+        # Tiempo simulado total (timestamps del fósforo)
+        self.clock = 0.0
+
+        # Cantidad de muestras del haz dentro de la persistencia (la imagen está en phosphor_screen)
+        self.live_samples = LiveSampleCounter()
+        # Imagen de intensidad del fósforo del tamaño de la pantalla
+        self.phosphor_screen = PhosphorScreen(self.crt_screen_size)
+
+        self.calculos = Calculos(self)
+        # Figuras de Lissajous de periodo cerrado (proporciones racionales), precalculadas
+        self.figures = FigureCache(self)
+        self.reset()
+
+    def reset(self):
+        """Restaura los valores predeterminados y limpia la pantalla"""
+        # Variables físicas del CRT
+        self.acceleration_voltage = 1000.0  # V
+        self.vertical_voltage = 0.0  # V
+        self.horizontal_voltage = 0.0  # V
+        self.persistence_time = 1.0  # segundos
+
+        # Variables para modo Lissajous
+        self.freq_vertical = 1.0  # Hz
+        self.freq_horizontal = 1.0  # Hz
+        self.phase_vertical = 0.0  # radianes
+        self.phase_horizontal = 0.0  # radianes
+        self.time = 0.0
+        for generator in self.channels.values():
+            generator.shape = 'sine'
+
+        if self.audio_source is not None:
+            self.audio_source.rewind()
+        self.audio_voltages = (np.zeros(0), np.zeros(0))
+        self.timebase.reset()
+        self.sweep_voltages = (np.zeros(0), np.zeros(0))
+
+        # Estado del paso anterior, para interpolar al dibujar
+        self.previous_time = self.time
+        self.beam_position = None  # None si el haz no llega a la pantalla
+        self.previous_beam = None
+
+        self.clear_screen()
+
+    def clear_screen(self):
+        """Borra los puntos guardados y la imagen del fósforo"""
+        self.live_samples.clear()
+        self.phosphor_screen.clear()
+
+    def advance(self, real_dt):
+        """Avanza tantos pasos fijos como quepan en el tiempo real transcurrido.
+
+        Devuelve la fracción (0-1) del siguiente paso ya transcurrida, para
+        interpolar entre el estado anterior y el actual al dibujar.
+        """
+        if self.paused:
+            # Durante pausa: NO eliminar puntos basados en persistencia
+            return 1.0
+
+        self.accumulator += min(real_dt, self.max_frame_time)
+        while self.accumulator >= self.timestep:
+            self.step()
+            self.accumulator -= self.timestep
+        return self.accumulator / self.timestep
+
+    def run_for(self, seconds):
+        """Simula una cantidad de segundos tan rápido como sea posible"""
+        for _ in range(int(round(seconds / self.timestep))):
+            self.step()
+
+    def step(self):
+        """Un paso de simulación de duración fija"""
+        dt = self.timestep
+        self.previous_time = self.time
+        self.previous_beam = self.beam_position
+        if self.recorder is not None:
+            # Keyframes por reloj, aunque el haz no llegue a la pantalla
+            self.recorder.tick()
+
+        # El fósforo se atenúa según las tablas de su tipo (al leerlo)
+        self.phosphor_screen.advance(dt, self.persistence_time)
+
+        if self.current_mode in (Mode.LISSAJOUS, Mode.AUDIO_XY, Mode.TIME_BASE):
+            # Muestrear el haz varias veces dentro del paso (vectorizado) para que
+            # las frecuencias altas no se vean como polígonos
+            sample_rate = self.timebase.sample_rate if self.current_mode == Mode.TIME_BASE else self.beam_sample_rate
+            sample_count = max(1, int(round(dt * sample_rate)))
+            offsets = np.arange(1, sample_count + 1) * (dt / sample_count)
+
+            if self.current_mode == Mode.LISSAJOUS:
+                # Proporción racional: las posiciones se leen de la figura precalculada
+                positions = self.figures.positions(self.time + offsets)
+                if positions is None:
+                    positions = self.calculos.calculate_electron_positions(self.time + offsets)
+            else:
+                if self.current_mode == Mode.AUDIO_XY:
+                    horizontal, vertical = self.read_audio_voltages(sample_count)
+                    offsets = offsets[:len(horizontal)]  # el archivo pudo terminar
+                else:
+                    horizontal, vertical, visible = self.read_sweep_voltages(sample_count)
+                    offsets = offsets[visible]  # el haz está apagado entre barridos
+                positions = self.calculos.positions_from_voltages(horizontal, vertical)
+
+            xs, ys, reaches = positions
+            # Solo las muestras que no chocan con las placas llegan al fósforo
+            if not reaches.all():
+                xs, ys, offsets = xs[reaches], ys[reaches], offsets[reaches]
+            self.live_samples.add(self.clock + offsets)
+            if self.recorder is not None:
+                self.recorder.record_beam(xs, ys, self.clock + offsets, self.beam_energy * dt / sample_count)
+            if not self.ensemble_enabled:
+                self.phosphor_screen.deposit(xs - self.crt_screen_x, ys - self.crt_screen_y,
+                                             self.beam_energy * dt / sample_count)
+            self.beam_position = (int(xs[-1]), int(ys[-1])) if len(xs) else None
+            if self.current_mode == Mode.TIME_BASE:
+                self.previous_beam = None  # entre barridos el haz salta: no se interpola
+            self.time += dt
+        else:
+            # Calcular nueva posición del electrón
+            electron_pos = self.calculos.calculate_electron_position()
+            self.beam_position = electron_pos
+
+            # Agregar punto con timestamp
+            if electron_pos is not None:
+                self.live_samples.add(self.clock + dt)
+                if self.recorder is not None:
+                    self.recorder.record_beam(electron_pos[0], electron_pos[1], self.clock + dt, self.beam_energy * dt)
+                if not self.ensemble_enabled:
+                    self.phosphor_screen.deposit([electron_pos[0] - self.crt_screen_x], [electron_pos[1] - self.crt_screen_y],
+                                                 self.beam_energy * dt)
+
+        if self.ensemble_enabled:
+            self.deposit_ensemble(dt)
+
+        self.clock += dt
+
+        # Remover puntos antiguos basado en persistencia
+        self.live_samples.expire(self.clock, self.persistence_time)
+
+    def show_figure(self):
+        """Deposita de una vez la figura completa, como si el haz la recorriera desde siempre.
+
+        Cada punto recibe la energía del estado estable del fósforo (una pasada
+        por periodo, mismo modelo que deposit: e / (1 - decaimiento(periodo)))
+        y su antigüedad. No hace nada si la figura no es periódica.
+        """
+        current = self.figures.current() if self.current_mode == Mode.LISSAJOUS else None
+        if current is None:
+            return
+        figure, base_frequency, cycle_offset = current
+        count = len(figure)
+        period = 1.0 / base_frequency
+
+        # Antigüedad de cada punto del periodo respecto del instante actual
+        now = (base_frequency * self.time + cycle_offset) % 1.0
+        ages = ((now - np.arange(count) / count) % 1.0) * period
+        # La persistencia del fósforo puede no estar al día si todavía no hubo un paso
+        self.phosphor_screen.persistence_time = self.persistence_time
+        energy = (self.beam_energy * period / count) / (1 - float(self.phosphor_screen.decay_factor(period)))
+
+        reaches = figure.reaches
+        xs, ys = figure.xs[reaches].astype(np.int32), figure.ys[reaches].astype(np.int32)
+        self.phosphor_screen.deposit(xs - self.crt_screen_x, ys - self.crt_screen_y, energy, ages[reaches])
+
+        # Puntos vivos de la última vuelta, del más viejo al más nuevo
+        order = np.argsort(-ages[reaches], kind='stable')
+        alive = order[ages[reaches][order] < self.persistence_time]
+        self.live_samples.add(self.clock - ages[reaches][alive])
+
+    def read_audio_voltages(self, count):
+        """Voltajes de las siguientes `count` muestras del audio: izquierda -> horizontal, derecha -> vertical"""
+        if self.audio_source is None:
+            samples = np.zeros((0, 2))
+        else:
+            samples = self.audio_source.read(count) * self.lissajous_voltage_amplitude
+        self.audio_voltages = (samples[:, 0], samples[:, 1])
+        return self.audio_voltages
+
+    def read_sweep_voltages(self, count):
+        """Voltajes de las siguientes `count` muestras en modo Y-T.
+
+        La entrada es la forma de onda del canal vertical a la frecuencia de la
+        base de tiempo; el diente de sierra recorre la pantalla de izquierda a
+        derecha. Devuelve (horizontal, vertical, índices de las muestras visibles).
+        """
+        timebase = self.timebase
+        amplitude = self.lissajous_voltage_amplitude
+        signal = amplitude * self.channels['vertical'].block(timebase.sample_times(count),
+                                                             timebase.signal_frequency, self.phase_vertical)
+        ramp, visible = timebase.process(signal)
+        self.sweep_voltages = ((2 * ramp - 1) * amplitude, signal[visible])
+        return (*self.sweep_voltages, visible)
+
+    def deposit_ensemble(self, dt):
+        """Lanza los electrones del paso y deposita en el fósforo donde aterriza cada uno"""
+        if self.current_mode == Mode.LISSAJOUS:
+            # Cada electrón se emite en un instante distinto dentro del paso (ya avanzado)
+            emission_times = self.time - dt + self.ensemble.emission_offsets(dt)
+            horizontal, vertical = self.calculos.deflection_voltages(emission_times)
+        elif self.current_mode in (Mode.AUDIO_XY, Mode.TIME_BASE):
+            # La muestra (de audio o del barrido) vigente en el instante de emisión de cada electrón
+            samples_h, samples_v = self.audio_voltages if self.current_mode == Mode.AUDIO_XY else self.sweep_voltages
+            if not len(samples_h):
+                return
+            index = (self.ensemble.emission_offsets(dt) / dt * len(samples_h)).astype(np.intp)
+            np.minimum(index, len(samples_h) - 1, out=index)
+            horizontal, vertical = samples_h[index], samples_v[index]
+        else:
+            horizontal, vertical = self.calculos.deflection_voltages()
+
+        x, y, reaches = self.ensemble.land(horizontal, vertical, self.acceleration_voltage)
+        screen_x, screen_y = self.calculos.to_screen(x[reaches], y[reaches])
+        self.phosphor_screen.deposit_points(screen_x - self.crt_screen_x, screen_y - self.crt_screen_y,
+                                            self.beam_energy * dt / self.ensemble.size)
+
+    def interpolated_time(self, alpha):
+        """Tiempo de Lissajous entre el paso anterior y el actual"""
+        return self.previous_time + (self.time - self.previous_time) * alpha
+
+    def interpolated_beam(self, alpha):
+        """Posición del haz interpolada entre el paso anterior y el actual"""
+        current = self.beam_position
+        if current is None or self.previous_beam is None:
+            return current
+        return (int(self.previous_beam[0] + (current[0] - self.previous_beam[0]) * alpha),
+                int(self.previous_beam[1] + (current[1] - self.previous_beam[1]) * alpha))
@@ -0,0 +1,94 @@
+import numpy as np
+from optics import MIN_ACCELERATION_VOLTAGE
+
+# e / (4 π ε0 √(2 e/m)): convierte corriente / Va^1.5 en perveancia generalizada
+PERVEANCE_FACTOR = 1 / (1.1127e-10 * np.sqrt(2 * 1.7588e11))
+
+class BeamEnsemble:
+    """Conjunto de electrones que forman el haz.
+
+    Cada electrón sale del crossover del cañón con su propia posición, ángulo,
+    energía e instante de emisión. El campo entre placas es uniforme, así que
+    la trayectoria de todos se integra de forma cerrada con operaciones de
+    arreglos (sin bucles de Python).
+    """
+    # Bloques de números aleatorios precalculados (se recorren con un desplazamiento al azar)
+    POOL_BLOCKS = 16
+
+    def __init__(self, optics, size=4096, energy_spread=0.5, transverse_energy=0.02,
+                 crossover_radius=2.5e-4, beam_current=5e-6, seed=None):
+        self.optics = optics
+        self.energy_spread = energy_spread  # V, dispersión térmica de la energía del cátodo
+        self.transverse_energy = transverse_energy  # eV, energía transversal (divergencia)
+        self.crossover_radius = crossover_radius  # m, radio rms del crossover
+        self.beam_current = beam_current  # A, origen de la repulsión de carga espacial
+        self.rng = np.random.default_rng(seed)
+        self.set_size(size)
+
+    def set_size(self, size):
+        """Cambia la cantidad de electrones por paso y regenera los números aleatorios"""
+        self.size = max(1, int(size))
+        pool_size = self.size * self.POOL_BLOCKS
+        # Filas: energía, x0, y0, ángulo x, ángulo y (normales) y emisión (uniforme)
+        self.normal_pool = self.rng.standard_normal((5, pool_size), dtype=np.float32)
+        self.uniform_pool = self.rng.random(pool_size, dtype=np.float32)
+
+    def draw(self):
+        """Ventana de `size` electrones de los números precalculados"""
+        start = int(self.rng.integers(0, self.normal_pool.shape[1] - self.size + 1))
+        stop = start + self.size
+        return self.normal_pool[:, start:stop], self.uniform_pool[start:stop]
+
+    def emission_offsets(self, dt):
+        """Instante de emisión de cada electrón dentro del paso (jitter uniforme)"""
+        _, uniform = self.draw()
+        return uniform * dt
+
+    def land(self, horizontal_voltage, vertical_voltage, acceleration_voltage):
+        """Punto de impacto (x, y) en metros de cada electrón y si llega a la pantalla.
+
+        Los voltajes pueden ser escalares o arreglos con un valor por electrón.
+        """
+        acceleration_voltage = max(acceleration_voltage, MIN_ACCELERATION_VOLTAGE)
+        normal, _ = self.draw()
+        energy, x0, y0, angle_x, angle_y = normal
+
+        # Voltaje de aceleración efectivo de cada electrón (dispersión de energía)
+        electron_voltage = np.maximum(acceleration_voltage + self.energy_spread * energy,
+                                      MIN_ACCELERATION_VOLTAGE)
+
+        # Posición en el crossover
+        x0 = self.crossover_radius * x0
+        y0 = self.crossover_radius * y0
+
+        # Divergencia térmica: v_transversal / v_longitudinal = √(E_t / Va)
+        divergence = np.sqrt(self.transverse_energy / acceleration_voltage)
+
+        # Carga espacial: haz uniforme, empuje radial proporcional a la distancia al eje.
+        # Con perveancia K = I / (4πε0 √(2e/m) Va^1.5), r'' = K r / a²
+        path_length = self.optics.crossover_distance
+        perveance = PERVEANCE_FACTOR * self.beam_current / acceleration_voltage ** 1.5
+        space_charge = perveance * path_length / self.crossover_radius ** 2
+
+        slope_x = divergence * angle_x + space_charge * x0
+        slope_y = divergence * angle_y + space_charge * y0
+
+        x, x_passes = self.through_plates(self.optics.horizontal_plates, x0, slope_x,
+                                          horizontal_voltage, electron_voltage, acceleration_voltage)
+        y, y_passes = self.through_plates(self.optics.vertical_plates, y0, slope_y,
+                                          vertical_voltage, electron_voltage, acceleration_voltage)
+        return x, y, x_passes & y_passes
+
+    def through_plates(self, plates, position, slope, voltage, electron_voltage, acceleration_voltage):
+        """Desplazamiento en la pantalla a lo largo de un eje y si el electrón no choca con las placas"""
+        path_length = self.optics.crossover_distance
+        entry = path_length - plates.plate_length - plates.drift_length
+
+        # Salida de las placas: recta hasta la entrada + parábola dentro del campo
+        exit_offset = (position + slope * (entry + plates.plate_length)
+                       + voltage * plates.plate_length ** 2 / (4 * plates.plate_gap * electron_voltage))
+        passes = np.abs(exit_offset) < plates.plate_gap / 2
+
+        # La sensibilidad escala como 1/Va: se corrige la nominal (cacheada) por electrón
+        sensitivity = plates.sensitivity(acceleration_voltage) * (acceleration_voltage / electron_voltage)
+        return position + slope * path_length + sensitivity * voltage, passes
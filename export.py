@@ -0,0 +1,244 @@
+import os
+import sys
+import queue
+import argparse
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+from encoders import encode_png, encode_gif_frame, gif_header, GIF_TRAILER
+from workers import spawn_pool
+
+# Memoria compartida abierta por cada proceso de trabajo (nombre -> SharedMemory)
+_worker_buffers = {}
+
+def _init_worker():
+    """Los procesos de codificación ceden la CPU al bucle de frames"""
+    if hasattr(os, "nice"):
+        os.nice(19)
+
+def _frame_slot(buffer_name, slot, shape):
+    """Vista del cuadro `slot` dentro de la memoria compartida (en el proceso de trabajo)"""
+    buffer = _worker_buffers.get(buffer_name)
+    if buffer is None:
+        buffer = shared_memory.SharedMemory(name=buffer_name)
+        _worker_buffers[buffer_name] = buffer
+    frame_bytes = shape[0] * shape[1] * 3
+    return np.ndarray((shape[0], shape[1], 3), dtype=np.uint8, buffer=buffer.buf,
+                      offset=slot * frame_bytes)
+
+def _write_png(buffer_name, slot, shape, path):
+    with open(path, "wb") as output:
+        output.write(encode_png(_frame_slot(buffer_name, slot, shape)))
+    return slot, None
+
+def _encode_gif(buffer_name, slot, shape, delay_cs):
+    return slot, encode_gif_frame(_frame_slot(buffer_name, slot, shape), delay_cs)
+
+class FrameExporter:
+    """Exporta la pantalla del CRT (o la ventana) como secuencia PNG o GIF animado.
+
+    Cada frame se copia una vez desde la vista de surfarray a una ranura libre de
+    memoria compartida y se codifica en un pool de procesos. Las ranuras son la
+    cola acotada: si no hay ninguna libre, la política decide entre descartar el
+    frame ('drop') o esperar al codificador ('block').
+
+    El tamaño del cuadro exportado se fija al empezar; si la ventana o la escala
+    de render cambian, la región se recalcula y se escala a ese tamaño. Si el
+    pool de codificación se rompe, la exportación se detiene con lo ya escrito.
+    """
+    POLICIES = ('drop', 'block')
+
+    def __init__(self, crt_simulation, output, region='screen', policy='drop', queue_size=8,
+                 workers=2, frame_step=None, fps=60):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política desconocida: {policy}")
+        self.crt = crt_simulation
+        self.output = output
+        self.policy = policy
+        self.gif = output.lower().endswith(".gif")
+
+        # Los GIF se exportan a 20 cuadros por segundo por defecto
+        if frame_step is None:
+            frame_step = 3 if self.gif else 1
+        self.frame_step = frame_step
+        self.delay_cs = max(2, round(100 * frame_step / fps))
+
+        # Tamaño de los cuadros exportados: el de la región al empezar
+        self.region = region
+        width, height = self.region_rect().size
+        self.size = (width, height)
+        self.shape = (height, width)
+
+        frame_bytes = width * height * 3
+        self.buffer = shared_memory.SharedMemory(create=True, size=frame_bytes * queue_size)
+        self.slots = [np.ndarray((height, width, 3), dtype=np.uint8,
+                                 buffer=self.buffer.buf, offset=i * frame_bytes)
+                      for i in range(queue_size)]
+        self.free_slots = queue.Queue()
+        for slot in range(queue_size):
+            self.free_slots.put(slot)
+
+        self.executor = spawn_pool(workers, initializer=_init_worker)
+        self.pending = deque()
+
+        if self.gif:
+            self.gif_output = open(output, "wb")
+            self.gif_output.write(gif_header(width, height))
+        else:
+            os.makedirs(output, exist_ok=True)
+
+        self.enabled = True
+        self.failed = False
+        self.frame_counter = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    def toggle(self):
+        if not self.failed:
+            self.enabled = not self.enabled
+
+    def region_rect(self):
+        """Región capturada en píxeles del destino de render actual"""
+        if self.region == 'screen':
+            rect = self.crt.layout.rect(self.crt.crt_screen_x, self.crt.crt_screen_y,
+                                        self.crt.crt_screen_size, self.crt.crt_screen_size)
+            return rect.clip(self.crt.screen.get_rect())
+        return self.crt.screen.get_rect()
+
+    def capture(self):
+        """Toma el frame actual de la ventana y lo encola para codificar"""
+        self.collect()
+        if not self.enabled:
+            return
+        self.frame_counter += 1
+        if (self.frame_counter - 1) % self.frame_step:
+            return
+
+        try:
+            slot = self.free_slots.get(block=self.policy == 'block')
+        except queue.Empty:
+            # El codificador va atrasado: se descarta este frame
+            self.frames_dropped += 1
+            return
+
+        rect = self.region_rect()
+        if rect.size == self.size:
+            # Vista sin copia de los píxeles (x, y); la única copia es hacia la memoria compartida
+            view = pygame.surfarray.pixels3d(self.crt.screen)[rect.left:rect.right, rect.top:rect.bottom]
+        else:
+            # La ventana o la escala de render cambiaron: se escala al tamaño de la exportación
+            view = pygame.surfarray.pixels3d(pygame.transform.smoothscale(
+                self.crt.screen.subsurface(rect), self.size))
+        np.copyto(self.slots[slot], view.transpose(1, 0, 2))
+        del view  # libera el bloqueo de la superficie
+
+        try:
+            if self.gif:
+                future = self.executor.submit(_encode_gif, self.buffer.name, slot, self.shape, self.delay_cs)
+            else:
+                path = os.path.join(self.output, f"frame_{self.frames_written + len(self.pending):06d}.png")
+                future = self.executor.submit(_write_png, self.buffer.name, slot, self.shape, path)
+        except BrokenProcessPool:
+            self.free_slots.put(slot)
+            self.fail()
+            return
+        # La ranura se libera apenas el proceso termina con ella
+        future.add_done_callback(lambda done, slot=slot: self.free_slots.put(slot))
+        self.pending.append(future)
+
+    def collect(self, wait=False):
+        """Escribe en orden los cuadros ya codificados"""
+        while self.pending and (wait or self.pending[0].done()):
+            try:
+                _, data = self.pending.popleft().result()
+            except BrokenProcessPool:
+                self.fail()
+                return
+            if self.gif:
+                self.gif_output.write(data)
+            self.frames_written += 1
+
+    def fail(self):
+        """El pool de codificación se rompió: se descartan los cuadros pendientes y se deja de exportar"""
+        self.frames_dropped += len(self.pending)
+        self.pending.clear()
+        self.enabled = False
+        self.failed = True
+        print(f"Exportación detenida: falló un proceso de codificación "
+              f"({self.frames_written} cuadros escritos en {self.output})", file=sys.stderr)
+
+    def close(self):
+        """Espera a los cuadros pendientes y cierra el archivo"""
+        self.collect(wait=True)
+        self.executor.shutdown()
+        if self.gif:
+            self.gif_output.write(GIF_TRAILER)
+            self.gif_output.close()
+        self.slots = []
+        self.buffer.close()
+        self.buffer.unlink()
+
+def export_offline(output, seconds, mode='Lissajous', ratio=(1, 2), persistence_time=1.0,
+                   replay=None, region='screen', fps=60, workers=None, frame_step=None, wav=None,
+                   phosphor_type='amarillo'):
+    """Renderiza sin ventana y más rápido que en tiempo real (sin descartar frames)"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from engine import Mode
+    from main import CRTSimulation
+    from thumbnails import ThumbnailRenderer
+
+    simulation = CRTSimulation()
+    # Sin miniaturas: ni pool de procesos ni escrituras en ~/.cache al exportar
+    simulation.thumbnails = ThumbnailRenderer(size=simulation.thumbnails.size, cache_dir=None, workers=0)
+    simulation.phosphor_screen.phosphor_type = phosphor_type
+    if replay:
+        from recording import SessionPlayer
+        simulation.player = SessionPlayer(replay)
+        simulation.player.seek(simulation.engine, simulation.player.start_time)
+    else:
+        simulation.current_mode = Mode(mode)
+        simulation.persistence_time = persistence_time
+        simulation.freq_horizontal, simulation.freq_vertical = ratio
+        if wav:
+            from audio import WavXYSource
+            simulation.audio_source = WavXYSource(wav, simulation.engine.beam_sample_rate)
+    simulation.slider_manager.update_sliders_from_values()
+
+    exporter = FrameExporter(simulation, output, region=region, policy='block',
+                             workers=workers or os.cpu_count(), frame_step=frame_step, fps=fps)
+    for _ in range(int(seconds * fps)):
+        simulation.run_frame(1 / fps)
+        exporter.capture()
+    exporter.close()
+    pygame.quit()
+    return exporter.frames_written
+
+def main():
+    from engine import Mode
+    from phosphor import PHOSPHOR_TYPES
+    parser = argparse.ArgumentParser(description="Exporta la pantalla del CRT sin ventana (más rápido que en tiempo real)")
+    parser.add_argument("output", help="Archivo .gif o directorio para la secuencia PNG")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duración simulada")
+    parser.add_argument("--mode", choices=[mode.value for mode in Mode], default="Lissajous")
+    parser.add_argument("--ratio", default="1:2", help="Proporción de Lissajous, p. ej. 3:2")
+    parser.add_argument("--persistence", type=float, default=1.0, help="Persistencia (s)")
+    parser.add_argument("--phosphor", choices=list(PHOSPHOR_TYPES), default="amarillo", help="Tipo de fósforo")
+    parser.add_argument("--replay", metavar="ARCHIVO", help="Exportar una sesión grabada")
+    parser.add_argument("--wav", metavar="ARCHIVO", help="WAV estéreo para el modo Audio XY")
+    parser.add_argument("--region", choices=["screen", "window"], default="screen")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--frame-step", type=int, default=None, help="Exportar uno de cada N frames")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos de codificación")
+    args = parser.parse_args()
+
+    ratio = tuple(int(v) for v in args.ratio.split(":"))
+    frames = export_offline(args.output, args.seconds, args.mode, ratio, args.persistence, args.replay,
+                            args.region, args.fps, args.workers, args.frame_step, args.wav, args.phosphor)
+    print(f"{frames} cuadros exportados en {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from fractions import Fraction
+import numpy as np
+
+from cache import LRUCache
+from optics import MIN_ACCELERATION_VOLTAGE
+
+def periodic_ratio(freq_horizontal, freq_vertical, max_harmonic=12):
+    """(p, q, frecuencia base) si las frecuencias están en proporción racional p:q, o None.
+
+    La figura se cierra después de un periodo de la frecuencia base
+    (freq_horizontal = p * base, freq_vertical = q * base).
+    """
+    if freq_horizontal <= 0 or freq_vertical <= 0:
+        return None
+    exact = freq_horizontal / freq_vertical
+    ratio = Fraction(exact).limit_denominator(max_harmonic)
+    if ratio.numerator > max_harmonic or abs(float(ratio) - exact) > 1e-9 * exact:
+        return None
+    return ratio.numerator, ratio.denominator, freq_horizontal / ratio.numerator
+
+class LissajousFigure:
+    """Un periodo completo de la figura en coordenadas de pantalla (en función de los ciclos de la frecuencia base)"""
+    __slots__ = ('xs', 'ys', 'reaches')
+
+    def __init__(self, xs, ys, reaches):
+        # Arreglos compactos: int16 alcanza para coordenadas de pantalla
+        self.xs = xs.astype(np.int16)
+        self.ys = ys.astype(np.int16)
+        self.reaches = reaches
+
+    def __len__(self):
+        return len(self.xs)
+
+    def indices(self, cycles):
+        """Índice en la tabla para cada fase (en ciclos): solo un módulo, sin evaluar ondas"""
+        index = (np.asarray(cycles) % 1.0 * len(self.xs)).astype(np.intp)
+        return np.minimum(index, len(self.xs) - 1, out=index)
+
+    def at(self, cycles):
+        """(xs, ys, reaches) para un arreglo de fases, igual que Calculos.calculate_electron_positions"""
+        index = self.indices(cycles)
+        return self.xs[index].astype(np.int32), self.ys[index].astype(np.int32), self.reaches[index]
+
+class FigureCache(LRUCache):
+    """Figuras de Lissajous de periodo cerrado, precalculadas una vez por configuración.
+
+    La clave es (p, q, diferencia de fase, formas de onda, voltaje de aceleración,
+    amplitud, pantalla): todo lo que cambia la curva en la pantalla. La fase
+    absoluta solo desplaza el punto de partida y no forma parte de la clave.
+    El voltaje se redondea a pasos relativos de VOLTAGE_STEP (la figura se
+    calcula con el voltaje redondeado), así arrastrar el slider no genera una
+    figura por frame. La última consulta se memoriza y solo se repite cuando
+    cambia algún control.
+    """
+    # Paso relativo del voltaje de aceleración (0.5 %: menos de medio píxel en el borde de la pantalla)
+    VOLTAGE_STEP = 0.005
+
+    def __init__(self, engine, points_per_cycle=2048, max_harmonic=12, max_size=32):
+        super().__init__(max_size)
+        self.engine = engine
+        self.points_per_cycle = points_per_cycle  # puntos por ciclo del eje más rápido
+        self.max_harmonic = max_harmonic
+        # (controles, resultado de current()) de la última consulta
+        self.memo = None
+
+    def clear(self):
+        super().clear()
+        self.memo = None
+
+    @classmethod
+    def quantize_voltage(cls, acceleration_voltage):
+        """Voltaje redondeado a pasos relativos de VOLTAGE_STEP (escala logarítmica)"""
+        steps = round(np.log(max(acceleration_voltage, MIN_ACCELERATION_VOLTAGE)) / cls.VOLTAGE_STEP)
+        return float(np.exp(steps * cls.VOLTAGE_STEP))
+
+    def controls(self):
+        """Valores de los controles de los que depende current()"""
+        engine = self.engine
+        channels = engine.channels
+        return (engine.freq_horizontal, engine.freq_vertical, engine.phase_horizontal, engine.phase_vertical,
+                channels['horizontal'].shape, channels['vertical'].shape, engine.acceleration_voltage,
+                engine.lissajous_voltage_amplitude, engine.crt_screen_x, engine.crt_screen_y,
+                engine.crt_screen_size)
+
+    def current(self):
+        """(figura, frecuencia base, desfase en ciclos) para los controles actuales, o None si no es periódica"""
+        controls = self.controls()
+        if self.memo is None or self.memo[0] != controls:
+            self.memo = (controls, self.lookup())
+        return self.memo[1]
+
+    def lookup(self):
+        """Busca (o calcula) la figura de los controles actuales"""
+        engine = self.engine
+        periodic = periodic_ratio(engine.freq_horizontal, engine.freq_vertical, self.max_harmonic)
+        if periodic is None:
+            return None
+        p, q, base_frequency = periodic
+
+        # Con s = base * t + a / p la figura es (H(p s), V(q s + d)): d es la diferencia de fase
+        phase_horizontal = engine.phase_horizontal / (2 * np.pi)
+        phase_vertical = engine.phase_vertical / (2 * np.pi)
+        difference = round((phase_vertical - q * phase_horizontal / p) % 1.0, 4)
+        channels = engine.channels
+        acceleration_voltage = self.quantize_voltage(engine.acceleration_voltage)
+        key = (p, q, difference, channels['horizontal'].shape, channels['vertical'].shape,
+               acceleration_voltage, engine.lissajous_voltage_amplitude,
+               engine.crt_screen_x, engine.crt_screen_y, engine.crt_screen_size)
+
+        figure = self.get(key)
+        if figure is None:
+            figure = self.build(p, q, difference, acceleration_voltage)
+            self.put(key, figure)
+        return figure, base_frequency, phase_horizontal / p
+
+    def build(self, p, q, difference, acceleration_voltage=None):
+        """Calcula un periodo a alta resolución (la única vez que se evalúan las ondas)"""
+        engine = self.engine
+        cycles = np.arange(self.points_per_cycle * max(p, q)) / (self.points_per_cycle * max(p, q))
+        amplitude = engine.lissajous_voltage_amplitude
+        horizontal = amplitude * engine.channels['horizontal'].block(cycles, p)
+        vertical = amplitude * engine.channels['vertical'].block(cycles, q, 2 * np.pi * difference)
+        xs, ys, reaches = engine.calculos.positions_from_voltages(horizontal, vertical, acceleration_voltage)
+        return LissajousFigure(xs, ys, reaches)
+
+    def positions(self, times):
+        """(xs, ys, reaches) leídos de la figura precalculada, o None si no es periódica"""
+        current = self.current()
+        if current is None:
+            return None
+        figure, base_frequency, cycle_offset = current
+        return figure.at(base_frequency * np.asarray(times) + cycle_offset)
@@ -0,0 +1,121 @@
+import os
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Sin ventana: usar el driver de video "dummy" de SDL
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from calculos import LISSAJOUS_RATIOS, lissajous_positions
+
+# Color del trazo en las figuras generadas
+TRACE_COLOR = (255, 235, 59)
+BACKGROUND_COLOR = (20, 20, 25)
+
+def compute_trace(ratio, phase_horizontal=0.0, phase_vertical=0.0, duration=1.0,
+                  sample_rate=10000.0, size=256):
+    """Calcula la traza completa de una figura de Lissajous.
+
+    Devuelve un arreglo (n, 2) con las coordenadas (x, y) en una pantalla
+    cuadrada de `size` píxeles.
+    """
+    sample_count = max(2, int(duration * sample_rate))
+    times = np.arange(sample_count) / sample_rate
+    xs, ys = lissajous_positions(times, ratio[0], ratio[1], phase_horizontal, phase_vertical,
+                                 0, 0, size)
+    return np.column_stack((xs, ys))
+
+def densify_trace(points):
+    """Interpola muestras intermedias para que no queden huecos entre puntos consecutivos"""
+    steps = np.abs(np.diff(points, axis=0)).max(initial=0)
+    if steps <= 1:
+        return points
+
+    subdivisions = int(math.ceil(steps))
+    positions = np.arange((len(points) - 1) * subdivisions + 1) / subdivisions
+    indices = np.arange(len(points))
+    xs = np.interp(positions, indices, points[:, 0])
+    ys = np.interp(positions, indices, points[:, 1])
+    return np.column_stack((xs, ys)).astype(np.int32)
+
+def rasterize_trace(points, size, color=TRACE_COLOR, background=BACKGROUND_COLOR, densify=True):
+    """Rasteriza la traza en un arreglo RGB (size, size, 3) en orden de surfarray (x, y).
+
+    Con densify=False no se unen los saltos (puntos ya suficientemente densos).
+    """
+    if densify:
+        points = densify_trace(points)
+    xs = np.clip(points[:, 0], 0, size - 1)
+    ys = np.clip(points[:, 1], 0, size - 1)
+
+    # Cantidad de muestras que cayeron en cada píxel
+    hits = np.bincount(xs * size + ys, minlength=size * size).reshape(size, size)
+
+    # Intensidad con saturación suave: más pasadas del haz, más brillo
+    intensity = 1.0 - np.exp(-hits.astype(np.float32) / 2.0)
+
+    pixels = np.empty((size, size, 3), dtype=np.uint8)
+    for channel in range(3):
+        pixels[:, :, channel] = (background[channel] * (1 - intensity)
+                                 + color[channel] * intensity).astype(np.uint8)
+    return pixels
+
+def save_image(pixels, path):
+    """Guarda un arreglo RGB como imagen sin necesidad de una ventana"""
+    surface = pygame.surfarray.make_surface(pixels)
+    pygame.image.save(surface, path)
+
+def render_figure(ratio, phase_difference, path, size=256, sample_rate=10000.0, duration=1.0):
+    """Calcula, rasteriza y guarda una figura; devuelve la ruta generada"""
+    points = compute_trace(ratio, 0.0, phase_difference, duration, sample_rate, size)
+    save_image(rasterize_trace(points, size), path)
+    return path
+
+def _render_job(job):
+    """Punto de entrada para los procesos del pool"""
+    return render_figure(*job)
+
+def figure_filename(ratio, step, phase_steps):
+    """Nombre de la figura: el índice de la fase lo hace único aunque dos fases redondeen igual"""
+    width = len(str(phase_steps - 1))
+    degrees = 360 * step / phase_steps
+    return f"lissajous_{ratio[0]}x{ratio[1]}_{step:0{width}d}_fase{degrees:06.2f}.png"
+
+def generate_reference_set(output_dir, ratios=LISSAJOUS_RATIOS, phase_steps=8, size=256,
+                           sample_rate=10000.0, workers=None):
+    """Genera las figuras de referencia para cada ratio y un barrido de fases.
+
+    El barrido recorre `phase_steps` fases equiespaciadas en [0, 2π).
+    Devuelve la lista de archivos escritos.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [
+        (ratio, 2 * math.pi * step / phase_steps,
+         os.path.join(output_dir, figure_filename(ratio, step, phase_steps)), size, sample_rate)
+        for ratio in ratios
+        for step in range(phase_steps)
+    ]
+
+    if workers == 1:
+        return [_render_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_job, jobs, chunksize=8))
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera figuras de Lissajous de referencia sin pantalla")
+    parser.add_argument("output_dir", help="Directorio donde se guardan las imágenes")
+    parser.add_argument("--phases", type=int, default=8, help="Cantidad de fases del barrido")
+    parser.add_argument("--size", type=int, default=256, help="Tamaño de la imagen en píxeles")
+    parser.add_argument("--sample-rate", type=float, default=10000.0, help="Muestras por segundo")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo")
+    args = parser.parse_args()
+
+    paths = generate_reference_set(args.output_dir, phase_steps=args.phases, size=args.size,
+                                   sample_rate=args.sample_rate, workers=args.workers)
+    print(f"{len(paths)} figuras generadas en {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import pygame
+
+class LayerCompositor:
+    """Compone las capas estáticas de la interfaz en superficies cacheadas"""
+    def __init__(self, crt_simulation):
+        self.crt = crt_simulation
+
+        # Capas estáticas en orden de dibujo (de atrás hacia adelante)
+        self.layer_order = ['background', 'panel_chrome', 'crt_bezel', 'view_frames']
+        self.layers = {}
+        self.background = None
+        self.size = None
+
+    def get_layer_renderers(self):
+        """Funciones que rasterizan cada capa sobre una superficie dada"""
+        visualization = self.crt.visualization
+        return {
+            'background': visualization.draw_background,
+            'panel_chrome': visualization.draw_panel_chrome,
+            'crt_bezel': visualization.draw_crt_bezel,
+            'view_frames': visualization.draw_view_frames
+        }
+
+    def invalidate(self, name=None):
+        """Marca una capa (o todas) para volver a generarse en el siguiente frame"""
+        if name is None:
+            self.layers.clear()
+        else:
+            self.layers.pop(name, None)
+        self.background = None
+
+    def build(self):
+        """Genera las capas que falten y las aplana en una sola superficie opaca"""
+        size = self.crt.screen.get_size()
+        if size != self.size:
+            self.layers.clear()
+            self.size = size
+
+        renderers = self.get_layer_renderers()
+        for name in self.layer_order:
+            if name not in self.layers:
+                layer = pygame.Surface(size, pygame.SRCALPHA)
+                renderers[name](layer)
+                self.layers[name] = layer
+
+        background = pygame.Surface(size).convert()
+        for name in self.layer_order:
+            background.blit(self.layers[name], (0, 0))
+        self.background = background
+
+    def draw(self, surface, force=False):
+        """Copia las capas estáticas en la pantalla si se regeneraron o si se fuerza.
+
+        Devuelve True si se copiaron (la ventana completa debe redibujarse).
+        """
+        if self.background is None or self.size != self.crt.screen.get_size():
+            self.build()
+            force = True
+
+        if force:
+            surface.blit(self.background, (0, 0))
+        return force
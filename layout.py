@@ -0,0 +1,72 @@
+import pygame
+
+# Tamaño de diseño: todas las coordenadas de la interfaz se escriben en este sistema
+DESIGN_SIZE = (1200, 720)
+
+# Anclaje horizontal de cada grupo (0 izquierda, 0.5 centro, 1 derecha) cuando el
+# destino es proporcionalmente más ancho que el diseño; en vertical todo se centra
+ANCHORS = {
+    'panel': 0.0,  # panel de control
+    'main': 0.5,   # vistas lateral y superior, pantalla del CRT
+    'grid': 1.0,   # grid de proporciones de Lissajous
+}
+
+# Zonas de diseño de los grupos que reciben clicks (el resto es 'main')
+GROUP_AREAS = {
+    'panel': pygame.Rect(0, 0, 380, 720),
+    'grid': pygame.Rect(945, 300, 255, 420),
+}
+
+class Layout:
+    """Convierte coordenadas de diseño a píxeles del destino de render.
+
+    La escala es uniforme (la del eje que más limita) y el espacio sobrante se
+    reparte según el anclaje de cada grupo. Se calcula una vez por cambio de
+    tamaño; los rectángulos ya convertidos se guardan.
+    """
+    def __init__(self, size):
+        self.size = tuple(size)
+        width, height = self.size
+        self.scale = min(width / DESIGN_SIZE[0], height / DESIGN_SIZE[1])
+
+        extra_x = width - DESIGN_SIZE[0] * self.scale
+        extra_y = height - DESIGN_SIZE[1] * self.scale
+        self.offsets = {group: (extra_x * anchor, extra_y / 2) for group, anchor in ANCHORS.items()}
+        self.rects = {}
+
+    def point(self, x, y, group='main'):
+        """Punto de diseño en píxeles del destino"""
+        offset_x, offset_y = self.offsets[group]
+        return round(x * self.scale + offset_x), round(y * self.scale + offset_y)
+
+    def rect(self, x, y, width, height, group='main'):
+        """Rectángulo de diseño en píxeles del destino (bordes redondeados, sin huecos entre vecinos)"""
+        key = (x, y, width, height, group)
+        rect = self.rects.get(key)
+        if rect is None:
+            left, top = self.point(x, y, group)
+            right, bottom = self.point(x + width, y + height, group)
+            rect = pygame.Rect(left, top, right - left, bottom - top)
+            self.rects[key] = rect
+        return rect.copy()
+
+    def length(self, value):
+        """Largo de diseño (radio, grosor, tamaño) en píxeles; nunca 0 si el original no lo es"""
+        if value == 0:
+            return 0
+        return max(1, round(value * self.scale))
+
+    def font_size(self, size):
+        return max(8, round(size * self.scale))
+
+    def group_at(self, pos):
+        """Grupo cuya zona contiene un punto del destino"""
+        for group, area in GROUP_AREAS.items():
+            if self.rect(*area, group).collidepoint(pos):
+                return group
+        return 'main'
+
+    def to_design(self, pos):
+        """Punto del destino en coordenadas de diseño (para el mouse)"""
+        offset_x, offset_y = self.offsets[self.group_at(pos)]
+        return (int((pos[0] - offset_x) / self.scale), int((pos[1] - offset_y) / self.scale))
@@ -1,25 +1,73 @@
 import pygame
 import math
 import sys
-from enum import Enum
+import argparse
 from visualization import Visualization
-from calculos import Calculos
+from calculos import LISSAJOUS_RATIOS
 from slider import SliderManager
+from engine import Mode, SimulationEngine
+from layers import LayerCompositor
+from damage import DamageTracker
+from cache import TextRenderCache
+from primitives import PrimitiveCache
+from profiler import FrameProfiler
+from recording import SessionRecorder, SessionPlayer
+from export import FrameExporter
+from thumbnails import ThumbnailRenderer
+from waveforms import load_wavetable
+from phosphor import PHOSPHOR_TYPES
+from pacing import FramePacer
+from layout import Layout
+from audio import WavXYSource
 
-class Mode(Enum):
-    MANUAL = "Manual"
-    LISSAJOUS = "Lissajous"
+def engine_attribute(name):
+    """Propiedad que lee y escribe el atributo homónimo del motor de simulación"""
+    return property(lambda self: getattr(self.engine, name),
+                    lambda self, value: setattr(self.engine, name, value))
 
 class CRTSimulation:
+    # El estado físico vive en el motor; la interfaz lo usa a través de estas propiedades
+    current_mode = engine_attribute('current_mode')
+    paused = engine_attribute('paused')
+    acceleration_voltage = engine_attribute('acceleration_voltage')
+    vertical_voltage = engine_attribute('vertical_voltage')
+    horizontal_voltage = engine_attribute('horizontal_voltage')
+    persistence_time = engine_attribute('persistence_time')
+    max_persistence_time = engine_attribute('max_persistence_time')
+    freq_vertical = engine_attribute('freq_vertical')
+    freq_horizontal = engine_attribute('freq_horizontal')
+    phase_vertical = engine_attribute('phase_vertical')
+    phase_horizontal = engine_attribute('phase_horizontal')
+    time = engine_attribute('time')
+    max_voltage = engine_attribute('max_voltage')
+    max_deflection_voltage = engine_attribute('max_deflection_voltage')
+    crt_screen_x = engine_attribute('crt_screen_x')
+    crt_screen_y = engine_attribute('crt_screen_y')
+    crt_screen_size = engine_attribute('crt_screen_size')
+    live_samples = engine_attribute('live_samples')
+    phosphor_screen = engine_attribute('phosphor_screen')
+    calculos = engine_attribute('calculos')
+    optics = engine_attribute('optics')
+    lissajous_voltage_amplitude = engine_attribute('lissajous_voltage_amplitude')
+    ensemble_enabled = engine_attribute('ensemble_enabled')
+    recorder = engine_attribute('recorder')
+    audio_source = engine_attribute('audio_source')
+    timebase = engine_attribute('timebase')
+    
     def __init__(self):
         pygame.init()
         
         self.WIDTH = 1200
         self.HEIGHT = 720
         
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT), pygame.RESIZABLE)
+        self.window = pygame.display.set_mode((self.WIDTH, self.HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("Simulación de un Tubo de Rayos Catódicos")
         
+        # Resolución interna de render: fracción de la ventana (render_scale), con un
+        # tamaño máximo opcional (render_size); se escala a la ventana al presentar
+        self.render_scale = 1.0
+        self.render_size = None
+        
         # Paleta de colores 
         self.WHITE = (255, 255, 255)
         self.BLACK = (20, 20, 25)
@@ -39,123 +87,166 @@ class CRTSimulation:
         self.GLASS_EFFECT = (255, 255, 255, 30)
         self.SHADOW_COLOR = (0, 0, 0, 50)
         
-        # Fuentes
-        try:
-            self.font_title = pygame.font.Font(None, 32)
-            self.font_large = pygame.font.Font(None, 28)
-            self.font_medium = pygame.font.Font(None, 24)
-            self.font_small = pygame.font.Font(None, 20)
-            self.font_tiny = pygame.font.Font(None, 16)
-        except:
-            # Fallback si las fuentes no están disponibles
-            self.font_title = pygame.font.Font(None, 32)
-            self.font_large = pygame.font.Font(None, 28)
-            self.font_medium = pygame.font.Font(None, 24)
-            self.font_small = pygame.font.Font(None, 20)
-            self.font_tiny = pygame.font.Font(None, 16)
-        
-        # Modo actual
-        self.current_mode = Mode.MANUAL
-        
-        # Variables físicas del CRT (valores predeterminados)
-        self.acceleration_voltage = 1000.0  # V
-        self.vertical_voltage = 0.0  # V
-        self.horizontal_voltage = 0.0  # V
-        self.persistence_time = 1.0  # segundos
-        
-        # Variables para modo Lissajous
-        self.freq_vertical = 1.0  # Hz
-        self.freq_horizontal = 1.0  # Hz
-        self.phase_vertical = 0.0  # radianes
-        self.phase_horizontal = 0.0  # radianes
-        self.time = 0.0
-        
-        self.paused = False  # Estado de pausa
-        
-        # Rangos para los controles
-        self.max_voltage = 1000.0
-        self.max_deflection_voltage = 500.0
+        # Destino de render, distribución de la interfaz y fuentes a su escala
+        self.update_render_target()
+        
+        # Caché de textos renderizados (etiquetas, botones, ratios y valores)
+        self.text_cache = TextRenderCache(256)
+        
+        # Caché de primitivas rasterizadas (rectángulos redondeados, sombras, vidrio, gradientes)
+        self.primitives = PrimitiveCache()
+        
+        # Motor de simulación (modo, voltajes, tiempo y fósforo) con paso fijo
+        self.engine = SimulationEngine(screen_x=580, screen_y=300, screen_size=350)
+        # Fracción del paso de simulación transcurrida, para interpolar al dibujar
+        self.render_alpha = 1.0
         
         # Posiciones y tamaños de los elementos de la interfaz
         self.control_panel_width = 350
         
-        # Pantalla del CRT y puntos
-        self.crt_screen_size = 350
-        self.crt_screen_x = 580
-        self.crt_screen_y = 300
-        self.electron_points = []
-        
         # Grid de proporciones de Lissajous
-        self.lissajous_ratios = [
-            (1, 1), (1, 2), (2, 1), (1, 3), 
-            (3, 1), (2, 3), (3, 2), (1, 4), 
-            (4, 1), (3, 4), (4, 3), (2, 5),
-            (5, 2), (3, 5), (5, 3), (4, 5), 
-            (5, 4), (1, 6), (6, 1), (5, 6)
-        ]
+        self.lissajous_ratios = list(LISSAJOUS_RATIOS)
         self.selected_ratio_index = 0
         
         # Inicializar componentes
         self.slider_manager = SliderManager(self)
         self.visualization = Visualization(self)
-        self.calculos = Calculos(self)
-        
-        # Clock para controlar FPS
-        self.clock = pygame.time.Clock()
-        
-        
+        self.compositor = LayerCompositor(self)
+        self.damage = DamageTracker(self)
+        
+        # Tiempos por etapa (F3 muestra el overlay)
+        self.profiler = FrameProfiler(self)
+        self.profile_output = None
+        
+        # Reproducción de una sesión grabada (recording.SessionPlayer) o None
+        self.player = None
+        # Exportación de video/GIF (export.FrameExporter) o None
+        self.exporter = None
+        
+        # Miniaturas del grid de proporciones, generadas en segundo plano
+        self.thumbnails = ThumbnailRenderer(size=self.layout.length(38))
+        
+        # Ritmo de frames adaptativo (60 FPS, frecuencia baja o reposo)
+        self.pacer = FramePacer(self)
+        
+        
+    def update_render_target(self):
+        """Crea el destino de render a la resolución interna y recalcula la distribución.
+        
+        Si coincide con el tamaño de la ventana se dibuja directamente en ella.
+        """
+        window_width, window_height = self.window.get_size()
+        factor = self.render_scale
+        if self.render_size is not None:
+            factor *= min(1.0, self.render_size[0] / window_width, self.render_size[1] / window_height)
+        size = (max(1, round(window_width * factor)), max(1, round(window_height * factor)))
+        
+        if size == (window_width, window_height):
+            self.screen = self.window
+        else:
+            self.screen = pygame.Surface(size).convert()
+        self.layout = Layout(size)
+        
+        # Fuentes al tamaño de la escala actual
+        self.font_title = pygame.font.Font(None, self.layout.font_size(32))
+        self.font_large = pygame.font.Font(None, self.layout.font_size(28))
+        self.font_medium = pygame.font.Font(None, self.layout.font_size(24))
+        self.font_small = pygame.font.Font(None, self.layout.font_size(20))
+        self.font_tiny = pygame.font.Font(None, self.layout.font_size(16))
+    
+    def set_render_resolution(self, scale=None, size=None):
+        """Cambia la escala o el tamaño máximo del render interno"""
+        if scale is not None:
+            self.render_scale = scale
+        if size is not None:
+            self.render_size = size
+        self.relayout()
+    
+    def relayout(self):
+        """Recalcula todo lo que depende del tamaño del destino de render"""
+        self.update_render_target()
+        self.thumbnails.size = self.layout.length(38)
+        # Las capas estáticas se regeneran con el nuevo tamaño
+        self.compositor.invalidate()
+        self.damage.invalidate_all()
+    
+    def window_to_design(self, pos):
+        """Posición en la ventana (mouse) en coordenadas de diseño de la interfaz"""
+        window_width, window_height = self.window.get_size()
+        render_width, render_height = self.screen.get_size()
+        return self.layout.to_design((pos[0] * render_width / window_width,
+                                      pos[1] * render_height / window_height))
+    
     def draw_rounded_rect(self, surface, color, rect, radius):
-        """Dibuja un rectángulo con esquinas redondeadas"""
+        """Dibuja un rectángulo con esquinas redondeadas (radio en unidades de diseño)"""
+        radius = self.layout.length(radius)
         if radius > min(rect.width, rect.height) // 2:
             radius = min(rect.width, rect.height) // 2
         
-        # Crear superficie temporal para el rectángulo redondeado
-        temp_surface = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(temp_surface, color, (0, 0, rect.width, rect.height), border_radius=radius)
-        surface.blit(temp_surface, rect.topleft)
+        # Superficie ya rasterizada para este tamaño, color y radio
+        surface.blit(self.primitives.rounded_rect(rect.size, color, radius), rect.topleft)
     
-    def draw_shadow(self, surface, rect, offset=(3, 3), radius=15):
-        """Dibuja"""
-        shadow_rect = rect.copy()
-        shadow_rect.x += offset[0]
-        shadow_rect.y += offset[1]
-        
-        # Crear superficie para la sombra
-        shadow_surface = pygame.Surface((rect.width + radius * 2, rect.height + radius * 2), pygame.SRCALPHA)
-        
-        # Dibujar múltiples rectángulos con alpha decreciente para simular desenfoque
-        for i in range(radius):
-            alpha = max(0, 20 - i)
-            color = (*self.BLACK[:3], alpha)
-            shadow_rect_blur = pygame.Rect(radius - i, radius - i, rect.width + i * 2, rect.height + i * 2)
-            pygame.draw.rect(shadow_surface, color, shadow_rect_blur, border_radius=8)
-        
-        surface.blit(shadow_surface, (shadow_rect.x - radius, shadow_rect.y - radius))
-        
     def handle_events(self):
         """Maneja todos los eventos de pygame"""
         for event in pygame.event.get():
+            # Cualquier entrada (salvo mover el mouse sin arrastrar) vuelve a 60 FPS
+            if event.type != pygame.MOUSEMOTION or any(event.buttons):
+                self.pacer.notify_input()
+            
             if event.type == pygame.QUIT:
                 return False
             
             # Manejar redimensionamiento de ventana
             elif event.type == pygame.VIDEORESIZE:
-                self.WIDTH, self.HEIGHT = event.size
-                self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT), pygame.RESIZABLE)
-                # Aquí podrías ajustar las posiciones de los elementos si quieres
-                # que se adapten al nuevo tamaño de ventana
+                self.resize_window(event.size)
             
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Click izquierdo
-                    self.handle_click(event.pos)
+                    self.handle_click(self.window_to_design(event.pos))
+            
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:
+                    self.slider_manager.release()
             
             elif event.type == pygame.MOUSEMOTION:
+                pos = self.window_to_design(event.pos)
+                self.slider_manager.update_hover(pos)
                 if pygame.mouse.get_pressed()[0]:  # Arrastrando
-                    self.handle_drag(event.pos)
+                    self.handle_drag(pos)
                     
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     self.paused = not self.paused
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
+                elif event.key == pygame.K_F9 and self.exporter is not None:
+                    # Pausar o reanudar la exportación
+                    self.exporter.toggle()
+                elif event.key == pygame.K_e:
+                    # Alternar entre haz puntual y conjunto de electrones
+                    self.ensemble_enabled = not self.ensemble_enabled
+                    self.clear_screen()
+                elif event.key == pygame.K_p:
+                    # Tipo de fósforo: curva de decaimiento y color
+                    self.phosphor_screen.next_type()
+                elif self.player is not None:
+                    self.handle_replay_key(event.key)
+                # Forma de onda de cada canal (solo en modo Lissajous)
+                elif self.current_mode == Mode.LISSAJOUS and event.key in (pygame.K_h, pygame.K_v):
+                    channel = 'horizontal' if event.key == pygame.K_h else 'vertical'
+                    self.engine.channels[channel].next_shape()
+                    self.record_controls()
+                    self.clear_screen()
+                # Modo Y-T: V cambia la señal de entrada, T la pendiente y A el modo del disparo
+                elif self.current_mode == Mode.TIME_BASE and event.key in (pygame.K_v, pygame.K_t, pygame.K_a):
+                    if event.key == pygame.K_v:
+                        self.engine.channels['vertical'].next_shape()
+                    elif event.key == pygame.K_t:
+                        self.timebase.toggle_slope()
+                    else:
+                        self.timebase.toggle_mode()
+                    self.record_controls()
+                    self.clear_screen()
                 # Controles de voltaje con flechas (solo en modo Manual y sin pausa)
                 elif self.current_mode == Mode.MANUAL and not self.paused:
                     step = 51  # Paso de ajuste
@@ -180,9 +271,30 @@ class CRTSimulation:
                         self.slider_manager.update_sliders_from_values()
         
         return True
+    def resize_window(self, size):
+        """Cambia el tamaño de la ventana y regenera las capas estáticas"""
+        self.WIDTH, self.HEIGHT = size
+        self.window = pygame.display.set_mode((self.WIDTH, self.HEIGHT), pygame.RESIZABLE)
+        # La interfaz se escala desde las coordenadas de diseño (layout.py)
+        self.relayout()
+    
+    def handle_replay_key(self, key):
+        """Controles de la reproducción: velocidad con [ y ], saltos de 10 s con RePág/AvPág"""
+        if key == pygame.K_RIGHTBRACKET:
+            self.player.set_speed(self.player.speed * 2)
+        elif key == pygame.K_LEFTBRACKET:
+            self.player.set_speed(self.player.speed / 2)
+        elif key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN, pygame.K_HOME):
+            if key == pygame.K_HOME:
+                target = self.player.start_time
+            else:
+                target = self.player.playback_time + (10 if key == pygame.K_PAGEDOWN else -10)
+            self.player.seek(self.engine, target)
+            self.slider_manager.update_sliders_from_values()
+    
     def handle_continuous_keys(self):
         """Maneja teclas mantenidas presionadas"""
-        if self.current_mode != Mode.MANUAL or self.paused:
+        if self.current_mode != Mode.MANUAL or self.paused or self.player is not None:
             return
         
         keys = pygame.key.get_pressed()
@@ -205,44 +317,35 @@ class CRTSimulation:
     
     def handle_click(self, pos):
         """Maneja los clicks del mouse"""
-        if self.paused:
+        # Durante una reproducción los controles los maneja la grabación
+        if self.paused or self.player is not None:
             return
-        # Botones de modo
-        if self.slider_manager.manual_button.collidepoint(pos):
-            self.current_mode = Mode.MANUAL
-            self.electron_points = []  # Limpiar pantalla
-        elif self.slider_manager.lissajous_button.collidepoint(pos):
-            self.current_mode = Mode.LISSAJOUS
-            self.electron_points = []
-        elif self.slider_manager.reset_button.collidepoint(pos):
-            self.reset_simulation()
-        
-        # Grid de proporciones (solo en modo Lissajous)
-        elif self.current_mode == Mode.LISSAJOUS:
-            self.handle_grid_click(pos)
-        
-        # Sliders
-        self.slider_manager.handle_slider_click(pos)
+        # Botones, sliders y celdas del grid (cada widget sabe si está habilitado)
+        self.slider_manager.handle_press(pos)
     
     def handle_drag(self, pos):
         """Maneja el arrastre de sliders"""
+        if self.player is not None:
+            return
         self.slider_manager.handle_slider_click(pos)
     
-    def handle_grid_click(self, pos):
-        """Maneja clicks en el grid de proporciones"""
-        if pos[0] >= 950 and pos[1] >= 320:
-            col = (pos[0] - 950) // 60
-            row = (pos[1] - 320) // 60
-            
-            if 0 <= col < 4 and 0 <= row < 5:
-                index = row * 4 + col
-                if index < len(self.lissajous_ratios):
-                    self.selected_ratio_index = index
-                    ratio = self.lissajous_ratios[index]
-                    self.freq_horizontal = ratio[0]
-                    self.freq_vertical = ratio[1]
-                    self.slider_manager.update_sliders_from_values()
-                    self.electron_points = []  # Limpiar pantalla
+    def set_mode(self, mode):
+        """Cambia de modo y limpia la pantalla"""
+        self.current_mode = mode
+        self.engine.clear_screen()
+        if self.recorder is not None:
+            self.recorder.record_mode(mode)
+    
+    def handle_grid_click(self, index):
+        """Selecciona una proporción del grid"""
+        self.selected_ratio_index = index
+        ratio = self.lissajous_ratios[index]
+        self.freq_horizontal = ratio[0]
+        self.freq_vertical = ratio[1]
+        self.slider_manager.update_sliders_from_values()
+        self.clear_screen()  # Limpiar pantalla
+        # La figura aparece completa de inmediato (precalculada), sin esperar a que se dibuje
+        self.engine.show_figure()
     
     def reset_simulation(self):
         """Reinicia la simulación con valores predeterminados"""
@@ -250,19 +353,8 @@ class CRTSimulation:
         if self.paused:
             return
         
-        # Limpiar pantalla
-        self.electron_points = []
-        self.time = 0.0
-        
-        # Restaurar valores predeterminados
-        self.acceleration_voltage = 1000.0
-        self.vertical_voltage = 0.0
-        self.horizontal_voltage = 0.0
-        self.persistence_time = 1.0
-        self.freq_vertical = 1.0
-        self.freq_horizontal = 1.0
-        self.phase_vertical = 0.0
-        self.phase_horizontal = 0.0
+        # Limpiar pantalla y restaurar valores predeterminados
+        self.engine.reset()
         
         # Restaurar ratio seleccionado
         self.selected_ratio_index = 0
@@ -270,63 +362,138 @@ class CRTSimulation:
         # Actualizar sliders para reflejar los valores restaurados
         self.slider_manager.update_sliders_from_values()
     
+    def record_controls(self):
+        """Graba los controles que cambiaron fuera de los sliders (teclas)"""
+        if self.recorder is not None:
+            self.recorder.record_controls()
+    
+    def clear_screen(self):
+        """Borra los puntos guardados y la imagen del fósforo"""
+        self.engine.clear_screen()
+        if self.recorder is not None:
+            self.recorder.record_clear()
+    
     def update_simulation(self, dt):
-        """Actualiza la simulación"""
-        current_time = pygame.time.get_ticks() / 1000.0
-        
-        if self.paused:
-            # Durante pausa: NO eliminar puntos basados en persistencia
-            # Solo mantener todos los puntos existentes
+        """Avanza el motor con paso fijo según el tiempo real transcurrido"""
+        if self.player is not None:
+            # Reproducción: el estado lo dan los registros grabados
+            if self.player.drive(self.engine, dt):
+                self.slider_manager.update_sliders_from_values()
+            self.render_alpha = 1.0
             return
+        self.render_alpha = self.engine.advance(dt)
+    
+    def run_frame(self, dt):
+        """Procesa eventos, avanza la simulación y dibuja un frame; devuelve False al salir"""
+        profiler = self.profiler
+        profiler.begin_frame()
         
-        # Solo ejecutar si NO está pausado
-        if self.current_mode == Mode.LISSAJOUS:
-            self.time += dt
+        with profiler.stage('handle_events'):
+            running = self.handle_events()
+            self.handle_continuous_keys()
         
-        # Calcular nueva posición del electrón
-        electron_pos = self.calculos.calculate_electron_position()
+        with profiler.stage('update_simulation'):
+            self.update_simulation(dt)
         
-        # Agregar punto con timestamp
-        self.electron_points.append((electron_pos, current_time))
+        # Capas estáticas cacheadas (fondo, marcos, bisel y retícula);
+        # si se regeneraron se redibuja y presenta la ventana completa
+        with profiler.stage('draw_static_layers'):
+            if self.compositor.draw(self.screen, force=self.damage.full_redraw):
+                self.damage.invalidate_all()
         
-        # Remover puntos antiguos basado en persistencia (solo si no está pausado)
-        self.electron_points = [
-            (pos, timestamp) for pos, timestamp in self.electron_points
-            if current_time - timestamp <= self.persistence_time
-        ]
+        with profiler.stage('draw_control_panel'):
+            self.visualization.draw_control_panel()
+        with profiler.stage('draw_crt_views'):
+            self.visualization.draw_crt_views()
+        with profiler.stage('draw_crt_screen'):
+            self.visualization.draw_crt_screen()
+        with profiler.stage('draw_grid'):
+            self.visualization.draw_grid()
+        
+        profiler.draw_overlay()
+        
+        # Solo se envían a la pantalla las regiones que cambiaron
+        with profiler.stage('flip'):
+            self.damage.present()
+        
+        # La ventana completa ya está dibujada: capturar para exportar
+        with profiler.stage('export'):
+            if self.exporter is not None:
+                self.exporter.capture()
+        
+        profiler.end_frame()
+        return running
     
     def run(self):
         """Ejecuta la simulación principal"""
         running = True
         
         while running:
-            dt = self.clock.tick(60) / 1000.0  # 60 FPS
-            
-            running = self.handle_events()
-            self.handle_continuous_keys()
-            self.update_simulation(dt)
-            
-            # Fondo con gradiente sutil
-            self.screen.fill(self.LIGHT_GRAY)
-            
-            # Dibujar gradiente de fondo sutil
-            for y in range(0, self.HEIGHT, 4):
-                alpha = int(10 * (1 - y / self.HEIGHT))
-                color = (self.WHITE[0], self.WHITE[1], self.WHITE[2], alpha)
-                temp_surf = pygame.Surface((self.WIDTH, 4), pygame.SRCALPHA)
-                temp_surf.fill(color)
-                self.screen.blit(temp_surf, (0, y))
-            
-            self.visualization.draw_control_panel()
-            self.visualization.draw_crt_views()
-            self.visualization.draw_crt_screen()
-            self.visualization.draw_grid()
-            
-            pygame.display.flip()
+            dt = self.pacer.tick()
+            running = self.run_frame(dt)
+        
+        # Estadísticas de tiempos por etapa al salir (si se pidieron)
+        if self.profile_output:
+            self.profiler.dump(self.profile_output)
+        self.profiler.disable()
+        
+        # Escribir lo que quede pendiente de la grabación y la exportación
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.exporter is not None:
+            self.exporter.close()
+        self.thumbnails.close()
         
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulación de un Tubo de Rayos Catódicos")
+    parser.add_argument("--profile-out", help="Guardar estadísticas de tiempos por frame (.json o .csv) al salir")
+    parser.add_argument("--ensemble-size", type=int, default=4096,
+                        help="Electrones por paso de simulación en el modo de conjunto (tecla E)")
+    parser.add_argument("--waveform-file", metavar="ARCHIVO", action="append", default=[],
+                        help="Agregar una forma de onda muestreada (.wav, .npy o texto con un periodo)")
+    parser.add_argument("--phosphor", choices=list(PHOSPHOR_TYPES), default="amarillo",
+                        help="Tipo de fósforo inicial (la tecla P lo cambia)")
+    parser.add_argument("--render-scale", type=float, default=1.0,
+                        help="Resolución interna como fracción de la ventana (p. ej. 0.5 en equipos lentos)")
+    parser.add_argument("--render-size", metavar="ANCHOxALTO",
+                        help="Resolución interna máxima; la imagen se escala a la ventana (pantallas HiDPI)")
+    parser.add_argument("--wav", metavar="ARCHIVO",
+                        help="WAV estéreo para el modo Audio XY (izquierda: horizontal, derecha: vertical)")
+    parser.add_argument("--record", metavar="ARCHIVO", help="Grabar la sesión (haz, controles y modos)")
+    parser.add_argument("--replay", metavar="ARCHIVO", help="Reproducir una sesión grabada")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Velocidad de reproducción (1-100)")
+    parser.add_argument("--export", metavar="SALIDA", help="Exportar a un .gif o a un directorio de PNG (F9 pausa)")
+    parser.add_argument("--export-region", choices=["screen", "window"], default="screen",
+                        help="Exportar solo la pantalla del CRT o la ventana completa")
+    parser.add_argument("--export-policy", choices=FrameExporter.POLICIES, default="drop",
+                        help="Si el codificador se atrasa: descartar frames o esperar")
+    args = parser.parse_args()
+    
+    for path in args.waveform_file:
+        load_wavetable(path)
+    
     simulation = CRTSimulation()
-    simulation.run()
\ No newline at end of file
+    simulation.profile_output = args.profile_out
+    if args.profile_out:
+        simulation.profiler.enable()
+    simulation.engine.ensemble.set_size(args.ensemble_size)
+    simulation.phosphor_screen.phosphor_type = args.phosphor
+    if args.render_scale != 1.0 or args.render_size:
+        render_size = tuple(int(v) for v in args.render_size.split("x")) if args.render_size else None
+        simulation.set_render_resolution(args.render_scale, render_size)
+    if args.wav:
+        simulation.audio_source = WavXYSource(args.wav, simulation.engine.beam_sample_rate)
+        simulation.current_mode = Mode.AUDIO_XY
+    if args.replay:
+        simulation.player = SessionPlayer(args.replay, speed=args.replay_speed)
+        simulation.player.seek(simulation.engine, simulation.player.start_time)
+        simulation.slider_manager.update_sliders_from_values()
+    elif args.record:
+        simulation.recorder = SessionRecorder(args.record, simulation.engine)
+    if args.export:
+        simulation.exporter = FrameExporter(simulation, args.export, region=args.export_region,
+                                            policy=args.export_policy)
+    simulation.run()
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class Mode(Enum):
+    MANUAL = "Manual"
+    LISSAJOUS = "Lissajous"
+    AUDIO_XY = "Audio XY"
+    TIME_BASE = "Y-T"
@@ -0,0 +1,70 @@
+from functools import lru_cache
+import numpy as np
+
+# Voltaje de aceleración mínimo considerado (evita dividir por cero con el slider en 0 V)
+MIN_ACCELERATION_VOLTAGE = 1.0
+
+@lru_cache(maxsize=512)
+def deflection_sensitivity(acceleration_voltage, plate_length, plate_gap, drift_length):
+    """Sensibilidad de deflexión en metros por voltio: L (L/2 + D) / (2 d Va)"""
+    return plate_length * (plate_length / 2 + drift_length) / (2 * plate_gap * acceleration_voltage)
+
+class DeflectionPlates:
+    """Par de placas deflectoras paralelas"""
+    def __init__(self, plate_length, plate_gap, drift_length):
+        self.plate_length = plate_length  # m, a lo largo del tubo
+        self.plate_gap = plate_gap  # m, separación entre placas
+        self.drift_length = drift_length  # m, desde el final de las placas hasta la pantalla
+
+    def sensitivity(self, acceleration_voltage):
+        """Sensibilidad (m/V) cacheada por voltaje de aceleración y geometría"""
+        acceleration_voltage = round(max(acceleration_voltage, MIN_ACCELERATION_VOLTAGE), 2)
+        return deflection_sensitivity(acceleration_voltage, self.plate_length,
+                                      self.plate_gap, self.drift_length)
+
+    def exit_offset(self, voltage, acceleration_voltage):
+        """Desplazamiento transversal al salir de las placas: V L² / (4 d Va)"""
+        acceleration_voltage = max(acceleration_voltage, MIN_ACCELERATION_VOLTAGE)
+        return voltage * self.plate_length ** 2 / (4 * self.plate_gap * acceleration_voltage)
+
+    def passes(self, voltage, acceleration_voltage):
+        """True si el haz sale de las placas sin chocar con ellas (acepta arreglos)"""
+        return np.abs(self.exit_offset(voltage, acceleration_voltage)) < self.plate_gap / 2
+
+    def path(self, voltage, acceleration_voltage, samples=16):
+        """Trayectoria (z, desplazamiento) dentro de las placas: parábola y = V z² / (4 d Va).
+
+        Si el haz choca con una placa la trayectoria termina en el punto de impacto.
+        Devuelve (z, y, pasa).
+        """
+        acceleration_voltage = max(acceleration_voltage, MIN_ACCELERATION_VOLTAGE)
+        curvature = voltage / (4 * self.plate_gap * acceleration_voltage)
+        z_end = self.plate_length
+        reaches_exit = abs(curvature) * self.plate_length ** 2 < self.plate_gap / 2
+        if not reaches_exit:
+            # Punto donde el haz toca la placa
+            z_end = np.sqrt(self.plate_gap / 2 / abs(curvature))
+
+        z = np.linspace(0, z_end, samples)
+        return z, curvature * z ** 2, reaches_exit
+
+class ElectronOptics:
+    """Geometría del tubo: placas verticales, placas horizontales y pantalla"""
+    def __init__(self):
+        # Placas verticales (más cerca del cañón) y horizontales (más cerca de la pantalla).
+        # Con 1000 V de aceleración y 500 V de deflexión el haz llega al borde de la pantalla.
+        self.vertical_plates = DeflectionPlates(plate_length=0.02, plate_gap=0.0125, drift_length=0.24)
+        self.horizontal_plates = DeflectionPlates(plate_length=0.02, plate_gap=0.0105, drift_length=0.20)
+        self.screen_half_width = 0.1  # m
+        self.crossover_distance = 0.28  # m, desde el crossover del cañón hasta la pantalla
+
+    def screen_deflection(self, horizontal_voltage, vertical_voltage, acceleration_voltage):
+        """Desplazamiento (x, y) en metros sobre la pantalla y si el haz llega a ella.
+
+        Acepta escalares o arreglos de voltajes: por muestra es solo una multiplicación.
+        """
+        x = self.horizontal_plates.sensitivity(acceleration_voltage) * horizontal_voltage
+        y = self.vertical_plates.sensitivity(acceleration_voltage) * vertical_voltage
+        reaches = (self.horizontal_plates.passes(horizontal_voltage, acceleration_voltage)
+                   & self.vertical_plates.passes(vertical_voltage, acceleration_voltage))
+        return x, y, reaches
@@ -0,0 +1,75 @@
+import pygame
+from engine import Mode
+
+class FramePacer:
+    """Ritmo de frames adaptativo.
+
+    - 'activo': frecuencia completa (entrada reciente, Lissajous/Audio XY, reproducción o exportación)
+    - 'decaimiento': frecuencia baja mientras el fósforo del modo Manual se asienta
+    - 'reposo': sin nada que pueda cambiar, espera eventos con pygame.event.wait
+    """
+    ACTIVE = 'activo'
+    DECAY = 'decaimiento'
+    IDLE = 'reposo'
+
+    def __init__(self, crt_simulation, active_fps=60, decay_fps=15, idle_timeout=None, input_hold=1.0):
+        self.crt = crt_simulation
+        self.clock = pygame.time.Clock()
+        self.rates = {self.ACTIVE: active_fps, self.DECAY: decay_fps}
+        # En reposo se despierta antes del tiempo máximo por frame del motor, para no perder tiempo simulado
+        if idle_timeout is None:
+            idle_timeout = self.crt.engine.max_frame_time * 0.8
+        self.idle_timeout = idle_timeout
+        self.input_hold = input_hold  # segundos a frecuencia completa después de una entrada
+        self.state = self.ACTIVE
+        self.last_input = self.now()
+
+    @staticmethod
+    def now():
+        return pygame.time.get_ticks() / 1000.0
+
+    def notify_input(self):
+        """Un evento de entrada vuelve a la frecuencia completa"""
+        self.last_input = self.now()
+        self.state = self.ACTIVE
+
+    def choose_state(self):
+        """Estado según lo que todavía puede cambiar en pantalla"""
+        crt = self.crt
+        since_input = self.now() - self.last_input
+
+        # Entrada reciente o teclas/botones mantenidos (sin eventos mientras se mantienen)
+        if since_input < self.input_hold or any(pygame.mouse.get_pressed()) or any(pygame.key.get_pressed()):
+            return self.ACTIVE
+        if crt.exporter is not None and crt.exporter.enabled:
+            return self.ACTIVE
+        if crt.player is not None and not crt.paused:
+            return self.ACTIVE
+        if not crt.paused and crt.current_mode != Mode.MANUAL:
+            return self.ACTIVE
+
+        # Miniaturas pendientes: hay que seguir revisando el pool
+        if crt.thumbnails.pending:
+            return self.DECAY
+        # En modo Manual el fósforo llega a su estado final una persistencia después del último cambio
+        if not crt.paused and since_input < self.input_hold + crt.persistence_time:
+            return self.DECAY
+        return self.IDLE
+
+    def tick(self):
+        """Espera hasta el siguiente frame según el estado; devuelve el tiempo real transcurrido (s)"""
+        self.state = self.choose_state()
+        if self.state == self.IDLE:
+            if not pygame.event.peek():
+                # Bloquea el proceso hasta un evento o el tiempo máximo (sin consumir CPU)
+                event = pygame.event.wait(int(self.idle_timeout * 1000))
+                if event.type != pygame.NOEVENT:
+                    pygame.event.post(event)  # lo procesa handle_events
+            return self.clock.tick() / 1000.0
+        return self.clock.tick(self.rates[self.state]) / 1000.0
+
+    def describe(self):
+        """Texto para el panel de estado"""
+        if self.state == self.IDLE:
+            return "Reposo"
+        return f"{self.rates[self.state]} FPS ({self.state})"
@@ -0,0 +1,234 @@
+from collections import deque
+
+import numpy as np
+
+class LiveSampleCounter:
+    """Cantidad de muestras del haz que siguen dentro de la persistencia.
+
+    La imagen sale de PhosphorScreen; aquí solo se guarda un bloque (primera y
+    última marca de tiempo, cantidad) por cada lote agregado, no las muestras.
+    El bloque más viejo se cuenta en proporción a la parte de su intervalo que
+    sigue viva; un bloque vence entero cuando vence su muestra más nueva.
+    """
+    def __init__(self):
+        self.blocks = deque()
+        self.count = 0  # muestras en los bloques guardados
+        self.expired = 0  # muestras ya vencidas del bloque más viejo
+        self.appended = 0  # total agregado desde el inicio (cambia con cada lote)
+
+    def __len__(self):
+        return self.count - self.expired
+
+    def clear(self):
+        """Olvida todas las muestras"""
+        self.blocks.clear()
+        self.count = 0
+        self.expired = 0
+
+    def add(self, timestamps):
+        """Agrega un lote de muestras (marcas de tiempo ordenadas, o una sola)"""
+        timestamps = np.atleast_1d(timestamps)
+        if timestamps.size == 0:
+            return
+        self.blocks.append((float(timestamps[0]), float(timestamps[-1]), timestamps.size))
+        self.count += timestamps.size
+        self.appended += timestamps.size
+
+    def expire(self, current_time, persistence_time):
+        """Descarta los bloques más viejos que la persistencia"""
+        cutoff = current_time - persistence_time
+        while self.blocks and self.blocks[0][1] < cutoff:
+            self.count -= self.blocks.popleft()[2]
+        self.expired = 0
+        if self.blocks and self.blocks[0][0] < cutoff:
+            first, last, count = self.blocks[0]
+            self.expired = min(count - 1, int(count * (cutoff - first) / (last - first)))
+
+
+class PhosphorType:
+    """Un tipo de fósforo: suma de componentes exponenciales, cada una con su color.
+
+    Cada componente es (peso, constante de tiempo, color); las constantes son
+    fracciones del tiempo de persistencia. El decaimiento y el color según la
+    antigüedad se precalculan en tablas sobre una persistencia (TABLE_SIZE
+    entradas); la entrada extra del final vale 0 (ya pasó la persistencia).
+    Si todas las componentes tienen el mismo color no hay tabla de color.
+    """
+    TABLE_SIZE = 1024
+
+    def __init__(self, label, components):
+        self.label = label
+        weights, time_constants, colors = (np.array(values, dtype=np.float64) for values in zip(*components))
+        ages = np.arange(self.TABLE_SIZE) / self.TABLE_SIZE
+        terms = weights * np.exp(-ages[:, None] / time_constants)  # (antigüedad, componente)
+        total = terms.sum(axis=1)
+        self.decay_table = np.append(total / weights.sum(), 0.0).astype(np.float32)
+        # Color de la mezcla: cada componente pesa según lo que le queda de brillo
+        ramp = terms @ colors / total[:, None]
+        self.color_table = None
+        if (colors != colors[0]).any():
+            # Una tabla contigua por canal (búsquedas con np.take)
+            self.color_table = np.ascontiguousarray(np.vstack([ramp, ramp[-1]]).T, dtype=np.float32)
+        # Color del fósforo recién excitado (haz, miniaturas)
+        self.color = tuple(int(round(channel)) for channel in ramp[0])
+
+# Tipos de fósforo disponibles (tecla P). Las colas lentas quedan en ~1/255 al cumplirse la persistencia
+PHOSPHOR_TYPES = {
+    'amarillo': PhosphorType("amarillo", [(1.0, 1 / np.log(255), (255, 255, 0))]),
+    'P1': PhosphorType("P1 verde", [(0.8, 0.12, (70, 255, 70)), (0.2, 1 / np.log(51), (70, 255, 70))]),
+    'P7': PhosphorType("P7 azul + amarillo", [(0.75, 0.02, (150, 175, 255)),
+                                               (0.25, 1 / np.log(63.75), (255, 215, 60))]),
+    'P31': PhosphorType("P31 verde", [(0.7, 0.03, (120, 255, 110)), (0.25, 0.1, (120, 255, 110)),
+                                      (0.05, 1 / np.log(12.75), (120, 255, 110))]),
+}
+
+class PhosphorScreen:
+    """Imagen del fósforo: energía y último instante de excitación de cada píxel.
+
+    El brillo es la energía por la tabla de decaimiento del tipo de fósforo en
+    la antigüedad del píxel, y el color sale de la tabla de color: una sola
+    búsqueda vectorizada por frame, sin atenuar la imagen en cada paso. Al
+    volver a excitar un píxel su brillo actual se suma a la energía nueva y la
+    antigüedad vuelve a 0 (aproximación de un solo instante por píxel).
+
+    Los arreglos están indexados como [x, y] para copiarse directo con surfarray.
+    """
+    def __init__(self, size, spot_sigma=1.0, spot_radius=3, phosphor_type='amarillo'):
+        self.size = size
+        self.phosphor_type = phosphor_type
+        self.energy = np.zeros((size, size), dtype=np.float32)
+        self.last_hit = np.zeros((size, size), dtype=np.float64)
+        # Reloj propio y persistencia actual (avanzan con advance)
+        self.now = 0.0
+        self.persistence_time = 1.0
+
+        # Núcleo gaussiano del punto del haz (normalizado a suma 1)
+        offsets = np.arange(-spot_radius, spot_radius + 1)
+        kernel_x, kernel_y = np.meshgrid(offsets, offsets, indexing='ij')
+        distance_sq = kernel_x ** 2 + kernel_y ** 2
+        inside_spot = distance_sq <= spot_radius ** 2  # Núcleo circular, no cuadrado
+        weights = np.exp(-distance_sq[inside_spot] / (2 * spot_sigma ** 2))
+        self.kernel_x = kernel_x[inside_spot]
+        self.kernel_y = kernel_y[inside_spot]
+        self.kernel_weights = (weights / weights.sum()).astype(np.float32)
+
+        # Buffers reutilizados al convertir a color
+        self.age_index = np.zeros((size, size), dtype=np.float32)
+        self.table_index = np.zeros((size, size), dtype=np.intp)
+        self.tone = np.zeros((size, size), dtype=np.float32)
+        self.channel = np.zeros((size, size), dtype=np.float32)
+        self.rgb = np.zeros((size, size, 3), dtype=np.uint8)
+        self.clear()
+
+    @property
+    def phosphor(self):
+        return PHOSPHOR_TYPES[self.phosphor_type]
+
+    def next_type(self):
+        """Pasa al siguiente tipo de fósforo registrado"""
+        names = list(PHOSPHOR_TYPES)
+        self.phosphor_type = names[(names.index(self.phosphor_type) + 1) % len(names)]
+
+    def clear(self):
+        self.energy.fill(0)
+        self.last_hit.fill(-np.inf)
+
+    def advance(self, dt, persistence_time):
+        """Avanza el reloj del fósforo; la atenuación se aplica al leer las tablas"""
+        self.now += dt
+        self.persistence_time = persistence_time
+
+    def decay_factor(self, ages):
+        """Brillo remanente (1 recién excitado, 0 pasada la persistencia) para un arreglo de antigüedades.
+
+        Interpola entre entradas de la tabla: con persistencias largas un paso
+        del motor es menos que una entrada y sin interpolar no decaería.
+        """
+        table_size = PhosphorType.TABLE_SIZE
+        table = self.phosphor.decay_table
+        position = np.minimum(np.asarray(ages, dtype=np.float64) * (table_size / self.persistence_time), table_size)
+        index = position.astype(np.intp)
+        fraction = position - index
+        return table[index] * (1 - fraction) + table[np.minimum(index + 1, table_size)] * fraction
+
+    def deposit(self, xs, ys, energy, ages=None):
+        """Suma un punto gaussiano por cada muestra del haz (coordenadas locales).
+
+        `energy` puede ser un escalar o un arreglo con la energía de cada muestra;
+        `ages` (opcional) es la antigüedad de cada muestra en segundos.
+        """
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        if xs.size == 0:
+            return
+
+        spot_xs = (xs[:, None] + self.kernel_x[None, :]).ravel()
+        spot_ys = (ys[:, None] + self.kernel_y[None, :]).ravel()
+        energy = np.broadcast_to(np.asarray(energy, dtype=np.float32), (xs.size,))
+        weights = (energy[:, None] * self.kernel_weights[None, :]).ravel()
+
+        inside = (spot_xs >= 0) & (spot_xs < self.size) & (spot_ys >= 0) & (spot_ys < self.size)
+        if ages is not None:
+            ages = np.repeat(np.broadcast_to(np.asarray(ages, dtype=np.float64), (xs.size,)),
+                             len(self.kernel_weights))[inside]
+        self.accumulate(spot_xs[inside] * self.size + spot_ys[inside], weights[inside], ages)
+
+    def deposit_points(self, xs, ys, energy):
+        """Suma cada muestra en un solo píxel (el tamaño del punto ya viene del conjunto de electrones)"""
+        xs = np.floor(xs).astype(np.int64)
+        ys = np.floor(ys).astype(np.int64)
+        inside = (xs >= 0) & (xs < self.size) & (ys >= 0) & (ys < self.size)
+        if not inside.any():
+            return
+        flat_index = xs[inside] * self.size + ys[inside]
+        self.accumulate(flat_index, np.full(flat_index.size, energy, dtype=np.float64))
+
+    def accumulate(self, flat_index, energy, ages=None):
+        """Suma energía en los píxeles indicados; solo se tocan los píxeles excitados.
+
+        Sin `ages` todo es de este instante. Con `ages` el píxel queda con la
+        antigüedad de su muestra más nueva y una energía que da el brillo actual.
+        """
+        if flat_index.size == 0:
+            return
+        pixels, inverse = np.unique(flat_index, return_inverse=True)
+        stored = self.energy.reshape(-1)
+        last_hit = self.last_hit.reshape(-1)
+
+        age = self.now - last_hit[pixels]
+        if ages is None:
+            brightness = stored[pixels] * self.decay_factor(age) + np.bincount(inverse, weights=energy)
+            last_hit[pixels] = self.now
+        else:
+            brightness = stored[pixels] * self.decay_factor(age) \
+                + np.bincount(inverse, weights=energy * self.decay_factor(ages))
+            np.minimum.at(age, inverse, ages)
+            brightness /= np.maximum(self.decay_factor(age), 1e-6)
+            last_hit[pixels] = self.now - age
+        stored[pixels] = brightness
+
+    def to_rgb(self):
+        """Convierte la energía en color con las tablas del tipo de fósforo y devuelve el arreglo RGB"""
+        phosphor = self.phosphor
+        table_size = PhosphorType.TABLE_SIZE
+
+        # Índice en las tablas según la antigüedad de cada píxel (en float32, sin copias nuevas)
+        np.subtract(self.now, self.last_hit, out=self.age_index, casting='same_kind')
+        np.multiply(self.age_index, np.float32(table_size / self.persistence_time), out=self.age_index)
+        np.minimum(self.age_index, np.float32(table_size), out=self.age_index)
+        index = self.table_index
+        np.copyto(index, self.age_index, casting='unsafe')
+        np.take(phosphor.decay_table, index, out=self.tone)
+        np.multiply(self.energy, self.tone, out=self.tone)
+
+        # Saturación suave del brillo
+        np.negative(self.tone, out=self.tone)
+        np.exp(self.tone, out=self.tone)
+        np.subtract(1, self.tone, out=self.tone)
+        for channel in range(3):
+            if phosphor.color_table is None:
+                color = phosphor.color[channel]
+            else:
+                color = np.take(phosphor.color_table[channel], index, out=self.channel)
+            np.multiply(self.tone, color, out=self.rgb[:, :, channel], casting='unsafe')
+        return self.rgb
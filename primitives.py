@@ -0,0 +1,99 @@
+import pygame
+import numpy as np
+
+from cache import LRUCache
+
+class PrimitiveCache(LRUCache):
+    """Caché de primitivas ya rasterizadas (rectángulos redondeados, vidrio, gradientes).
+
+    La clave es (tipo, tamaño, color(es), radio, alfa) en píxeles del destino.
+    Además del número de entradas se acota la memoria: se desalojan las menos
+    usadas mientras los bytes de las superficies guardadas superen max_bytes.
+    """
+    def __init__(self, max_size=512, max_bytes=16 * 1024 * 1024):
+        super().__init__(max_size)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def put(self, key, surface):
+        previous = self.entries.get(key)
+        if previous is not None:
+            self.bytes -= self.surface_bytes(previous)
+        self.bytes += self.surface_bytes(surface)
+        super().put(key, surface)
+        # Nunca se desaloja la entrada recién guardada
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self.evict_oldest()
+
+    def evict_oldest(self):
+        key, surface = super().evict_oldest()
+        self.bytes -= self.surface_bytes(surface)
+        return key, surface
+
+    def clear(self):
+        super().clear()
+        self.bytes = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats['bytes'] = self.bytes
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+    def cached(self, key, build):
+        """Superficie guardada para la clave, o la que devuelve build() la primera vez"""
+        surface = self.get(key)
+        if surface is None:
+            surface = build()
+            self.put(key, surface)
+        return surface
+
+    def rounded_rect(self, size, color, radius):
+        """Rectángulo relleno con esquinas redondeadas (radio en píxeles)"""
+        color = tuple(color)
+
+        def build():
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(surface, color, (0, 0, *size), border_radius=radius)
+            return surface
+        return self.cached(('rounded_rect', size, color, radius), build)
+
+    def gradient_strip(self, length, start_color, end_color, vertical=True):
+        """Franja de 1 píxel de ancho con un gradiente lineal (RGB o RGBA)"""
+        start_color = tuple(start_color)
+        end_color = tuple(end_color)
+
+        def build():
+            channels = max(len(start_color), len(end_color))
+            start = np.array(start_color + (255,) * (channels - len(start_color)), dtype=np.float64)
+            end = np.array(end_color + (255,) * (channels - len(end_color)), dtype=np.float64)
+            t = (np.arange(length) / length)[:, None]
+            colors = (start * (1 - t) + end * t).astype(np.uint8)
+
+            surface = pygame.Surface((1, length) if vertical else (length, 1), pygame.SRCALPHA)
+            rgb = pygame.surfarray.pixels3d(surface)
+            rgb[...] = colors[:, :3].reshape(rgb.shape)
+            del rgb
+            alpha = pygame.surfarray.pixels_alpha(surface)
+            alpha[...] = colors[:, 3].reshape(alpha.shape) if channels == 4 else 255
+            del alpha
+            return surface
+        return self.cached(('gradient_strip', length, start_color, end_color, vertical), build)
+
+    def gradient_rect(self, size, start_color, end_color, vertical=True):
+        """Rectángulo con gradiente: la franja de 1 píxel estirada con un solo escalado"""
+        def build():
+            if not size[0] or not size[1]:
+                return pygame.Surface(size, pygame.SRCALPHA)
+            length = size[1] if vertical else size[0]
+            strip = self.gradient_strip(length, start_color, end_color, vertical)
+            return pygame.transform.scale(strip, size)
+        return self.cached(('gradient_rect', size, tuple(start_color), tuple(end_color), vertical), build)
+
+    def glass(self, size, alpha):
+        """Brillo de vidrio: blanco con alfa que decrece de arriba hacia abajo"""
+        return self.gradient_rect(size, (255, 255, 255, alpha), (255, 255, 255, 0))
@@ -0,0 +1,170 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pygame
+
+# Clase original, restaurada al desactivar el conteo
+ORIGINAL_SURFACE = pygame.Surface
+
+class CountingSurface(ORIGINAL_SURFACE):
+    """pygame.Surface que cuenta cuántas superficies se crean (solo mientras el profiler está activo)"""
+    allocations = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingSurface.allocations += 1
+        super().__init__(*args, **kwargs)
+
+class FrameProfiler:
+    """Tiempos por etapa del frame con histograma móvil y overlay en pantalla"""
+    STAGES = [
+        'handle_events', 'update_simulation', 'draw_static_layers', 'draw_control_panel',
+        'draw_crt_views', 'draw_crt_screen', 'draw_grid', 'flip', 'export'
+    ]
+    COUNTERS = ['phosphor_points', 'surfaces_allocated']
+
+    # Región libre sobre las vistas donde se dibuja el overlay
+    OVERLAY_RECT = (390, 4, 805, 64)
+
+    def __init__(self, crt_simulation, history=600):
+        self.crt = crt_simulation
+        self.show_overlay = False
+        self.frame_count = 0
+        # Conteo de superficies activo (pygame.Surface reemplazada por CountingSurface)
+        self.enabled = False
+
+        # Últimos `history` frames de cada etapa (ms) y de cada contador
+        self.history = history
+        self.samples = {name: deque(maxlen=history) for name in self.STAGES + ['frame']}
+        self.counters = {name: deque(maxlen=history) for name in self.COUNTERS}
+        # Métodos instrumentados: tiempo acumulado en el frame actual (ms)
+        self.frame_totals = {}
+        self.instrumented = []
+
+        self.frame_start = 0.0
+        self.surfaces_at_start = 0
+
+    @contextmanager
+    def stage(self, name):
+        """Mide el tiempo de una etapa: `with profiler.stage('draw_grid'): ...`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append((time.perf_counter() - start) * 1000)
+
+    def instrument(self, owner, method_name):
+        """Reemplaza owner.method_name por una versión que acumula su tiempo por frame.
+
+        Sirve para métodos que se llaman varias veces por frame (p. ej. draw_glowing_circle).
+        """
+        method = getattr(owner, method_name)
+        self.samples[method_name] = deque(maxlen=self.history)
+        self.frame_totals[method_name] = 0.0
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.frame_totals[method_name] += (time.perf_counter() - start) * 1000
+
+        setattr(owner, method_name, timed)
+        self.instrumented.append((owner, method_name))
+
+    def remove_instruments(self):
+        """Quita los reemplazos hechos por instrument()"""
+        for owner, method_name in self.instrumented:
+            delattr(owner, method_name)
+        self.instrumented = []
+
+    def enable(self):
+        """Activa el conteo: las llamadas a pygame.Surface(...) pasan a contarse"""
+        if not self.enabled:
+            pygame.Surface = CountingSurface
+            self.enabled = True
+
+    def disable(self):
+        """Restaura la clase original de pygame.Surface"""
+        if self.enabled:
+            pygame.Surface = ORIGINAL_SURFACE
+            self.enabled = False
+
+    def surfaces_allocated(self):
+        """Superficies creadas: pygame.Surface(...) y textos renderizados (fallos de caché)"""
+        return CountingSurface.allocations + self.crt.text_cache.misses
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        self.surfaces_at_start = self.surfaces_allocated()
+
+    def end_frame(self):
+        self.samples['frame'].append((time.perf_counter() - self.frame_start) * 1000)
+        self.counters['phosphor_points'].append(len(self.crt.live_samples))
+        if self.enabled:
+            self.counters['surfaces_allocated'].append(self.surfaces_allocated() - self.surfaces_at_start)
+        for name, total in self.frame_totals.items():
+            self.samples[name].append(total)
+            self.frame_totals[name] = 0.0
+        self.frame_count += 1
+
+    def percentiles(self, values):
+        if not values:
+            return 0.0, 0.0, 0.0
+        p50, p95, p99 = np.percentile(np.fromiter(values, dtype=np.float64), [50, 95, 99])
+        return float(p50), float(p95), float(p99)
+
+    def summary(self):
+        """Estadísticas p50/p95/p99 de cada etapa y contador"""
+        stats = {}
+        for name, values in list(self.samples.items()) + list(self.counters.items()):
+            p50, p95, p99 = self.percentiles(values)
+            stats[name] = {'p50': p50, 'p95': p95, 'p99': p99, 'samples': len(values)}
+        return stats
+
+    def dump(self, path):
+        """Guarda las estadísticas en CSV o JSON según la extensión del archivo"""
+        stats = self.summary()
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(['stage', 'p50', 'p95', 'p99', 'samples'])
+                for name, values in stats.items():
+                    writer.writerow([name, values['p50'], values['p95'], values['p99'], values['samples']])
+        else:
+            with open(path, 'w') as output:
+                json.dump({'frames': self.frame_count, 'stats': stats}, output, indent=2)
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        # El conteo solo hace falta con el overlay visible o si se guardan las estadísticas
+        if self.show_overlay or self.crt.profile_output:
+            self.enable()
+        else:
+            self.disable()
+
+    def draw_overlay(self):
+        """Dibuja las estadísticas en una franja libre de la ventana"""
+        # Se refresca dos veces por segundo para que los números sean legibles
+        state = (self.show_overlay, self.frame_count // 30)
+        if not self.crt.damage.begin_region('profiler', self.OVERLAY_RECT, state) or not self.show_overlay:
+            return
+
+        region = self.crt.layout.rect(*self.OVERLAY_RECT)
+        self.crt.screen.fill(self.crt.DARK_GRAY, region)
+        lines = []
+        for name in ['frame'] + self.STAGES:
+            p50, p95, p99 = self.percentiles(self.samples[name])
+            lines.append(f"{name}: {p50:.2f}/{p95:.2f}/{p99:.2f} ms")
+        for name in self.COUNTERS:
+            p50, _, p99 = self.percentiles(self.counters[name])
+            lines.append(f"{name}: {p50:.0f} (p99 {p99:.0f})")
+
+        # Tres columnas de cuatro líneas
+        column_width = region.width // 3
+        for i, line in enumerate(lines):
+            text = self.crt.text_cache.render(self.crt.font_tiny, line, True, self.crt.WHITE)
+            self.crt.screen.blit(text, (region.x + self.crt.layout.length(6) + (i // 4) * column_width,
+                                        region.y + self.crt.layout.length(4 + (i % 4) * 15)))
@@ -0,0 +1,328 @@
+import queue
+import threading
+import numpy as np
+from engine import Mode
+from timebase import TimeBase
+from waveforms import WAVETABLES
+
+# Cabecera del archivo: identificador y versión (32 bytes, igual que un registro)
+MAGIC = b"CRTREC01"
+HEADER_SIZE = 32
+
+# Registro de tamaño fijo (32 bytes)
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),  # s, reloj simulado del motor
+    ('kind', '<u2'),  # BEAM, CONTROL, MODE o CLEAR
+    ('field', '<u2'),  # índice en CONTROL_FIELDS o en Mode
+    ('x', '<f4'),  # px, posición del haz
+    ('y', '<f4'),
+    ('value', '<f8'),  # valor (u opción) del control, energía de la muestra o 1 si el modo cambió
+    ('reserved', '<u4'),
+])
+
+# Tipos de registro
+BEAM, CONTROL, MODE, CLEAR = range(4)
+
+# Controles que se guardan (se registran solo cuando cambian). Los nombres con
+# puntos son de la base de tiempo o de un canal del motor
+CONTROL_FIELDS = [
+    'acceleration_voltage', 'vertical_voltage', 'horizontal_voltage', 'persistence_time',
+    'freq_vertical', 'freq_horizontal', 'phase_vertical', 'phase_horizontal',
+    'timebase.sweep_time', 'timebase.trigger_level', 'timebase.signal_frequency', 'timebase.holdoff',
+    'timebase.trigger_slope', 'timebase.trigger_mode',
+    'channels.horizontal.shape', 'channels.vertical.shape',
+]
+
+# Cada INDEX_INTERVAL registros se guarda una entrada (tiempo, número de registro) en el índice
+INDEX_INTERVAL = 4096
+INDEX_DTYPE = np.dtype([('time', '<f8'), ('record', '<i8')])
+
+# Cada KEYFRAME_INTERVAL segundos se repite el estado completo (modo y controles),
+# así una búsqueda solo necesita leer hacia atrás ese intervalo
+KEYFRAME_INTERVAL = 1.0
+
+# Bloques de muestras del haz pendientes de escritura como máximo (~1 s de pasos del
+# motor); con más se descartan. Controles, modos y keyframes se encolan siempre
+MAX_PENDING_BLOCKS = 256
+
+# Velocidades de reproducción permitidas
+MIN_SPEED = 1.0
+MAX_SPEED = 100.0
+
+def index_path(path):
+    return path + ".idx"
+
+def _control_target(engine, name):
+    """Objeto y atributo de un control ('timebase.holdoff' -> (engine.timebase, 'holdoff'))"""
+    *path, attribute = name.split('.')
+    target = engine
+    for part in path:
+        target = target[part] if isinstance(target, dict) else getattr(target, part)
+    return target, attribute
+
+def _control_choices(name):
+    """Opciones de un control que no es un número (se graba su índice), o None"""
+    if name == 'timebase.trigger_slope':
+        return [TimeBase.RISING, TimeBase.FALLING]
+    if name == 'timebase.trigger_mode':
+        return [TimeBase.AUTO, TimeBase.NORMAL]
+    if name.endswith('.shape'):
+        return list(WAVETABLES)
+    return None
+
+def read_control(engine, name):
+    """Valor de un control como número"""
+    target, attribute = _control_target(engine, name)
+    value = getattr(target, attribute)
+    choices = _control_choices(name)
+    return float(choices.index(value)) if choices else float(value)
+
+def write_control(engine, name, value):
+    """Aplica el valor grabado de un control"""
+    target, attribute = _control_target(engine, name)
+    choices = _control_choices(name)
+    if choices:
+        # Una forma de onda de archivo que no se cargó en esta sesión queda en la primera
+        index = int(value)
+        value = choices[index] if index < len(choices) else choices[0]
+    setattr(target, attribute, value)
+
+def make_records(kind, times, xs=0.0, ys=0.0, field=0, value=0.0):
+    """Arreglo de registros de un mismo tipo"""
+    times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+    records = np.zeros(times.size, dtype=RECORD_DTYPE)
+    records['time'] = times
+    records['kind'] = kind
+    records['field'] = field
+    records['x'] = xs
+    records['y'] = ys
+    records['value'] = value
+    return records
+
+class SessionRecorder:
+    """Graba la sesión (haz, controles y cambios de modo) en un archivo binario de solo anexado.
+
+    El frame solo arma los registros con NumPy y los encola; un hilo en segundo
+    plano escribe el archivo y el índice. Encolar nunca espera al disco: la cola
+    conserva el orden por tiempo y solo se acotan los bloques del haz, así que si
+    el disco se atrasa se descartan muestras del haz (samples_dropped) y nunca
+    controles, modos ni keyframes.
+    """
+    def __init__(self, path, engine, max_pending=MAX_PENDING_BLOCKS):
+        self.path = path
+        self.engine = engine
+        self.last_controls = {}
+        self.last_keyframe = None
+        self.samples_dropped = 0
+
+        self.queue = queue.SimpleQueue()
+        # Lugares libres para bloques del haz (el hilo de escritura los devuelve)
+        self.beam_slots = threading.BoundedSemaphore(max_pending)
+        self.output = open(path, "wb")
+        self.index_output = open(index_path(path), "wb")
+        header = np.zeros(HEADER_SIZE, dtype=np.uint8)
+        header[:len(MAGIC)] = np.frombuffer(MAGIC, dtype=np.uint8)
+        header[len(MAGIC)] = RECORD_DTYPE.itemsize
+        self.output.write(header.tobytes())
+
+        self.record_count = 0  # solo lo usa el hilo de escritura
+        self.writer = threading.Thread(target=self.write_loop, name="session-recorder", daemon=True)
+        self.writer.start()
+
+        # Estado inicial
+        self.write_keyframe()
+
+    def write_loop(self):
+        """Hilo de escritura: vacía la cola en el archivo y agrega entradas al índice"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            records, beam = item
+            self.output.write(records.tobytes())
+            if beam:
+                self.beam_slots.release()
+
+            # Entradas de índice para los múltiplos de INDEX_INTERVAL dentro del bloque
+            first = -(-self.record_count // INDEX_INTERVAL) * INDEX_INTERVAL
+            positions = np.arange(first, self.record_count + len(records), INDEX_INTERVAL)
+            if positions.size:
+                entries = np.zeros(positions.size, dtype=INDEX_DTYPE)
+                entries['time'] = records['time'][positions - self.record_count]
+                entries['record'] = positions
+                self.index_output.write(entries.tobytes())
+            self.record_count += len(records)
+
+        self.output.close()
+        self.index_output.close()
+
+    def close(self):
+        """Termina de escribir lo pendiente y cierra los archivos"""
+        self.queue.put(None)
+        self.writer.join()
+
+    def write_keyframe(self):
+        """Guarda el modo y todos los controles, cambien o no"""
+        self.last_controls = {}
+        self.last_keyframe = self.engine.clock
+        self.record_mode(self.engine.current_mode, switched=False)
+        self.record_controls()
+
+    def tick(self):
+        """Llamado en cada paso del motor: repite el estado completo cada KEYFRAME_INTERVAL"""
+        if self.engine.clock - self.last_keyframe >= KEYFRAME_INTERVAL:
+            self.write_keyframe()
+
+    def record_beam(self, xs, ys, timestamps, energy):
+        """Muestras del haz de un paso de simulación (se descartan si la cola está llena)"""
+        if not self.beam_slots.acquire(blocking=False):
+            self.samples_dropped += np.size(timestamps)
+            return
+        self.queue.put((make_records(BEAM, timestamps, xs, ys, value=energy), True))
+
+    def record_controls(self):
+        """Registra los controles que cambiaron desde la última vez"""
+        values = [read_control(self.engine, name) for name in CONTROL_FIELDS]
+        changed = [(field, value) for field, (name, value) in enumerate(zip(CONTROL_FIELDS, values))
+                   if self.last_controls.get(name) != value]
+        if not changed:
+            return
+        for field, value in changed:
+            self.last_controls[CONTROL_FIELDS[field]] = value
+        fields, values = zip(*changed)
+        self.queue.put((make_records(CONTROL, np.full(len(changed), self.engine.clock),
+                                     field=fields, value=values), False))
+
+    def record_mode(self, mode, switched=True):
+        """Modo actual; switched indica un cambio de modo (borra la pantalla) y no un keyframe"""
+        self.queue.put((make_records(MODE, self.engine.clock, field=list(Mode).index(mode),
+                                     value=float(switched)), False))
+
+    def record_clear(self):
+        self.queue.put((make_records(CLEAR, self.engine.clock), False))
+
+class SessionPlayer:
+    """Reproduce una grabación mapeada en memoria, sin cargarla completa en RAM.
+
+    Los registros están ordenados por tiempo: buscar un instante es una búsqueda
+    binaria en el índice más otra dentro de un bloque de INDEX_INTERVAL registros.
+    """
+    def __init__(self, path, speed=1.0):
+        with open(path, "rb") as recording:
+            header = recording.read(HEADER_SIZE)
+        if header[:len(MAGIC)] != MAGIC or header[len(MAGIC)] != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} no es una grabación de sesión válida")
+
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE)
+        self.index = self.load_index(path)
+
+        self.speed = MIN_SPEED
+        self.set_speed(speed)
+        self.start_time = float(self.records['time'][0]) if len(self.records) else 0.0
+        self.end_time = float(self.records['time'][-1]) if len(self.records) else 0.0
+        self.playback_time = self.start_time
+        self.position = 0
+
+    def load_index(self, path):
+        """Tiempos de cada INDEX_INTERVAL registros (del archivo .idx o leyendo solo esos registros)"""
+        try:
+            index = np.fromfile(index_path(path), dtype=INDEX_DTYPE)
+        except FileNotFoundError:
+            index = np.zeros(0, dtype=INDEX_DTYPE)
+        expected = -(-len(self.records) // INDEX_INTERVAL)
+        if len(index) != expected:
+            # Índice ausente o incompleto (grabación interrumpida): reconstruirlo
+            index = np.zeros(expected, dtype=INDEX_DTYPE)
+            index['record'] = np.arange(expected) * INDEX_INTERVAL
+            index['time'] = self.records['time'][::INDEX_INTERVAL]
+        return index['time'].copy()
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    def set_speed(self, speed):
+        self.speed = min(MAX_SPEED, max(MIN_SPEED, speed))
+
+    def find(self, timestamp):
+        """Primer registro con tiempo >= timestamp, en O(log n)"""
+        # Último bloque que empieza antes del instante; si el instante no está en él,
+        # el resultado es el inicio del bloque siguiente
+        block = max(0, int(np.searchsorted(self.index, timestamp, side='left')) - 1)
+        start = block * INDEX_INTERVAL
+        times = np.asarray(self.records['time'][start:start + INDEX_INTERVAL])
+        return start + int(np.searchsorted(times, timestamp, side='left'))
+
+    def seek(self, engine, timestamp):
+        """Salta a un instante: restaura modo, controles y la imagen del fósforo"""
+        timestamp = min(self.end_time, max(self.start_time, timestamp))
+
+        # El último keyframe está como mucho KEYFRAME_INTERVAL antes
+        keyframe_start = self.find(timestamp - KEYFRAME_INTERVAL)
+        position = self.find(timestamp)
+        self.apply_events(engine, np.asarray(self.records[keyframe_start:position]))
+
+        # Fósforo: solo las muestras dentro de la persistencia actual
+        engine.clear_screen()
+        beam_start = self.find(timestamp - engine.persistence_time)
+        self.deposit(engine, np.asarray(self.records[beam_start:position]), timestamp)
+        self.position = position
+        self.playback_time = timestamp
+
+    def drive(self, engine, real_dt):
+        """Avanza la reproducción real_dt segundos (por la velocidad); True si cambió algún control"""
+        if engine.paused or self.playback_time >= self.end_time:
+            return False
+
+        target_time = min(self.end_time, self.playback_time + real_dt * self.speed)
+        end = self.find(target_time)
+        if target_time >= self.end_time:
+            end = len(self.records)
+        chunk = np.asarray(self.records[self.position:end])
+
+        controls_changed = self.apply_events(engine, chunk)
+        self.deposit(engine, chunk, target_time)
+        self.position = end
+        self.playback_time = target_time
+        return controls_changed
+
+    def apply_events(self, engine, records):
+        """Aplica en orden los controles, modos y borrados; True si hubo alguno"""
+        events = records[records['kind'] != BEAM]
+        modes = list(Mode)
+        for record in events:
+            if record['kind'] == CONTROL:
+                write_control(engine, CONTROL_FIELDS[record['field']], float(record['value']))
+            elif record['kind'] == MODE:
+                engine.current_mode = modes[record['field']]
+                if record['value']:
+                    engine.clear_screen()
+            elif record['kind'] == CLEAR:
+                engine.clear_screen()
+        return len(events) > 0
+
+    def deposit(self, engine, records, end_time):
+        """Deposita las muestras del haz hasta end_time, cada una ya atenuada por su antigüedad"""
+        # Tras un borrado o cambio de modo solo cuentan las muestras posteriores
+        resets = np.flatnonzero(((records['kind'] == MODE) & (records['value'] > 0)) | (records['kind'] == CLEAR))
+        if resets.size:
+            records = records[resets[-1] + 1:]
+        engine.phosphor_screen.advance(end_time - self.playback_time, engine.persistence_time)
+
+        beam = records[records['kind'] == BEAM]
+        beam = beam[end_time - beam['time'] < engine.persistence_time]
+        if len(beam):
+            xs = beam['x'].astype(np.int32)
+            ys = beam['y'].astype(np.int32)
+            age = end_time - beam['time']
+            engine.phosphor_screen.deposit(xs - engine.crt_screen_x, ys - engine.crt_screen_y, beam['value'], age)
+            engine.live_samples.add(beam['time'])
+            engine.previous_beam = engine.beam_position
+            engine.beam_position = (int(xs[-1]), int(ys[-1]))
+
+        if engine.current_mode == Mode.LISSAJOUS:
+            # Aproximado: el tiempo de Lissajous no se graba, avanza con la reproducción
+            engine.previous_time = engine.time
+            engine.time += end_time - self.playback_time
+        engine.clock = end_time
+        engine.live_samples.expire(engine.clock, engine.persistence_time)
@@ -1,245 +1,214 @@
-import pygame
 import math
 
+from engine import Mode
+from widgets import Slider, Button, RatioGrid, SpatialIndex
+
 class SliderManager:
     def __init__(self, crt_simulation):
         self.crt = crt_simulation
         self.setup_interface_elements()
+        # Slider que se está arrastrando (el arrastre no salta a otros widgets)
+        self.active_slider = None
+        self.hovered = None
     
     def setup_interface_elements(self):
         """Configura las posiciones de todos los elementos de la interfaz"""
+        crt = self.crt
         # Sliders con mejor espaciado
         slider_x = 50
         slider_width = 280
         slider_height = 20
         
-        self.acceleration_slider = {
-            'rect': pygame.Rect(slider_x, 120, slider_width, slider_height),
-            'value': self.crt.acceleration_voltage / self.crt.max_voltage,
-            'label': 'V. Aceleración',
-            'color': self.crt.PRIMARY_BLUE,
-            'unit': 'V'
-        }
-        
-        self.vertical_slider = {
-            'rect': pygame.Rect(slider_x, 160, slider_width, slider_height),
-            'value': (self.crt.vertical_voltage + self.crt.max_deflection_voltage) / (2 * self.crt.max_deflection_voltage),
-            'label': 'V. Vertical',
-            'color': self.crt.SUCCESS_GREEN,
-            'unit': 'V'
-        }
-        
-        self.horizontal_slider = {
-            'rect': pygame.Rect(slider_x, 210, slider_width, slider_height),
-            'value': (self.crt.horizontal_voltage + self.crt.max_deflection_voltage) / (2 * self.crt.max_deflection_voltage),
-            'label': 'V. Horizontal',
-            'color': self.crt.DANGER_RED,
-            'unit': 'V'
-        }
-        
-        self.persistence_slider = {
-            'rect': pygame.Rect(slider_x, 260, slider_width, slider_height),
-            'value': (self.crt.persistence_time - 0.1) / 9.9,  # Mapear de 0.1-10 a 0-1
-            'label': 'Persistencia',
-            'color': self.crt.GRAY,
-            'unit': 's'
-        }
-        
-        self.freq_vertical_slider = {
-            'rect': pygame.Rect(slider_x, 310, slider_width, slider_height),
-            'value': self.crt.freq_vertical / 10.0,
-            'label': 'Frecuencia Vertical',
-            'color': self.crt.WARNING_ORANGE,
-            'unit': 'Hz'
-        }
-        
-        self.freq_horizontal_slider = {
-            'rect': pygame.Rect(slider_x, 360, slider_width, slider_height),
-            'value': self.crt.freq_horizontal / 10.0,
-            'label': 'Frecuencia Horizontal',
-            'color': self.crt.WARNING_ORANGE,
-            'unit': 'Hz'
-        }
+        self.acceleration_slider = Slider(
+            ('slider', 'V. Aceleración'), (slider_x, 120, slider_width, slider_height),
+            'V. Aceleración', crt.PRIMARY_BLUE, 'V',
+            lambda: f"{crt.acceleration_voltage:.0f}",
+            value=crt.acceleration_voltage / crt.max_voltage)
+        
+        self.vertical_slider = Slider(
+            ('slider', 'V. Vertical'), (slider_x, 160, slider_width, slider_height),
+            'V. Vertical', crt.SUCCESS_GREEN, 'V',
+            lambda: f"{crt.vertical_voltage:.1f}", modes=frozenset({Mode.MANUAL}),
+            value=(crt.vertical_voltage + crt.max_deflection_voltage) / (2 * crt.max_deflection_voltage))
+        
+        self.horizontal_slider = Slider(
+            ('slider', 'V. Horizontal'), (slider_x, 210, slider_width, slider_height),
+            'V. Horizontal', crt.DANGER_RED, 'V',
+            lambda: f"{crt.horizontal_voltage:.1f}", modes=frozenset({Mode.MANUAL}),
+            value=(crt.horizontal_voltage + crt.max_deflection_voltage) / (2 * crt.max_deflection_voltage))
+        
+        self.persistence_slider = Slider(
+            ('slider', 'Persistencia'), (slider_x, 260, slider_width, slider_height),
+            'Persistencia', crt.GRAY, 's',
+            lambda: f"{crt.persistence_time:.1f}",
+            value=(crt.persistence_time - 0.1) / 9.9)  # Mapear de 0.1-10 a 0-1
+        
+        self.freq_vertical_slider = Slider(
+            ('slider', 'Frecuencia Vertical'), (slider_x, 310, slider_width, slider_height),
+            'Frecuencia Vertical', crt.WARNING_ORANGE, 'Hz',
+            lambda: f"{crt.freq_vertical:.1f}", modes=frozenset({Mode.LISSAJOUS}),
+            value=crt.freq_vertical / 10.0)
+        
+        self.freq_horizontal_slider = Slider(
+            ('slider', 'Frecuencia Horizontal'), (slider_x, 360, slider_width, slider_height),
+            'Frecuencia Horizontal', crt.WARNING_ORANGE, 'Hz',
+            lambda: f"{crt.freq_horizontal:.1f}", modes=frozenset({Mode.LISSAJOUS}),
+            value=crt.freq_horizontal / 10.0)
+        
+        self.sliders = [self.acceleration_slider, self.vertical_slider, self.horizontal_slider,
+                        self.persistence_slider, self.freq_vertical_slider, self.freq_horizontal_slider]
+        
+        # Controles del modo Y-T: ocupan el lugar (y la región) de los voltajes y las frecuencias
+        timebase = crt.timebase
+        time_base = frozenset({Mode.TIME_BASE})
+        self.sweep_slider = Slider(
+            self.vertical_slider.key, self.vertical_slider.rect, 'Barrido', crt.SUCCESS_GREEN, 'ms',
+            lambda: f"{timebase.sweep_time * 1000:.2f}", modes=time_base)
+        self.trigger_level_slider = Slider(
+            self.horizontal_slider.key, self.horizontal_slider.rect, 'Nivel de disparo', crt.DANGER_RED, 'V',
+            lambda: f"{timebase.trigger_level:.0f}", modes=time_base)
+        self.signal_frequency_slider = Slider(
+            self.freq_vertical_slider.key, self.freq_vertical_slider.rect, 'Frecuencia de entrada',
+            crt.WARNING_ORANGE, 'Hz', lambda: f"{timebase.signal_frequency:.0f}", modes=time_base)
+        self.holdoff_slider = Slider(
+            self.freq_horizontal_slider.key, self.freq_horizontal_slider.rect, 'Holdoff', crt.GRAY, 'ms',
+            lambda: f"{timebase.holdoff * 1000:.1f}", modes=time_base)
+        self.time_base_sliders = [self.sweep_slider, self.trigger_level_slider,
+                                  self.signal_frequency_slider, self.holdoff_slider]
+        self.replacements = {Mode.TIME_BASE: dict(zip(
+            [self.vertical_slider, self.horizontal_slider, self.freq_vertical_slider, self.freq_horizontal_slider],
+            self.time_base_sliders))}
+        self.set_time_base_sliders()
         
         # Botones
-        self.manual_button = pygame.Rect(50, 400, 120, 40)
-        self.lissajous_button = pygame.Rect(220, 400, 120, 40)
-        self.reset_button = pygame.Rect(150, 450, 90, 30)
+        self.manual_button = Button(('button', 'manual'), (50, 400, 120, 40), "Modo Manual",
+                                    crt.SUCCESS_GREEN, lambda: crt.set_mode(Mode.MANUAL),
+                                    mode=Mode.MANUAL, font='font_medium')
+        self.lissajous_button = Button(('button', 'lissajous'), (220, 400, 120, 40), "Modo Lissajous",
+                                       crt.WARNING_ORANGE, lambda: crt.set_mode(Mode.LISSAJOUS),
+                                       mode=Mode.LISSAJOUS)
+        # El modo XY solo está disponible si se cargó un WAV (--wav)
+        self.audio_button = Button(('button', 'audio'), (50, 450, 100, 30), "Audio XY",
+                                   crt.PRIMARY_BLUE, lambda: crt.set_mode(Mode.AUDIO_XY),
+                                   mode=Mode.AUDIO_XY, radius=8, border_radius=6, requires='audio_source')
+        self.time_base_button = Button(('button', 'time_base'), (160, 450, 80, 30), "Y-T",
+                                       crt.SECONDARY_BLUE, lambda: crt.set_mode(Mode.TIME_BASE),
+                                       mode=Mode.TIME_BASE, radius=8, border_radius=6)
+        self.reset_button = Button(('button', 'reset'), (250, 450, 90, 30), "Reset",
+                                   crt.DANGER_RED, crt.reset_simulation, radius=8, border_radius=6)
+        
+        self.buttons = [self.manual_button, self.lissajous_button, self.audio_button,
+                        self.time_base_button, self.reset_button]
+        
+        # Grid de proporciones de Lissajous
+        self.ratio_grid = RatioGrid()
+        
+        # Búsqueda de widgets por posición (las zonas del panel y del grid no se superponen)
+        self.index = SpatialIndex(self.sliders + self.time_base_sliders + self.buttons + self.ratio_grid.cells)
+    
+    def visible_sliders(self):
+        """Sliders que se muestran en el modo actual"""
+        replaced = self.replacements.get(self.crt.current_mode, {})
+        return [replaced.get(slider, slider) for slider in self.sliders]
+    
+    def widget_at(self, pos):
+        """Widget bajo un punto de diseño (o None)"""
+        hidden = self.time_base_sliders if self.crt.current_mode != Mode.TIME_BASE else self.replacements[Mode.TIME_BASE]
+        return self.index.at(pos, lambda widget: widget not in hidden)
+    
+    def update_hover(self, pos):
+        """Marca el widget bajo el mouse; solo se re-rasterizan el anterior y el nuevo"""
+        widget = self.widget_at(pos)
+        if widget is not None and not widget.is_enabled(self.crt):
+            widget = None
+        if widget is self.hovered:
+            return
+        if self.hovered is not None:
+            self.hovered.hovered = False
+        if widget is not None:
+            widget.hovered = True
+        self.hovered = widget
+    
+    def handle_press(self, pos):
+        """Click en un widget: los botones actúan y los sliders empiezan a arrastrarse"""
+        widget = self.widget_at(pos)
+        if widget is None or not widget.is_enabled(self.crt):
+            return
+        if isinstance(widget, Slider):
+            if self.crt.paused:
+                return
+            self.active_slider = widget
+        widget.click(self.crt, pos)
     
     def handle_slider_click(self, pos):
-        """Maneja los clicks en los sliders"""
-        if self.crt.paused:
+        """Maneja el arrastre del slider activo"""
+        slider = self.active_slider
+        if slider is None or self.crt.paused or not slider.is_enabled(self.crt):
             return
-        
-        sliders = [
-            self.acceleration_slider,
-            self.vertical_slider if self.crt.current_mode.value == "Manual" else None,
-            self.horizontal_slider if self.crt.current_mode.value == "Manual" else None,
-            self.persistence_slider,
-            self.freq_vertical_slider if self.crt.current_mode.value == "Lissajous" else None,
-            self.freq_horizontal_slider if self.crt.current_mode.value == "Lissajous" else None
-        ]
-        
-        for slider in sliders:
-            if slider and slider['rect'].collidepoint(pos):
-                # Calcular nuevo valor basado en posición del mouse
-                relative_x = pos[0] - slider['rect'].x
-                slider['value'] = max(0, min(1, relative_x / slider['rect'].width))
-                self.update_values_from_sliders()
-                break
+        slider.click(self.crt, pos)
+    
+    def release(self):
+        """Termina el arrastre"""
+        self.active_slider = None
     
     def update_values_from_sliders(self):
         """Actualiza los valores físicos basado en los sliders"""
-        self.crt.acceleration_voltage = self.acceleration_slider['value'] * self.crt.max_voltage
+        self.crt.acceleration_voltage = self.acceleration_slider.value * self.crt.max_voltage
         
-        if self.crt.current_mode.value == "Manual":
-            self.crt.vertical_voltage = (self.vertical_slider['value'] - 0.5) * 2 * self.crt.max_deflection_voltage
-            self.crt.horizontal_voltage = (self.horizontal_slider['value'] - 0.5) * 2 * self.crt.max_deflection_voltage
+        if self.crt.current_mode == Mode.MANUAL:
+            self.crt.vertical_voltage = (self.vertical_slider.value - 0.5) * 2 * self.crt.max_deflection_voltage
+            self.crt.horizontal_voltage = (self.horizontal_slider.value - 0.5) * 2 * self.crt.max_deflection_voltage
         
         # Persistencia de 0.1 a 10 segundos
-        self.crt.persistence_time = 0.1 + (self.persistence_slider['value'] * 9.9)
-        
-        if self.crt.current_mode.value == "Lissajous":
-            self.crt.freq_vertical = self.freq_vertical_slider['value'] * 10.0
-            self.crt.freq_horizontal = self.freq_horizontal_slider['value'] * 10.0
+        self.crt.persistence_time = 0.1 + (self.persistence_slider.value * 9.9)
+        
+        if self.crt.current_mode == Mode.LISSAJOUS:
+            self.crt.freq_vertical = self.freq_vertical_slider.value * 10.0
+            self.crt.freq_horizontal = self.freq_horizontal_slider.value * 10.0
+        
+        if self.crt.current_mode == Mode.TIME_BASE:
+            # Barrido y frecuencia en escala logarítmica, nivel de -A a A, holdoff lineal
+            timebase = self.crt.timebase
+            timebase.sweep_time = timebase.MIN_SWEEP_TIME * (
+                timebase.MAX_SWEEP_TIME / timebase.MIN_SWEEP_TIME) ** self.sweep_slider.value
+            timebase.signal_frequency = timebase.MIN_SIGNAL_FREQUENCY * (
+                timebase.MAX_SIGNAL_FREQUENCY / timebase.MIN_SIGNAL_FREQUENCY) ** self.signal_frequency_slider.value
+            timebase.trigger_level = (self.trigger_level_slider.value - 0.5) * 2 * self.crt.lissajous_voltage_amplitude
+            timebase.holdoff = self.holdoff_slider.value * timebase.MAX_HOLDOFF
+        
+        if self.crt.recorder is not None:
+            self.crt.recorder.record_controls()
     
     def update_sliders_from_values(self):
         """Actualiza los sliders basado en los valores físicos"""
-        self.acceleration_slider['value'] = self.crt.acceleration_voltage / self.crt.max_voltage
-        self.vertical_slider['value'] = (self.crt.vertical_voltage + self.crt.max_deflection_voltage) / (2 * self.crt.max_deflection_voltage)
-        self.horizontal_slider['value'] = (self.crt.horizontal_voltage + self.crt.max_deflection_voltage) / (2 * self.crt.max_deflection_voltage)
+        self.acceleration_slider.value = self.crt.acceleration_voltage / self.crt.max_voltage
+        self.vertical_slider.value = (self.crt.vertical_voltage + self.crt.max_deflection_voltage) / (2 * self.crt.max_deflection_voltage)
+        self.horizontal_slider.value = (self.crt.horizontal_voltage + self.crt.max_deflection_voltage) / (2 * self.crt.max_deflection_voltage)
         
         # Mapear persistencia de 0.1-10 a 0-1
-        self.persistence_slider['value'] = (self.crt.persistence_time - 0.1) / 9.9
+        self.persistence_slider.value = (self.crt.persistence_time - 0.1) / 9.9
         
-        self.freq_vertical_slider['value'] = self.crt.freq_vertical / 10.0
-        self.freq_horizontal_slider['value'] = self.crt.freq_horizontal / 10.0
-    
-    def get_slider_value(self, slider):
-        """Obtiene el valor actual del slider formateado"""
-        if slider == self.acceleration_slider:
-            return f"{self.crt.acceleration_voltage:.0f}"
-        elif slider == self.vertical_slider:
-            return f"{self.crt.vertical_voltage:.1f}"
-        elif slider == self.horizontal_slider:
-            return f"{self.crt.horizontal_voltage:.1f}"
-        elif slider == self.persistence_slider:
-            return f"{self.crt.persistence_time:.1f}"
-        elif slider == self.freq_vertical_slider:
-            return f"{self.crt.freq_vertical:.1f}"
-        elif slider == self.freq_horizontal_slider:
-            return f"{self.crt.freq_horizontal:.1f}"
-        return "0"
-    
-    def draw_gradient_rect(self, surface, rect, color1, color2, vertical=True):
-        """Dibuja un rectángulo con gradiente"""
-        if vertical:
-            for y in range(rect.height):
-                t = y / rect.height
-                r = int(color1[0] * (1-t) + color2[0] * t)
-                g = int(color1[1] * (1-t) + color2[1] * t)
-                b = int(color1[2] * (1-t) + color2[2] * t)
-                pygame.draw.line(surface, (r, g, b), 
-                               (rect.x, rect.y + y), (rect.x + rect.width, rect.y + y))
-        else:
-            for x in range(rect.width):
-                t = x / rect.width
-                r = int(color1[0] * (1-t) + color2[0] * t)
-                g = int(color1[1] * (1-t) + color2[1] * t)
-                b = int(color1[2] * (1-t) + color2[2] * t)
-                pygame.draw.line(surface, (r, g, b), 
-                               (rect.x + x, rect.y), (rect.x + x, rect.y + rect.height))
+        self.freq_vertical_slider.value = self.crt.freq_vertical / 10.0
+        self.freq_horizontal_slider.value = self.crt.freq_horizontal / 10.0
+        self.set_time_base_sliders()
+        
+        # Los valores cambiaron por teclado, grid o reset
+        if self.crt.recorder is not None:
+            self.crt.recorder.record_controls()
     
-    def draw_slider(self, slider, enabled=True):
-        """Dibuja un slider con diseño moderno y simple"""
-        # Label con mejor tipografía
-        label_color = self.crt.DARK_GRAY if enabled else self.crt.GRAY
-        label_surface = self.crt.font_small.render(slider['label'], True, label_color)
-        self.crt.screen.blit(label_surface, (slider['rect'].x, slider['rect'].y - 20))
-        
-        # Valor actual en el lado derecho
-        value_text = f"{self.get_slider_value(slider)} {slider['unit']}"
-        value_surface = self.crt.font_tiny.render(value_text, True, label_color)
-        value_rect = value_surface.get_rect()
-        value_rect.topright = (slider['rect'].right, slider['rect'].y - 20)
-        self.crt.screen.blit(value_surface, value_rect)
-        
-        # Track del slider con diseño elegante
-        track_rect = slider['rect'].copy()
-        track_rect.height = 8
-        track_rect.y += 6  # Centrar verticalmente
-        
-        # Track de fondo
-        track_bg_color = self.crt.MEDIUM_GRAY if enabled else self.crt.LIGHT_GRAY
-        self.crt.draw_rounded_rect(self.crt.screen, track_bg_color, track_rect, 4)
-        
-        if self.crt.paused:
-            enabled = False
-        
-        # Track activo (parte llena)
-        if enabled and slider['value'] > 0:
-            active_width = int(slider['value'] * track_rect.width)
-            active_rect = pygame.Rect(track_rect.x, track_rect.y, active_width, track_rect.height)
-            
-            # Color del slider
-            slider_color = slider['color']
-            self.crt.draw_rounded_rect(self.crt.screen, slider_color, active_rect, 4)
-            
-            # Efecto de brillo sutil en el track activo
-            highlight_rect = pygame.Rect(active_rect.x, active_rect.y, active_rect.width, 2)
-            highlight_color = tuple(min(255, c + 40) for c in slider_color)
-            self.crt.draw_rounded_rect(self.crt.screen, highlight_color, highlight_rect, 2)
-        
-        # Handle del slider (perilla)
-        if enabled:
-            handle_x = slider['rect'].x + slider['value'] * slider['rect'].width
-            handle_y = slider['rect'].y + slider['rect'].height // 2
-            
-            # Handle principal simple
-            handle_center = (int(handle_x), handle_y)
-            
-            # Círculo exterior blanco
-            pygame.draw.circle(self.crt.screen, self.crt.WHITE, handle_center, 10)
-            pygame.draw.circle(self.crt.screen, slider['color'], handle_center, 10, 3)
-            
-            # Círculo interior con color del slider
-            pygame.draw.circle(self.crt.screen, slider['color'], handle_center, 6)
-            
-            # Punto central blanco
-            pygame.draw.circle(self.crt.screen, self.crt.WHITE, handle_center, 2)
+    def set_time_base_sliders(self):
+        """Posición de los sliders del modo Y-T según la base de tiempo"""
+        timebase = self.crt.timebase
+        self.sweep_slider.value = math.log(timebase.sweep_time / timebase.MIN_SWEEP_TIME) / math.log(
+            timebase.MAX_SWEEP_TIME / timebase.MIN_SWEEP_TIME)
+        self.signal_frequency_slider.value = math.log(timebase.signal_frequency / timebase.MIN_SIGNAL_FREQUENCY) / math.log(
+            timebase.MAX_SIGNAL_FREQUENCY / timebase.MIN_SIGNAL_FREQUENCY)
+        self.trigger_level_slider.value = timebase.trigger_level / (2 * self.crt.lissajous_voltage_amplitude) + 0.5
+        self.holdoff_slider.value = timebase.holdoff / timebase.MAX_HOLDOFF
     
-    def draw_scale_marks(self, slider):
-        """Dibuja marcas de escala en sliders importantes"""
-        track_rect = slider['rect'].copy()
-        track_rect.height = 8
-        track_rect.y += 6
-        
-        # Dibujar 5 marcas de escala
-        for i in range(5):
-            x = track_rect.x + (i / 4) * track_rect.width
-            y1 = track_rect.bottom + 3
-            y2 = y1 + 5
-            
-            pygame.draw.line(self.crt.screen, self.crt.GRAY, (x, y1), (x, y2), 1)
-            
-            # Etiquetas para valores extremos
-            if i == 0:
-                if slider == self.acceleration_slider:
-                    text = "0V"
-                elif slider == self.persistence_slider:
-                    text = "0.1s"
-                text_surface = self.crt.font_tiny.render(text, True, self.crt.GRAY)
-                text_rect = text_surface.get_rect()
-                text_rect.centerx = int(x)
-                text_rect.top = y2 + 2
-                self.crt.screen.blit(text_surface, text_rect)
-            elif i == 4:
-                if slider == self.acceleration_slider:
-                    text = "1000V"
-                elif slider == self.persistence_slider:
-                    text = "10s"
-                text_surface = self.crt.font_tiny.render(text, True, self.crt.GRAY)
-                text_rect = text_surface.get_rect()
-                text_rect.centerx = int(x)
-                text_rect.top = y2 + 2
-                self.crt.screen.blit(text_surface, text_rect)
\ No newline at end of file
+    def draw(self):
+        """Dibuja los sliders y botones que cambiaron"""
+        for widget in self.visible_sliders():
+            widget.draw(self.crt)
+        for widget in self.buttons:
+            widget.draw(self.crt)
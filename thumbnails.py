@@ -0,0 +1,162 @@
+import os
+import math
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pygame
+from cache import LRUCache
+from waveforms import WAVETABLES, BUILTIN_WAVEFORMS
+from workers import spawn_pool
+
+# Caché en disco por defecto
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "crt_simulacion", "miniaturas")
+
+# Paso del voltaje de aceleración en la clave (al arrastrar el slider no se pide una miniatura por valor)
+ACCELERATION_STEP = 50.0
+
+# Motores de simulación del proceso de trabajo, uno por tamaño de miniatura
+_engines = {}
+
+def thumbnail_filename(key):
+    ratio, phase, size, shapes, acceleration_voltage, (trace_color, background_color) = key
+    palette = "".join(f"{channel:02x}" for channel in trace_color + background_color)
+    return (f"{ratio[0]}x{ratio[1]}_fase{phase:.2f}_{shapes[0]}-{shapes[1]}_{acceleration_voltage:.0f}V"
+            f"_{size}_{palette}.png")
+
+def _thumbnail_engine(size):
+    """Motor con la pantalla del tamaño de la miniatura (se crea una vez por proceso)"""
+    from engine import SimulationEngine
+    engine = _engines.get(size)
+    if engine is None:
+        engine = _engines[size] = SimulationEngine(0, 0, size)
+    return engine
+
+def _render_thumbnail(key, cache_dir, tables=None):
+    """Proceso de trabajo: lee la miniatura del disco o la genera y la guarda.
+
+    La figura sale del mismo camino que la pantalla (formas de onda de cada
+    canal y óptica del tubo, vía FigureCache.build). `tables` trae los
+    periodos de las formas de onda cargadas de archivos, que el proceso de
+    trabajo no conoce. Devuelve (key, arreglo RGB en orden de surfarray (x, y)).
+    """
+    # Importación diferida: headless configura SDL sin ventana (solo en el proceso de trabajo)
+    from headless import rasterize_trace
+    from encoders import encode_png
+    from waveforms import WAVETABLES, Wavetable
+
+    ratio, phase, size, shapes, acceleration_voltage, (trace_color, background_color) = key
+    path = os.path.join(cache_dir, thumbnail_filename(key)) if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            return key, pygame.surfarray.array3d(pygame.image.load(path))
+        except pygame.error:
+            pass  # Archivo dañado: se vuelve a generar
+
+    for name, samples in (tables or {}).items():
+        WAVETABLES[name] = Wavetable(samples)
+    engine = _thumbnail_engine(size)
+    engine.channels['horizontal'].shape, engine.channels['vertical'].shape = shapes
+    engine.acceleration_voltage = acceleration_voltage
+    figure = engine.figures.build(ratio[0], ratio[1], phase / (2 * math.pi))
+    points = np.column_stack((figure.xs[figure.reaches], figure.ys[figure.reaches])).astype(np.int64)
+    pixels = rasterize_trace(points, size, trace_color, background_color, densify=False)
+
+    if path:
+        # Escritura atómica: otro proceso nunca ve un archivo a medias
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as output:
+            output.write(encode_png(pixels.transpose(1, 0, 2)))
+        os.replace(temporary, path)
+    return key, pixels
+
+class ThumbnailRenderer:
+    """Miniaturas de las figuras de Lissajous para el grid de proporciones.
+
+    request() las encarga a un pool de procesos y poll() pasa las terminadas a
+    una caché LRU en memoria (también se guardan en disco); get() solo consulta
+    la caché y devuelve None mientras no estén listas (placeholder).
+    Si el pool se rompe se descartan sus trabajos y se crea otro, hasta
+    max_restarts veces; después el grid sigue sin miniaturas. Con workers=0
+    no se crea el pool y el grid queda con los placeholders.
+    """
+    def __init__(self, size=38, cache_dir=DEFAULT_CACHE_DIR, max_items=64, workers=1, max_restarts=3):
+        self.size = size
+        self.cache_dir = cache_dir
+        self.cache = LRUCache(max_items)
+        self.workers = workers
+        self.executor = None
+        self.pending = {}  # key -> future
+        self.failed = set()  # claves cuyo trabajo falló (no se reintentan)
+        self.restarts = 0
+        self.max_restarts = max_restarts
+
+    def key(self, ratio, phase, palette, shapes=('sine', 'sine'), acceleration_voltage=1000.0):
+        """Clave de caché: (ratio, diferencia de fase, tamaño, formas de onda, voltaje de aceleración, paleta)"""
+        phase = round(phase % (2 * math.pi), 2)
+        acceleration_voltage = round(acceleration_voltage / ACCELERATION_STEP) * ACCELERATION_STEP
+        return (tuple(ratio), phase, self.size, tuple(shapes), acceleration_voltage,
+                (tuple(palette[0]), tuple(palette[1])))
+
+    def get(self, key):
+        """Superficie de la miniatura, o None si todavía no está lista (no encarga nada)"""
+        return self.cache.get(key)
+
+    def request(self, keys):
+        """Encarga las miniaturas que faltan y cancela las pendientes que ya no se piden"""
+        wanted = set(keys)
+        for key in [key for key in self.pending if key not in wanted]:
+            if self.pending[key].cancel():
+                del self.pending[key]
+        for key in keys:
+            if key not in self.cache and key not in self.pending and key not in self.failed:
+                self.submit(key)
+
+    def submit(self, key):
+        """Encarga una miniatura al pool (creándolo si hace falta); si está roto, reintenta con uno nuevo"""
+        for _ in range(2):
+            if self.workers == 0 or self.restarts > self.max_restarts:
+                return
+            try:
+                if self.executor is None:
+                    self.executor = spawn_pool(self.workers)
+                # Las formas de onda cargadas de archivos viajan con el trabajo (y no se guardan en disco)
+                tables = {name: WAVETABLES[name].table[:-1] for name in key[3] if name not in BUILTIN_WAVEFORMS}
+                cache_dir = None if tables else self.cache_dir
+                self.pending[key] = self.executor.submit(_render_thumbnail, key, cache_dir, tables)
+                return
+            except (BrokenProcessPool, RuntimeError, OSError):
+                self.restart()
+
+    def restart(self):
+        """Descarta el pool roto y sus trabajos; el siguiente pedido crea otro"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+        self.pending.clear()
+        self.restarts += 1
+
+    def poll(self):
+        """Pasa a la caché las miniaturas terminadas; True si llegó alguna"""
+        finished = [key for key, future in self.pending.items() if future.done()]
+        broken = False
+        for key in finished:
+            future = self.pending.pop(key)
+            try:
+                _, pixels = future.result()
+            except BrokenProcessPool:
+                broken = True
+            except Exception:
+                self.failed.add(key)  # error del trabajo (o cancelado): queda el placeholder
+            else:
+                self.cache.put(key, pygame.surfarray.make_surface(pixels))
+        if broken:
+            self.restart()
+        return bool(finished)
+
+    def close(self):
+        """Cierra el pool y descarta los trabajos pendientes (uno nuevo se crea al volver a pedir)"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+        self.pending.clear()
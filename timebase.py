@@ -0,0 +1,141 @@
+import math
+import numpy as np
+
+class TimeBase:
+    """Base de tiempo del modo Y-T: diente de sierra en las placas horizontales con disparo.
+
+    La entrada se muestrea a sample_rate y se guarda en un buffer circular. Los
+    cruces del nivel de disparo se buscan con numpy sobre el buffer; el bucle en
+    Python avanza por barridos, no por muestras, así que señales de kHz con
+    barridos cortos siguen siendo estables.
+    """
+    RISING = 1
+    FALLING = -1
+    AUTO = 'auto'
+    NORMAL = 'normal'
+
+    # Rangos de los controles
+    MIN_SWEEP_TIME = 1e-4  # s por pantalla
+    MAX_SWEEP_TIME = 1.0
+    MIN_SIGNAL_FREQUENCY = 1.0  # Hz
+    MAX_SIGNAL_FREQUENCY = 10000.0
+    MAX_HOLDOFF = 0.1  # s
+
+    def __init__(self, sample_rate, buffer_seconds=0.1, auto_timeout=0.05):
+        self.sample_rate = sample_rate
+        self.ring = np.zeros(int(sample_rate * buffer_seconds))
+        # En modo auto, sin disparo durante este tiempo el barrido arranca solo
+        self.auto_timeout = auto_timeout
+        self.reset()
+
+    def reset(self):
+        """Restaura los controles predeterminados y reinicia el estado"""
+        self.sweep_time = 0.01  # s por pantalla
+        self.trigger_level = 0.0  # V
+        self.trigger_slope = self.RISING
+        self.trigger_mode = self.AUTO
+        self.holdoff = 0.0  # s
+        self.signal_frequency = 200.0  # Hz de la señal de entrada
+        self.clear()
+
+    def clear(self):
+        """Vacía el buffer y espera el siguiente disparo"""
+        self.ring[:] = 0.0
+        self.ring_head = 0
+        self.sample_index = 0  # índice global de la siguiente muestra de entrada
+        self.sweep_position = None  # muestras del barrido actual (None: esperando disparo)
+        self.armed_from = 0  # índice global desde el que puede dispararse (fin del holdoff)
+        self.status = 'esperando'
+
+    def sample_times(self, count):
+        """Instantes de las siguientes `count` muestras de entrada"""
+        return (self.sample_index + np.arange(count)) / self.sample_rate
+
+    def write_ring(self, samples):
+        """Copia un bloque en el buffer circular (en uno o dos tramos)"""
+        if len(samples) + 1 > len(self.ring):
+            # El buffer siempre debe contener el bloque más la muestra anterior
+            self.ring = np.resize(np.roll(self.ring, -self.ring_head), 2 * (len(samples) + 1))
+            self.ring_head = 0
+        first = min(len(samples), len(self.ring) - self.ring_head)
+        self.ring[self.ring_head:self.ring_head + first] = samples[:first]
+        self.ring[:len(samples) - first] = samples[first:]
+        self.ring_head = (self.ring_head + len(samples)) % len(self.ring)
+
+    def recent(self, count):
+        """Las últimas `count` muestras del buffer, de la más antigua a la más nueva"""
+        return np.take(self.ring, np.arange(self.ring_head - count, self.ring_head), mode='wrap')
+
+    def find_crossings(self, count):
+        """Índices (dentro del último bloque de `count` muestras) donde la señal cruza el nivel"""
+        values = self.recent(count + 1)  # incluye la última muestra del bloque anterior
+        before, after = values[:-1], values[1:]
+        if self.trigger_slope == self.RISING:
+            hits = (before < self.trigger_level) & (after >= self.trigger_level)
+        else:
+            hits = (before > self.trigger_level) & (after <= self.trigger_level)
+        return np.flatnonzero(hits)
+
+    def process(self, signal):
+        """Recorre un bloque de la entrada y devuelve (rampa, índices) de las muestras visibles.
+
+        rampa va de 0 (izquierda) a 1 (derecha); entre barridos (espera del
+        disparo y holdoff) el haz está apagado y esas muestras no se devuelven.
+        """
+        count = len(signal)
+        start = self.sample_index
+        self.write_ring(signal)
+        crossings = self.find_crossings(count)
+
+        sweep_length = max(1.0, self.sweep_time * self.sample_rate)
+        holdoff_samples = int(math.ceil(self.holdoff * self.sample_rate))
+        auto_samples = int(self.auto_timeout * self.sample_rate)
+
+        ramps = []
+        indices = []
+        position = 0
+        started = False
+        while position < count:
+            if self.sweep_position is None:
+                # Primer cruce después del holdoff
+                first = max(position, self.armed_from - start)
+                found = np.searchsorted(crossings, first)
+                if found < len(crossings):
+                    position = int(crossings[found])
+                    self.status = 'disparado'
+                elif self.trigger_mode == self.AUTO and self.armed_from + auto_samples - start < count:
+                    # Sin disparo: el barrido corre libre
+                    position = max(first, self.armed_from + auto_samples - start)
+                    self.status = 'libre'
+                else:
+                    if not started:
+                        self.status = 'esperando'
+                    break
+                self.sweep_position = 0
+                started = True
+
+            span = min(count - position, int(math.ceil(sweep_length - self.sweep_position)))
+            ramps.append((self.sweep_position + np.arange(span)) / sweep_length)
+            indices.append(np.arange(position, position + span))
+            self.sweep_position += span
+            position += span
+            if self.sweep_position >= sweep_length:
+                # Fin del barrido: retorno con el haz apagado y holdoff
+                self.sweep_position = None
+                self.armed_from = start + position + holdoff_samples
+
+        self.sample_index += count
+        if not ramps:
+            return np.zeros(0), np.zeros(0, dtype=np.intp)
+        return np.concatenate(ramps), np.concatenate(indices)
+
+    def toggle_slope(self):
+        self.trigger_slope = -self.trigger_slope
+
+    def toggle_mode(self):
+        self.trigger_mode = self.NORMAL if self.trigger_mode == self.AUTO else self.AUTO
+
+    def describe_trigger(self):
+        """Texto del disparo para el panel de estado"""
+        slope = "sub." if self.trigger_slope == self.RISING else "baj."
+        return f"{self.trigger_level:.0f} V {slope} {self.trigger_mode} ({self.status})"
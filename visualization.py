@@ -1,369 +1,469 @@
+import os
 import pygame
 import math
+import numpy as np
+
+from cache import LRUCache
+from waveforms import WAVEFORM_LABELS
+from engine import Mode
 
 class Visualization:
+    # Niveles de brillo distintos que se guardan como sprites
+    GLOW_BRIGHTNESS_LEVELS = 16
+    # Fondo de las miniaturas del grid
+    THUMBNAIL_BACKGROUND = (20, 20, 25)
+    # Panel de estado: borde superior, alto de fila y filas como máximo (el recuadro alcanza para todas)
+    STATUS_PANEL_TOP = 490
+    STATUS_ROW_HEIGHT = 18
+    STATUS_MAX_ROWS = 9
+    # Rectángulos de las vistas lateral y superior
+    LATERAL_VIEW_RECT = (400, 100, 300, 150)
+    SUPERIOR_VIEW_RECT = (800, 100, 300, 150)
+    # Escala de cada vista: cañón, placas, pantalla, separación dibujada de las placas
+    # y deflexión dibujada para el borde de la pantalla (direction: sentido de la deflexión)
+    LATERAL_VIEW = {
+        'rect': pygame.Rect(LATERAL_VIEW_RECT),
+        'gun_x': 420, 'plate_x0': 450, 'plate_x1': 530, 'screen_x': 680,
+        'center_y': 175, 'half_gap': 40, 'screen_half': 60, 'direction': -1
+    }
+    SUPERIOR_VIEW = {
+        'rect': pygame.Rect(SUPERIOR_VIEW_RECT),
+        'gun_x': 820, 'plate_x0': 910, 'plate_x1': 990, 'screen_x': 1080,
+        'center_y': 175, 'half_gap': 30, 'screen_half': 60, 'direction': 1
+    }
+    
     def __init__(self, crt_simulation):
         self.crt = crt_simulation
+        
+        # Caché de sprites de brillo: (color, nivel, radio, radio de brillo, aditivo)
+        self.glow_cache = LRUCache(128)
+        
+        # Superficie reutilizada para copiar la imagen del fósforo (y su copia escalada)
+        self.phosphor_surface = None
+        self.phosphor_scaled = None
+    
+    def draw_background(self, surface):
+        """Capa estática: fondo con gradiente sutil"""
+        surface.fill(self.crt.LIGHT_GRAY)
+        
+        # Gradiente de fondo: franjas blancas cuya opacidad disminuye hacia abajo
+        width, height = surface.get_size()
+        strip = pygame.Surface((width, 4), pygame.SRCALPHA)
+        for y in range(0, height, 4):
+            alpha = int(10 * (1 - y / height))
+            strip.fill((*self.crt.WHITE[:3], alpha))
+            surface.blit(strip, (0, y))
     
     def draw_glass_effect(self, surface, rect, alpha=30):
         """Dibuja un efecto de vidrio sobre un rectángulo"""
-        glass_surface = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        
-        # Gradiente de arriba hacia abajo
-        for i in range(rect.height):
-            alpha_val = int(alpha * (1 - i / rect.height))
-            color = (255, 255, 255, alpha_val)
-            pygame.draw.line(glass_surface, color, (0, i), (rect.width, i))
-        
-        surface.blit(glass_surface, rect.topleft)
+        # Gradiente de arriba hacia abajo (franja de 1 píxel estirada, en caché)
+        surface.blit(self.crt.primitives.glass(rect.size, alpha), rect.topleft)
     
-    def draw_crt_views(self):
-        """Dibuja las vistas lateral y superior del CRT con diseño moderno"""
+    def draw_view_frames(self, surface):
+        """Capa estática: marcos, placas y etiquetas de las vistas lateral y superior"""
+        layout = self.crt.layout
+        
         # Vista lateral
-        lateral_rect = pygame.Rect(400, 100, 300, 150)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.WHITE, lateral_rect, 12)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.WHITE, lateral_rect, 12)
-        pygame.draw.rect(self.crt.screen, self.crt.DARK_GRAY, lateral_rect, 2, border_radius=12)
-    
+        lateral_rect = layout.rect(*self.LATERAL_VIEW_RECT)
+        self.crt.draw_rounded_rect(surface, self.crt.WHITE, lateral_rect, 12)
+        pygame.draw.rect(surface, self.crt.DARK_GRAY, lateral_rect, layout.length(2), border_radius=layout.length(12))
         
         # Placas verticales en vista lateral
-        plate_top = pygame.Rect(450, 120, 80, 10)
-        plate_bottom = pygame.Rect(450, 210, 80, 10)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.PRIMARY_BLUE, plate_top, 3)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.DANGER_RED, plate_bottom, 3)
-        
-        # Trayectoria del electrón en vista lateral
-        if self.crt.current_mode.value == "Manual":
-            y_offset = (self.crt.vertical_voltage / self.crt.max_deflection_voltage) * 40
-        else:
-            y_offset = 20 * math.sin(2 * math.pi * self.crt.freq_vertical * self.crt.time)
-        
-        start_pos = (420, 175)
-        end_pos = (680, 175 - y_offset)
-        
-        # Línea con gradiente
-        self.draw_gradient_line(start_pos, end_pos, self.crt.SUCCESS_GREEN, self.crt.ELECTRON_YELLOW, 4)
-        
-        # Punto del electrón con brillo
-        self.draw_glowing_circle(end_pos, self.crt.ELECTRON_YELLOW, 5, 15)
+        self.draw_view_plates(surface, self.LATERAL_VIEW)
         
         # Label
-        label = self.crt.font_medium.render("Vista Lateral", True, self.crt.DARK_GRAY)
-        self.crt.screen.blit(label, (lateral_rect.x + 15, lateral_rect.y - 28))
+        x, y = self.LATERAL_VIEW_RECT[:2]
+        label = self.crt.text_cache.render(self.crt.font_medium, "Vista Lateral", True, self.crt.DARK_GRAY)
+        surface.blit(label, layout.point(x + 15, y - 28))
         
         # Vista superior
-        superior_rect = pygame.Rect(800, 100, 300, 150)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.WHITE, superior_rect, 12)
-        pygame.draw.rect(self.crt.screen, self.crt.DARK_GRAY, superior_rect, 2, border_radius=12)
-        
+        superior_rect = layout.rect(*self.SUPERIOR_VIEW_RECT)
+        self.crt.draw_rounded_rect(surface, self.crt.WHITE, superior_rect, 12)
+        pygame.draw.rect(surface, self.crt.DARK_GRAY, superior_rect, layout.length(2), border_radius=layout.length(12))
         
         # Placas horizontales en vista superior
-        center_y = superior_rect.centery
-        plate_width = 80
+        self.draw_view_plates(surface, self.SUPERIOR_VIEW)
+        
+        # Label
+        x, y = self.SUPERIOR_VIEW_RECT[:2]
+        label = self.crt.text_cache.render(self.crt.font_medium, "Vista Superior", True, self.crt.DARK_GRAY)
+        surface.blit(label, layout.point(x + 15, y - 28))
+    
+    def draw_view_plates(self, surface, view):
+        """Dibuja el par de placas de una vista, separadas según su escala"""
+        plate_width = view['plate_x1'] - view['plate_x0']
+        plate_top = self.crt.layout.rect(view['plate_x0'], view['center_y'] - view['half_gap'] - 10, plate_width, 10)
+        plate_bottom = self.crt.layout.rect(view['plate_x0'], view['center_y'] + view['half_gap'], plate_width, 10)
+        self.crt.draw_rounded_rect(surface, self.crt.PRIMARY_BLUE, plate_top, 3)
+        self.crt.draw_rounded_rect(surface, self.crt.DANGER_RED, plate_bottom, 3)
+    
+    def draw_crt_views(self):
+        """Dibuja las trayectorias del haz en las vistas lateral y superior"""
+        # Tiempo interpolado entre los dos últimos pasos del motor
+        render_time = self.crt.engine.interpolated_time(self.crt.render_alpha)
+        horizontal_voltage, vertical_voltage = self.crt.calculos.deflection_voltages(render_time)
+        
+        # Vista lateral: placas verticales; vista superior: placas horizontales
+        self.draw_view_beam('lateral_view', self.LATERAL_VIEW, self.crt.optics.vertical_plates,
+                            float(vertical_voltage))
+        self.draw_view_beam('superior_view', self.SUPERIOR_VIEW, self.crt.optics.horizontal_plates,
+                            float(horizontal_voltage))
+    
+    def view_beam_path(self, view, plates, voltage):
+        """Trayectoria del haz en la vista (coordenadas de diseño), calculada por la óptica del tubo.
 
-        plate_top = pygame.Rect(superior_rect.centerx - plate_width // 2, center_y - 40, plate_width, 10)
-        plate_bottom = pygame.Rect(superior_rect.centerx - plate_width // 2, center_y + 30, plate_width, 10)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.PRIMARY_BLUE, plate_top, 3)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.DANGER_RED, plate_bottom, 3)
-        
-        # Trayectoria del electrón en vista superior
-        if self.crt.current_mode.value == "Manual":
-            x_offset = (self.crt.horizontal_voltage / self.crt.max_deflection_voltage) * 40
-        else:
-            x_offset = 20 * math.sin(2 * math.pi * self.crt.freq_horizontal * self.crt.time)
+        Dentro de las placas es la parábola real (escalada a la separación dibujada);
+        después sigue en línea recta hasta el punto de impacto en la pantalla.
+        """
+        acceleration_voltage = self.crt.acceleration_voltage
+        z, offsets, reaches_exit = plates.path(voltage, acceleration_voltage)
+        
+        direction = view['direction']
+        center_y = view['center_y']
+        plate_scale = view['half_gap'] / (plates.plate_gap / 2)
+        plate_span = view['plate_x1'] - view['plate_x0']
+        
+        points = [(view['gun_x'], center_y)]
+        for z_value, offset in zip(z.tolist(), offsets.tolist()):
+            points.append((int(view['plate_x0'] + z_value / plates.plate_length * plate_span),
+                           int(center_y + direction * offset * plate_scale)))
+        
+        if reaches_exit:
+            # Deflexión en la pantalla, limitada al alto de la vista
+            screen_offset = plates.sensitivity(acceleration_voltage) * voltage
+            screen_px = screen_offset / self.crt.optics.screen_half_width * view['screen_half']
+            screen_px = max(-view['screen_half'] - 8, min(view['screen_half'] + 8, screen_px))
+            points.append((view['screen_x'], int(center_y + direction * screen_px)))
+        return points
+    
+    def draw_view_beam(self, key, view, plates, voltage):
+        """Dibuja la trayectoria del haz en una vista (solo si cambió)"""
+        points = self.view_beam_path(view, plates, voltage)
+        if not self.crt.damage.begin_region(key, view['rect'], tuple(points)):
+            return
+        
+        layout = self.crt.layout
+        points = [layout.point(x, y) for x, y in points]
         
-        start_pos = (820, center_y)
-        end_pos = (1080, center_y + x_offset)
+        # El brillo no debe salirse del recuadro de la vista
+        self.crt.screen.set_clip(layout.rect(*view['rect']))
         
         # Línea con gradiente
-        self.draw_gradient_line(start_pos, end_pos, self.crt.SUCCESS_GREEN, self.crt.ELECTRON_YELLOW, 4)
+        self.draw_gradient_path(points, self.crt.SUCCESS_GREEN, self.crt.ELECTRON_YELLOW, layout.length(4))
         
-        # Punto del electrón con brillo
-        self.draw_glowing_circle(end_pos, self.crt.ELECTRON_YELLOW, 5, 15)
+        # Punto del electrón con brillo (en la pantalla o donde choca con la placa)
+        self.draw_glowing_circle(points[-1], self.crt.ELECTRON_YELLOW, 5, 15)
         
-        # Label
-        label = self.crt.font_medium.render("Vista Superior", True, self.crt.DARK_GRAY)
-        self.crt.screen.blit(label, (superior_rect.x + 15, superior_rect.y - 28))
+        self.crt.screen.set_clip(None)
     
-    def draw_gradient_line(self, start_pos, end_pos, start_color, end_color, width):
-        """Dibuja una línea con gradiente de color"""
+    def draw_gradient_path(self, points, start_color, end_color, width):
+        """Dibuja una polilínea con un gradiente de color a lo largo de toda su longitud"""
+        lengths = [math.dist(a, b) for a, b in zip(points, points[1:])]
+        total = sum(lengths)
+        if total == 0:
+            return
+        
+        # Una sola franja para todo el recorrido; cada segmento usa su tramo
+        strip = self.crt.primitives.gradient_strip(math.ceil(total), start_color, end_color, vertical=False)
+        travelled = 0.0
+        for (segment_start, segment_end), length in zip(zip(points, points[1:]), lengths):
+            start = min(int(travelled), strip.get_width() - 1)
+            span = max(1, min(round(length), strip.get_width() - start))
+            self.draw_strip_segment(strip.subsurface((start, 0, span, 1)), segment_start, segment_end, width)
+            travelled += length
+        
+        # Uniones redondeadas entre segmentos
+        travelled = 0.0
+        for point, length in zip(points[1:-1], lengths):
+            travelled += length
+            t = travelled / total
+            color = tuple(int(a * (1 - t) + b * t) for a, b in zip(start_color, end_color))
+            pygame.draw.circle(self.crt.screen, color, point, width // 2)
+    
+    def draw_strip_segment(self, strip, start_pos, end_pos, width):
+        """Estira una franja de gradiente horizontal sobre el segmento: un escalado y una rotación"""
         dx = end_pos[0] - start_pos[0]
         dy = end_pos[1] - start_pos[1]
-        distance = math.sqrt(dx*dx + dy*dy)
-        
-        if distance == 0:
+        length = math.hypot(dx, dy)
+        if length == 0:
             return
-        
-        segments = int(distance // 2) + 1
-        for i in range(segments):
-            t = i / max(segments - 1, 1)
-            
-            # Interpolación de color
-            r = int(start_color[0] * (1 - t) + end_color[0] * t)
-            g = int(start_color[1] * (1 - t) + end_color[1] * t)
-            b = int(start_color[2] * (1 - t) + end_color[2] * t)
-            
-            # Posición actual
-            x = int(start_pos[0] + dx * t)
-            y = int(start_pos[1] + dy * t)
-            
-            # Siguiente posición
-            next_t = min(1.0, (i + 1) / max(segments - 1, 1))
-            next_x = int(start_pos[0] + dx * next_t)
-            next_y = int(start_pos[1] + dy * next_t)
-            
-            pygame.draw.line(self.crt.screen, (r, g, b), (x, y), (next_x, next_y), width)
+        bar = pygame.transform.scale(strip, (max(1, round(length)), width))
+        bar = pygame.transform.rotate(bar, -math.degrees(math.atan2(dy, dx)))
+        center = ((start_pos[0] + end_pos[0]) / 2, (start_pos[1] + end_pos[1]) / 2)
+        self.crt.screen.blit(bar, bar.get_rect(center=center))
+    
+    def draw_glowing_circle(self, pos, color, radius, glow_radius, brightness=255, additive=False):
+        """Dibuja un círculo con efecto de brillo usando sprites precalculados.
+
+        pos está en píxeles del destino; los radios, en unidades de diseño.
+        """
+        radius = self.crt.layout.length(radius)
+        glow_radius = self.crt.layout.length(glow_radius)
+        sprite = self.get_glow_sprite(color, brightness, radius, glow_radius, additive)
+        top_left = (pos[0] - glow_radius, pos[1] - glow_radius)
+        
+        if additive:
+            # Mezcla aditiva: los puntos superpuestos suman su luz como en el fósforo
+            self.crt.screen.blit(sprite, top_left, special_flags=pygame.BLEND_RGB_ADD)
+        else:
+            self.crt.screen.blit(sprite, top_left)
+    
+    def get_glow_sprite(self, color, brightness, radius, glow_radius, additive):
+        """Obtiene (o genera una sola vez) el sprite de brillo para estos parámetros"""
+        # El brillo se agrupa en niveles para que la caché no crezca con cada valor
+        bucket = min(brightness, 255) * self.GLOW_BRIGHTNESS_LEVELS // 256
+        key = (tuple(color[:3]), bucket, radius, glow_radius, additive)
+        
+        sprite = self.glow_cache.get(key)
+        if sprite is None:
+            level = (bucket + 1) / self.GLOW_BRIGHTNESS_LEVELS
+            scaled_color = tuple(int(c * level) for c in color[:3])
+            sprite = self.render_glow_sprite(scaled_color, radius, glow_radius, additive)
+            self.glow_cache.put(key, sprite)
+        return sprite
     
-    def draw_glowing_circle(self, pos, color, radius, glow_radius):
-        """Dibuja un círculo con efecto de brillo"""
-        # Dibujar múltiples círculos con alpha decreciente para simular brillo
+    def render_glow_sprite(self, color, radius, glow_radius, additive):
+        """Rasteriza el brillo: círculos concéntricos con alpha decreciente hacia afuera"""
+        size = glow_radius * 2
+        
+        # Distancia de cada píxel al centro del sprite
+        coords = np.arange(size) - glow_radius + 0.5
+        distance = np.sqrt(coords[:, None] ** 2 + coords[None, :] ** 2)
+        
+        # Opacidad resultante de apilar los círculos (radio i, alpha 100 * (1 - i/glow))
+        transparency = np.ones((size, size))
         for i in range(glow_radius, 0, -2):
-            alpha = max(0, int(100 * (1 - i / glow_radius)))
-            glow_color = (*color[:3], alpha)
-            
-            glow_surface = pygame.Surface((i * 2, i * 2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surface, glow_color, (i, i), i)
-            self.crt.screen.blit(glow_surface, (pos[0] - i, pos[1] - i))
+            alpha = max(0, int(100 * (1 - i / glow_radius))) / 255
+            transparency[distance <= i] *= 1 - alpha
+        coverage = 1 - transparency
+        
+        if additive:
+            # Color premultiplicado sobre negro para sumarse con BLEND_RGB_ADD
+            sprite = pygame.Surface((size, size))
+            pixels = np.empty((size, size, 3), dtype=np.uint8)
+            for channel in range(3):
+                pixels[:, :, channel] = (coverage * color[channel]).astype(np.uint8)
+            pygame.surfarray.blit_array(sprite, pixels)
+        else:
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            sprite.fill((*color[:3], 255))
+            sprite_alpha = pygame.surfarray.pixels_alpha(sprite)
+            sprite_alpha[:, :] = (coverage * 255).astype(np.uint8)
+            del sprite_alpha  # Liberar el bloqueo de la superficie
         
         # Círculo principal
-        pygame.draw.circle(self.crt.screen, color, pos, radius)
-        pygame.draw.circle(self.crt.screen, self.crt.WHITE, pos, radius // 2)
+        center = (glow_radius, glow_radius)
+        pygame.draw.circle(sprite, color, center, radius)
+        pygame.draw.circle(sprite, self.crt.WHITE, center, radius // 2)
+        return sprite
     
-    def draw_crt_screen(self):
-        """Dibuja la pantalla del CRT con efectos modernos"""
+    def draw_crt_bezel(self, surface):
+        """Capa estática: bisel, fondo y retícula de la pantalla del CRT"""
+        layout = self.crt.layout
+        x, y, size = self.crt.crt_screen_x, self.crt.crt_screen_y, self.crt.crt_screen_size
         
-        if self.crt.paused:
-            # Dibujar overlay semi-transparente de pausa
-            pause_overlay = pygame.Surface((self.crt.crt_screen_size, self.crt.crt_screen_size), pygame.SRCALPHA)
-            pause_overlay.fill((0, 0, 0, 100))  # Negro semi-transparente
-            self.crt.screen.blit(pause_overlay, (self.crt.crt_screen_x, self.crt.crt_screen_y))
-            
-            # Texto de pausa
-            pause_text = self.crt.font_large.render("PAUSADO", True, self.crt.WHITE)
-            text_rect = pause_text.get_rect(center=(self.crt.crt_screen_x + self.crt.crt_screen_size//2, 
-                                                self.crt.crt_screen_y + self.crt.crt_screen_size//2))
-            self.crt.screen.blit(pause_text, text_rect)
-            
         # Pantalla principal
-        crt_rect = pygame.Rect(self.crt.crt_screen_x, self.crt.crt_screen_y, 
-                              self.crt.crt_screen_size, self.crt.crt_screen_size)
-        
-        # Fondo de la pantalla CRT
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.BLACK, crt_rect, 15)
+        crt_rect = layout.rect(x, y, size, size)
         
         # Borde exterior
-        border_rect = pygame.Rect(crt_rect.x - 8, crt_rect.y - 8, 
-                                 crt_rect.width + 16, crt_rect.height + 16)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.DARK_GRAY, border_rect, 20)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.BLACK, crt_rect, 15)
+        border_rect = layout.rect(x - 8, y - 8, size + 16, size + 16)
+        self.crt.draw_rounded_rect(surface, self.crt.DARK_GRAY, border_rect, 20)
+        
+        # Fondo de la pantalla CRT
+        self.crt.draw_rounded_rect(surface, self.crt.BLACK, crt_rect, 15)
         
         # Grid en la pantalla
         grid_color = (20, 40, 20)
-        for i in range(10, self.crt.crt_screen_size, 20):
-            pygame.draw.line(self.crt.screen, grid_color, 
-                           (crt_rect.x + i, crt_rect.y), 
-                           (crt_rect.x + i, crt_rect.y + self.crt.crt_screen_size), 1)
-            pygame.draw.line(self.crt.screen, grid_color, 
-                           (crt_rect.x, crt_rect.y + i), 
-                           (crt_rect.x + self.crt.crt_screen_size, crt_rect.y + i), 1)
-        
-        # Puntos del electrón con fade y brillo
-        current_time = pygame.time.get_ticks() / 1000.0
-        for pos, timestamp in self.crt.electron_points:
-            if self.crt.paused:
-                # DURANTE PAUSA: Mostrar todos los puntos con alpha completo
-                alpha = 1.0  # ← Alpha máximo durante pausa
-            else:
-                # Durante ejecución: cálculo normal de persistencia
-                age = current_time - timestamp
-                alpha = max(0, 1 - (age / self.crt.persistence_time))
-            
-            if alpha > 0:
-                brightness = int(255 * alpha)
-                
-                # Efecto de brillo
-                if brightness > 50:
-                    self.draw_glowing_circle(pos, (brightness, brightness, 0), 2, 8)
-                else:
-                    pygame.draw.circle(self.crt.screen, (brightness, brightness, 0), pos, 1)
-                
+        for i in range(10, size, 20):
+            pygame.draw.line(surface, grid_color, layout.point(x + i, y), layout.point(x + i, y + size), 1)
+            pygame.draw.line(surface, grid_color, layout.point(x, y + i), layout.point(x + size, y + i), 1)
+        
         # Label 
         label_text = "Pantalla del CRT"
-        label = self.crt.font_medium.render(label_text, True, self.crt.DARK_GRAY)
-        self.crt.screen.blit(label, (self.crt.crt_screen_x + 10, self.crt.crt_screen_y - 30))
+        label = self.crt.text_cache.render(self.crt.font_medium, label_text, True, self.crt.DARK_GRAY)
+        surface.blit(label, layout.point(x + 10, y - 30))
     
-    def draw_grid(self):
-        """Dibuja el grid de proporciones de Lissajous con diseño moderno"""
-        if self.crt.current_mode.value != "Lissajous":
+    def draw_crt_screen(self):
+        """Dibuja la pantalla del CRT con efectos modernos"""
+        # Región de la pantalla incluyendo el bisel (el brillo puede salirse del borde)
+        crt_region = pygame.Rect(self.crt.crt_screen_x - 8, self.crt.crt_screen_y - 8, 
+                                self.crt.crt_screen_size + 16, self.crt.crt_screen_size + 16)
+        
+        # Mientras haya puntos vivos el fósforo cambia en cada frame
+        if self.crt.paused or len(self.crt.live_samples) == 0:
+            state = (self.crt.paused, self.crt.live_samples.appended, len(self.crt.live_samples),
+                     self.crt.phosphor_screen.phosphor_type)
+        else:
+            state = (self.crt.engine.clock, self.crt.render_alpha)
+        if not self.crt.damage.begin_region('crt_screen', crt_region, state):
             return
         
-        # Título 
-        title_text = "Ratios de Frecuencia"
-        title = self.crt.font_medium.render(title_text, True, self.crt.DARK_GRAY)
+        # La pantalla (y el fósforo del motor) está en coordenadas de diseño
+        screen_rect = pygame.Rect(self.crt.crt_screen_x, self.crt.crt_screen_y,
+                                  self.crt.crt_screen_size, self.crt.crt_screen_size)
+        target_rect = self.crt.layout.rect(*screen_rect)
         
-        self.crt.screen.blit(title, (950, 315))
-        
-        # Contenedor del grid con sombra
-        grid_container = pygame.Rect(950, 335, 245, 305)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.WHITE, grid_container, 12)
-        pygame.draw.rect(self.crt.screen, self.crt.MEDIUM_GRAY, grid_container, 2, border_radius=12)
-        
-        # Grid de ratios
-        for i, ratio in enumerate(self.crt.lissajous_ratios):
-            if i >= 20:  # 4x5 grid
-                break
-            
-            row = i // 4
-            col = i % 4
-            
-            x = 955 + col * 60
-            y = 340 + row * 60
-            
-            cell_rect = pygame.Rect(x, y, 55, 55)
-            
-            # Efecto hover
-            if i == self.crt.selected_ratio_index:
-                # Sombra para celda seleccionada
-                shadow_rect = cell_rect.copy()
-                shadow_rect.x += 2
-                shadow_rect.y += 2
-                self.crt.draw_rounded_rect(self.crt.screen, (0, 0, 0, 30), shadow_rect, 8)
-                
-                # Celda seleccionada con gradiente
-                self.crt.draw_rounded_rect(self.crt.screen, self.crt.PRIMARY_BLUE, cell_rect, 8)
-                self.draw_glass_effect(self.crt.screen, cell_rect, 40)
-                text_color = self.crt.WHITE
-            else:
-                # Celda normal
-                self.crt.draw_rounded_rect(self.crt.screen, self.crt.LIGHT_GRAY, cell_rect, 8)
-                text_color = self.crt.DARK_GRAY
-                
-                # Efecto
-                mouse_pos = pygame.mouse.get_pos()
-                if cell_rect.collidepoint(mouse_pos):
-                    hover_surface = pygame.Surface(cell_rect.size, pygame.SRCALPHA)
-                    hover_surface.fill((*self.crt.PRIMARY_BLUE[:3], 30))
-                    self.crt.screen.blit(hover_surface, cell_rect.topleft)
+        if self.crt.paused:
+            # Dibujar overlay semi-transparente de pausa
+            pause_overlay = pygame.Surface(target_rect.size, pygame.SRCALPHA)
+            pause_overlay.fill((0, 0, 0, 100))  # Negro semi-transparente
+            self.crt.screen.blit(pause_overlay, target_rect.topleft)
             
-            pygame.draw.rect(self.crt.screen, self.crt.DARK_GRAY, cell_rect, 1, border_radius=8)
+            # Texto de pausa
+            pause_text = self.crt.text_cache.render(self.crt.font_large, "PAUSADO", True, self.crt.WHITE)
+            text_rect = pause_text.get_rect(center=target_rect.center)
+            self.crt.screen.blit(pause_text, text_rect)
             
-            # Texto del ratio
-            ratio_text = f"{ratio[0]}:{ratio[1]}"
-            text_surface = self.crt.font_small.render(ratio_text, True, text_color)
-            text_rect = text_surface.get_rect(center=cell_rect.center)
-            self.crt.screen.blit(text_surface, text_rect)
+        # Imagen del fósforo: una sola copia por frame, sin importar cuántos puntos haya
+        rgb = self.crt.phosphor_screen.to_rgb()
+        if self.phosphor_surface is None or self.phosphor_surface.get_width() != rgb.shape[0]:
+            self.phosphor_surface = pygame.Surface(rgb.shape[:2])
+        pygame.surfarray.blit_array(self.phosphor_surface, rgb)
+        phosphor = self.phosphor_surface
+        if target_rect.size != phosphor.get_size():
+            # Render interno a otra escala: una copia escalada a una superficie reutilizada
+            if self.phosphor_scaled is None or self.phosphor_scaled.get_size() != target_rect.size:
+                self.phosphor_scaled = pygame.Surface(target_rect.size)
+            pygame.transform.smoothscale(phosphor, target_rect.size, self.phosphor_scaled)
+            phosphor = self.phosphor_scaled
+        self.crt.screen.blit(phosphor, target_rect.topleft, special_flags=pygame.BLEND_RGB_ADD)
+        
+        beam_pos = self.crt.engine.interpolated_beam(self.crt.render_alpha)
+        if beam_pos is not None and screen_rect.collidepoint(beam_pos):
+            self.draw_glowing_circle(self.crt.layout.point(*beam_pos), self.crt.phosphor_screen.phosphor.color, 2, 8, 255, additive=True)
+
+    def draw_grid(self):
+        """Dibuja el grid de proporciones de Lissajous (solo las celdas que cambiaron)"""
+        self.crt.slider_manager.ratio_grid.draw(self.crt)
     
-    def draw_control_panel(self):
-        """Dibuja el panel de control """
+    def draw_panel_chrome(self, surface):
+        """Capa estática: marco y título del panel de control y caja de estado"""
+        layout = self.crt.layout
+        
         # Fondo del panel
-        control_panel_rect = pygame.Rect(20, 10, self.crt.control_panel_width, 680)
+        control_panel_rect = layout.rect(20, 10, self.crt.control_panel_width, 695, 'panel')
         
         # Panel principal 
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.WHITE, control_panel_rect, 15)
-        pygame.draw.rect(self.crt.screen, self.crt.DARK_GRAY, control_panel_rect, 2, border_radius=15)
-        
+        self.crt.draw_rounded_rect(surface, self.crt.WHITE, control_panel_rect, 15)
+        pygame.draw.rect(surface, self.crt.DARK_GRAY, control_panel_rect, layout.length(2),
+                         border_radius=layout.length(15))
         
         # Título
-        title_rect = pygame.Rect(30, 25, self.crt.control_panel_width - 20, 50)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.PRIMARY_BLUE, title_rect, 10)
-        self.draw_glass_effect(self.crt.screen, title_rect, 50)
+        title_rect = layout.rect(30, 25, self.crt.control_panel_width - 20, 50, 'panel')
+        self.crt.draw_rounded_rect(surface, self.crt.PRIMARY_BLUE, title_rect, 10)
+        self.draw_glass_effect(surface, title_rect, 50)
         
-        title = self.crt.font_title.render("CONTROLES CRT", True, self.crt.WHITE)
+        title = self.crt.text_cache.render(self.crt.font_title, "CONTROLES CRT", True, self.crt.WHITE)
         title_text_rect = title.get_rect(center=title_rect.center)
-        self.crt.screen.blit(title, title_text_rect)
-        
-        # Sliders
-        self.crt.slider_manager.draw_slider(self.crt.slider_manager.acceleration_slider, True)
-        self.crt.slider_manager.draw_slider(self.crt.slider_manager.vertical_slider, self.crt.current_mode.value == "Manual")
-        self.crt.slider_manager.draw_slider(self.crt.slider_manager.horizontal_slider, self.crt.current_mode.value == "Manual")
-        self.crt.slider_manager.draw_slider(self.crt.slider_manager.persistence_slider, True)
-        self.crt.slider_manager.draw_slider(self.crt.slider_manager.freq_vertical_slider, self.crt.current_mode.value == "Lissajous")
-        self.crt.slider_manager.draw_slider(self.crt.slider_manager.freq_horizontal_slider, self.crt.current_mode.value == "Lissajous")
-        
-        # Botones de modo
-        manual_active = self.crt.current_mode.value == "Manual"
-        lissajous_active = self.crt.current_mode.value == "Lissajous"
-        
-        # Botón Manual
-        if manual_active:
-            self.crt.draw_rounded_rect(self.crt.screen, self.crt.SUCCESS_GREEN, self.crt.slider_manager.manual_button, 10)
-        else:
-            self.crt.draw_rounded_rect(self.crt.screen, self.crt.LIGHT_GRAY, self.crt.slider_manager.manual_button, 10)
-        
-        pygame.draw.rect(self.crt.screen, self.crt.DARK_GRAY, self.crt.slider_manager.manual_button, 2, border_radius=10)
-        
-        # Botón Lissajous
-        if lissajous_active:
-            self.crt.draw_rounded_rect(self.crt.screen, self.crt.WARNING_ORANGE, self.crt.slider_manager.lissajous_button, 10)
-        else:
-            self.crt.draw_rounded_rect(self.crt.screen, self.crt.LIGHT_GRAY, self.crt.slider_manager.lissajous_button, 10)
-        
-        pygame.draw.rect(self.crt.screen, self.crt.DARK_GRAY, self.crt.slider_manager.lissajous_button, 2, border_radius=10)
-        
-        # Botón reset 
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.DANGER_RED, self.crt.slider_manager.reset_button, 8)
-        pygame.draw.rect(self.crt.screen, self.crt.DARK_GRAY, self.crt.slider_manager.reset_button, 2, border_radius=6)
+        surface.blit(title, title_text_rect)
         
-        # Texto de botones 
-        manual_text_color = self.crt.WHITE if manual_active else self.crt.DARK_GRAY
-        lissajous_text_color = self.crt.WHITE if lissajous_active else self.crt.DARK_GRAY
-        
-        manual_text = self.crt.font_medium.render("Modo Manual", True, manual_text_color)
-        manual_rect = manual_text.get_rect(center=self.crt.slider_manager.manual_button.center)
-        self.crt.screen.blit(manual_text, manual_rect)
-        
-        lissajous_text = self.crt.font_small.render("Modo Lissajous", True, lissajous_text_color)
-        lissajous_rect = lissajous_text.get_rect(center=self.crt.slider_manager.lissajous_button.center)
-        self.crt.screen.blit(lissajous_text, lissajous_rect)
-        
-        reset_text = self.crt.font_small.render("Reset", True, self.crt.WHITE)
-        reset_rect = reset_text.get_rect(center=self.crt.slider_manager.reset_button.center)
-        self.crt.screen.blit(reset_text, reset_rect)
-        
-        # Panel de estado 
-        y_offset = 500
-        state_panel = pygame.Rect(30, y_offset, self.crt.control_panel_width - 20, 180)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.LIGHT_GRAY, state_panel, 12)
-        pygame.draw.rect(self.crt.screen, self.crt.MEDIUM_GRAY, state_panel, 1, border_radius=12)
+        # Panel de estado: encabezado más STATUS_MAX_ROWS filas
+        y_offset = self.STATUS_PANEL_TOP
+        state_panel = layout.rect(30, y_offset, self.crt.control_panel_width - 20,
+                                  48 + self.STATUS_MAX_ROWS * self.STATUS_ROW_HEIGHT, 'panel')
+        self.crt.draw_rounded_rect(surface, self.crt.LIGHT_GRAY, state_panel, 12)
+        pygame.draw.rect(surface, self.crt.MEDIUM_GRAY, state_panel, 1, border_radius=layout.length(12))
         
         # Título del estado
-        state_title_rect = pygame.Rect(40, y_offset + 10, 100, 25)
-        self.crt.draw_rounded_rect(self.crt.screen, self.crt.SECONDARY_BLUE, state_title_rect, 6)
-        state_title = self.crt.font_medium.render("ESTADO", True, self.crt.WHITE)
+        state_title_rect = layout.rect(40, y_offset + 10, 100, 25, 'panel')
+        self.crt.draw_rounded_rect(surface, self.crt.SECONDARY_BLUE, state_title_rect, 6)
+        state_title = self.crt.text_cache.render(self.crt.font_medium, "ESTADO", True, self.crt.WHITE)
         state_title_text_rect = state_title.get_rect(center=state_title_rect.center)
-        self.crt.screen.blit(state_title, state_title_text_rect)
+        surface.blit(state_title, state_title_text_rect)
+    
+    def draw_control_panel(self):
+        """Dibuja el panel de control """
+        # Sliders y botones: cada widget se copia solo si cambió su valor, estado o hover
+        self.crt.slider_manager.draw()
+        
+        self.draw_status_values()
+    
+    def draw_status_values(self):
+        """Dibuja los valores del panel de estado"""
+        # Panel de estado 
+        y_offset = self.STATUS_PANEL_TOP
         
         # Estado de pausa
         pause_y = y_offset + 15
         pause_text = f"PAUSA: {'ACTIVADA' if self.crt.paused else 'DESACTIVADA'}"
-        pause_surface = self.crt.font_small.render(pause_text, True, 
-                                                self.crt.DANGER_RED if self.crt.paused else self.crt.SUCCESS_GREEN)
-        self.crt.screen.blit(pause_surface, (170, pause_y))
+        player = self.crt.player
+        if player is not None and not self.crt.paused:
+            # Posición y velocidad de la reproducción
+            elapsed = player.playback_time - player.start_time
+            pause_text = f"REPR. {elapsed:.1f}/{player.duration:.1f} s x{player.speed:g}"
         
         # Valores actuales con iconos de colores
+        if self.crt.current_mode == Mode.LISSAJOUS:
+            # Forma de onda y frecuencia de cada canal (teclas V y H cambian la forma)
+            channels = self.crt.engine.channels
+            vertical_text = f"{WAVEFORM_LABELS[channels['vertical'].shape]} {self.crt.freq_vertical:.1f} Hz"
+            horizontal_text = f"{WAVEFORM_LABELS[channels['horizontal'].shape]} {self.crt.freq_horizontal:.1f} Hz"
+        elif self.crt.current_mode == Mode.AUDIO_XY:
+            # Voltajes de la última muestra de audio (derecha: vertical, izquierda: horizontal)
+            horizontal, vertical = self.crt.calculos.deflection_voltages()
+            vertical_text = f"{vertical:.0f} V (der.)"
+            horizontal_text = f"{horizontal:.0f} V (izq.)"
+        elif self.crt.current_mode == Mode.TIME_BASE:
+            # Señal de entrada (tecla V) y barrido de la base de tiempo
+            timebase = self.crt.timebase
+            vertical_text = f"{WAVEFORM_LABELS[self.crt.engine.channels['vertical'].shape]} {timebase.signal_frequency:.0f} Hz"
+            horizontal_text = f"barrido {timebase.sweep_time * 1000:.2f} ms"
+        else:
+            vertical_text = f"{self.crt.vertical_voltage:.1f} V"
+            horizontal_text = f"{self.crt.horizontal_voltage:.1f} V"
+        
         values = [
             ("Aceleración", f"{self.crt.acceleration_voltage:.0f} V", self.crt.PRIMARY_BLUE),
-            ("Vertical", f"{self.crt.vertical_voltage:.1f} V", self.crt.SUCCESS_GREEN),
-            ("Horizontal", f"{self.crt.horizontal_voltage:.1f} V", self.crt.DANGER_RED),
-            ("Persistencia", f"{self.crt.persistence_time:.1f} s", self.crt.GRAY)
+            ("Vertical", vertical_text, self.crt.SUCCESS_GREEN),
+            ("Horizontal", horizontal_text, self.crt.DANGER_RED),
+            ("Persistencia", f"{self.crt.persistence_time:.1f} s", self.crt.GRAY),
+            # Tipo de fósforo (tecla P)
+            ("Fósforo", self.crt.phosphor_screen.phosphor.label, self.crt.phosphor_screen.phosphor.color)
         ]
         
-        if self.crt.current_mode.value == "Lissajous":
-            values.extend([
-                ("Freq V", f"{self.crt.freq_vertical:.1f} Hz", self.crt.WARNING_ORANGE),
-                ("Freq H", f"{self.crt.freq_horizontal:.1f} Hz", self.crt.WARNING_ORANGE)
-            ])
+        # Haz puntual o conjunto de electrones (tecla E)
+        if self.crt.ensemble_enabled:
+            beam_text = f"{self.crt.engine.ensemble.size} e-/paso"
+        else:
+            beam_text = "Puntual"
+        values.append(("Haz", beam_text, self.crt.ELECTRON_YELLOW))
+        
+        # Archivo de audio y posición de la reproducción en el modo XY
+        source = self.crt.audio_source
+        if self.crt.current_mode == Mode.AUDIO_XY and source is not None:
+            audio_text = f"{os.path.basename(source.path)} {source.position:.1f} s"
+            values.append(("Audio", audio_text, self.crt.PRIMARY_BLUE))
+        
+        # Disparo de la base de tiempo (T: pendiente, A: auto/normal)
+        if self.crt.current_mode == Mode.TIME_BASE:
+            values.append(("Disparo", self.crt.timebase.describe_trigger(), self.crt.DANGER_RED))
+        
+        # Ritmo de frames actual
+        values.append(("Ritmo", self.crt.pacer.describe(), self.crt.MEDIUM_GRAY))
+        
+        # Solo se redibuja si cambió algún texto mostrado
+        status_region = pygame.Rect(40, y_offset + 10, self.crt.control_panel_width - 40,
+                                    30 + self.STATUS_MAX_ROWS * self.STATUS_ROW_HEIGHT)
+        if not self.crt.damage.begin_region('status', status_region, (pause_text, tuple(values)), group='panel'):
+            return
+        
+        layout = self.crt.layout
+        
+        pause_surface = self.crt.text_cache.render(self.crt.font_small, pause_text, True, 
+                                                self.crt.DANGER_RED if self.crt.paused else self.crt.SUCCESS_GREEN)
+        self.crt.screen.blit(pause_surface, layout.point(170, pause_y, 'panel'))
         
+        # Filas de alto fijo: el recuadro de estado tiene lugar para STATUS_MAX_ROWS
         for i, (label, value, color) in enumerate(values):
-            value_y = y_offset + 45 + i * 22
+            value_y = y_offset + 40 + i * self.STATUS_ROW_HEIGHT
             
             # Indicador de color
-            color_indicator = pygame.Rect(45, value_y + 3, 8, 12)
+            color_indicator = layout.rect(45, value_y + 3, 8, 12, 'panel')
             self.crt.draw_rounded_rect(self.crt.screen, color, color_indicator, 2)
             
             # Texto del valor
-            label_text = self.crt.font_tiny.render(f"{label}:", True, self.crt.GRAY)
-            value_text = self.crt.font_small.render(value, True, self.crt.DARK_GRAY)
+            label_text = self.crt.text_cache.render(self.crt.font_tiny, f"{label}:", True, self.crt.GRAY)
+            value_text = self.crt.text_cache.render(self.crt.font_small, value, True, self.crt.DARK_GRAY)
             
-            self.crt.screen.blit(label_text, (60, value_y))
-            self.crt.screen.blit(value_text, (150, value_y))
\ No newline at end of file
+            self.crt.screen.blit(label_text, layout.point(60, value_y, 'panel'))
+            self.crt.screen.blit(value_text, layout.point(150, value_y, 'panel'))
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import wave
+import numpy as np
+
+# Muestras por periodo de cada tabla
+TABLE_SIZE = 4096
+
+# Nombres que se muestran en la interfaz
+WAVEFORM_LABELS = {
+    'sine': "seno",
+    'square': "cuadrada",
+    'triangle': "triangular",
+    'sawtooth': "diente de sierra",
+    'noise': "ruido",
+}
+
+def _build_tables(seed=0):
+    """Tablas de un periodo (en [-1, 1]) de las formas de onda incluidas"""
+    cycles = np.arange(TABLE_SIZE) / TABLE_SIZE
+    return {
+        'sine': np.sin(2 * np.pi * cycles),
+        'square': np.where(cycles < 0.5, 1.0, -1.0),
+        'triangle': 1 - 4 * np.abs(((cycles + 0.25) % 1.0) - 0.5),
+        'sawtooth': 2 * ((cycles + 0.5) % 1.0) - 1,
+        'noise': np.random.default_rng(seed).uniform(-1, 1, TABLE_SIZE),
+    }
+
+class Wavetable:
+    """Un periodo muestreado de una forma de onda, leído con interpolación lineal"""
+    def __init__(self, samples):
+        samples = np.asarray(samples, dtype=np.float64)
+        # Copia del primer valor al final: la interpolación no necesita el módulo
+        self.table = np.append(samples, samples[0])
+        self.size = len(samples)
+
+    def lookup(self, cycles):
+        """Valor de la onda para fases en ciclos (arreglo de cualquier forma)"""
+        position = (np.asarray(cycles) % 1.0) * self.size
+        # Un módulo de un valor negativo muy chico da 1.0: el índice no pasa del último
+        # tramo (con fracción 1 cae en la copia del primer valor)
+        index = np.minimum(position.astype(np.intp), self.size - 1)
+        fraction = position - index
+        return self.table[index] * (1 - fraction) + self.table[index + 1] * fraction
+
+WAVETABLES = {name: Wavetable(samples) for name, samples in _build_tables().items()}
+# Formas de onda incluidas (las mismas en cualquier proceso)
+BUILTIN_WAVEFORMS = tuple(WAVETABLES)
+
+def load_wavetable(path, name=None):
+    """Registra una forma de onda muestreada desde un archivo (.wav, .npy o texto).
+
+    El archivo contiene un periodo; se remuestrea a TABLE_SIZE y se normaliza a [-1, 1].
+    Devuelve el nombre con el que quedó registrada.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".wav":
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("Solo se admiten WAV de 16 bits")
+            frames = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+            samples = frames.reshape(-1, wav.getnchannels())[:, 0].astype(np.float64)
+    elif extension == ".npy":
+        samples = np.load(path).astype(np.float64).ravel()
+    else:
+        samples = np.loadtxt(path, delimiter=",", ndmin=1).astype(np.float64).ravel()
+    if samples.size < 2:
+        raise ValueError(f"{path}: se necesitan al menos 2 muestras")
+
+    # Remuestrear un periodo a TABLE_SIZE puntos
+    positions = np.arange(TABLE_SIZE) / TABLE_SIZE * samples.size
+    resampled = np.interp(positions, np.arange(samples.size + 1), np.append(samples, samples[0]))
+
+    # Centrar y normalizar a [-1, 1]
+    resampled -= (resampled.max() + resampled.min()) / 2
+    peak = np.abs(resampled).max()
+    if peak > 0:
+        resampled /= peak
+
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    WAVETABLES[name] = Wavetable(resampled)
+    WAVEFORM_LABELS.setdefault(name, name)
+    return name
+
+class WaveformGenerator:
+    """Generador de un canal (una placa): forma de onda seleccionable por nombre"""
+    def __init__(self, shape='sine'):
+        self.shape = shape
+
+    @property
+    def wavetable(self):
+        return WAVETABLES[self.shape]
+
+    def next_shape(self):
+        """Pasa a la siguiente forma de onda registrada"""
+        names = list(WAVETABLES)
+        self.shape = names[(names.index(self.shape) + 1) % len(names)]
+
+    def block(self, times, frequency, phase=0.0):
+        """Valores en [-1, 1] para un arreglo de tiempos, en una sola operación vectorizada.
+
+        La fase acumulada es frequency * t (en ciclos) más el desfase en radianes.
+        """
+        cycles = frequency * np.asarray(times, dtype=np.float64) + phase / (2 * np.pi)
+        return self.wavetable.lookup(cycles)[()]
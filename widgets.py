@@ -0,0 +1,331 @@
+import pygame
+from engine import Mode
+
+# Widgets en modo retenido: cada uno guarda su superficie ya dibujada y solo la
+# vuelve a rasterizar cuando cambia su estado (valor, habilitado, hover) o la escala.
+# Las coordenadas son de diseño (layout.py); group es el anclaje de la interfaz.
+
+class SpatialIndex:
+    """Índice de cuadrícula uniforme para encontrar el widget bajo un punto"""
+    __slots__ = ('cell_size', 'buckets')
+
+    def __init__(self, widgets, cell_size=64):
+        self.cell_size = cell_size
+        self.buckets = {}
+        for widget in widgets:
+            rect = widget.hit_rect
+            for cell_x in range(rect.left // cell_size, (rect.right - 1) // cell_size + 1):
+                for cell_y in range(rect.top // cell_size, (rect.bottom - 1) // cell_size + 1):
+                    self.buckets.setdefault((cell_x, cell_y), []).append(widget)
+
+    def at(self, pos, accept=None):
+        """Widget que contiene el punto (o None); accept descarta widgets que no se muestran"""
+        bucket = self.buckets.get((pos[0] // self.cell_size, pos[1] // self.cell_size), ())
+        for widget in bucket:
+            if widget.hit_rect.collidepoint(pos) and (accept is None or accept(widget)):
+                return widget
+        return None
+
+class Widget:
+    """Base de los widgets: región dibujada, estado y superficie en caché"""
+    __slots__ = ('key', 'rect', 'group', 'hovered', 'surface', 'rendered_state')
+
+    def __init__(self, key, rect, group='panel'):
+        self.key = key
+        self.rect = pygame.Rect(rect)
+        self.group = group
+        self.hovered = False
+        self.surface = None
+        self.rendered_state = None
+
+    @property
+    def hit_rect(self):
+        return self.rect
+
+    @property
+    def region(self):
+        """Rectángulo que ocupa el dibujo (puede sobresalir del área de click)"""
+        return self.rect
+
+    def is_enabled(self, crt):
+        return True
+
+    def state(self, crt):
+        """Todo lo que cambia el aspecto del widget"""
+        return (self.is_enabled(crt), self.hovered)
+
+    def click(self, crt, pos):
+        pass
+
+    def local_rect(self, layout, origin, x, y, width, height):
+        """Rectángulo de diseño en píxeles relativos a la superficie del widget"""
+        return layout.rect(x, y, width, height, self.group).move(-origin[0], -origin[1])
+
+    def local_point(self, layout, origin, x, y):
+        point = layout.point(x, y, self.group)
+        return point[0] - origin[0], point[1] - origin[1]
+
+    def render(self, crt, surface, origin):
+        """Rasteriza el widget en su superficie (origin: esquina en píxeles del destino)"""
+        raise NotImplementedError
+
+    def draw(self, crt, force=False):
+        """Copia el widget en la pantalla si cambió; solo re-rasteriza si cambió su estado"""
+        state = self.state(crt)
+        if not crt.damage.begin_region(self.key, self.region, state, force=force, group=self.group):
+            return False
+
+        target = crt.layout.rect(*self.region, self.group)
+        background = crt.compositor.background
+        # La superficie parte del fondo estático: se copia opaca, igual que si se dibujara en pantalla
+        cache_key = (state, crt.layout.scale, id(background))
+        if self.surface is None or self.rendered_state != cache_key:
+            self.surface = pygame.Surface(target.size).convert()
+            self.surface.blit(background, (0, 0), target)
+            self.render(crt, self.surface, target.topleft)
+            self.rendered_state = cache_key
+        crt.screen.blit(self.surface, target.topleft)
+        return True
+
+class Slider(Widget):
+    """Slider horizontal con etiqueta y valor; value va de 0 a 1"""
+    __slots__ = ('label', 'color', 'unit', 'value', 'modes', 'format_value')
+
+    def __init__(self, key, rect, label, color, unit, format_value, modes=None, value=0.0):
+        super().__init__(key, rect)
+        self.label = label
+        self.color = color
+        self.unit = unit
+        self.format_value = format_value  # función sin argumentos que devuelve el texto del valor
+        self.modes = modes  # modos en los que se puede mover (None: todos)
+        self.value = value
+
+    @property
+    def region(self):
+        # Etiqueta arriba y perilla que sobresale a los lados
+        return pygame.Rect(self.rect.x - 11, self.rect.y - 20, self.rect.width + 22, 40)
+
+    def is_enabled(self, crt):
+        return self.modes is None or crt.current_mode in self.modes
+
+    def state(self, crt):
+        # La etiqueta distingue sliders que comparten lugar (y región) en distintos modos
+        return (self.label, self.value, self.is_enabled(crt), crt.paused, self.hovered,
+                f"{self.format_value()} {self.unit}")
+
+    def click(self, crt, pos):
+        """Mueve el slider a la posición del mouse"""
+        self.value = max(0, min(1, (pos[0] - self.rect.x) / self.rect.width))
+        crt.slider_manager.update_values_from_sliders()
+
+    def render(self, crt, surface, origin):
+        layout = crt.layout
+        rect = self.rect
+        enabled = self.is_enabled(crt)
+        value_text = f"{self.format_value()} {self.unit}"
+
+        # Label con mejor tipografía
+        label_color = crt.DARK_GRAY if enabled else crt.GRAY
+        label_surface = crt.text_cache.render(crt.font_small, self.label, True, label_color)
+        surface.blit(label_surface, self.local_point(layout, origin, rect.x, rect.y - 20))
+
+        # Valor actual en el lado derecho
+        value_surface = crt.text_cache.render(crt.font_tiny, value_text, True, label_color)
+        value_rect = value_surface.get_rect()
+        value_rect.topright = self.local_point(layout, origin, rect.right, rect.y - 20)
+        surface.blit(value_surface, value_rect)
+
+        # Track del slider (centrado verticalmente)
+        track_rect = self.local_rect(layout, origin, rect.x, rect.y + 6, rect.width, 8)
+        track_bg_color = crt.MEDIUM_GRAY if enabled else crt.LIGHT_GRAY
+        crt.draw_rounded_rect(surface, track_bg_color, track_rect, 4)
+
+        if crt.paused:
+            enabled = False
+
+        # Track activo (parte llena) con un brillo sutil arriba
+        if enabled and self.value > 0:
+            active_rect = pygame.Rect(track_rect.x, track_rect.y, int(self.value * track_rect.width), track_rect.height)
+            crt.draw_rounded_rect(surface, self.color, active_rect, 4)
+
+            highlight_rect = pygame.Rect(active_rect.x, active_rect.y, active_rect.width, layout.length(2))
+            highlight_color = tuple(min(255, c + 40) for c in self.color)
+            crt.draw_rounded_rect(surface, highlight_color, highlight_rect, 2)
+
+        # Perilla (el anillo se engrosa con el hover)
+        if enabled:
+            handle_center = self.local_point(layout, origin, rect.x + self.value * rect.width,
+                                             rect.y + rect.height // 2)
+            ring = 4 if self.hovered else 3
+            pygame.draw.circle(surface, crt.WHITE, handle_center, layout.length(10))
+            pygame.draw.circle(surface, self.color, handle_center, layout.length(10), layout.length(ring))
+            pygame.draw.circle(surface, self.color, handle_center, layout.length(6))
+            pygame.draw.circle(surface, crt.WHITE, handle_center, layout.length(2))
+
+class Button(Widget):
+    """Botón con texto; los botones de modo se resaltan con su color cuando el modo está activo"""
+    __slots__ = ('label', 'font', 'color', 'radius', 'border_radius', 'mode', 'requires', 'on_click')
+
+    def __init__(self, key, rect, label, color, on_click, mode=None, font='font_small',
+                 radius=10, border_radius=None, requires=None):
+        super().__init__(key, rect)
+        self.label = label
+        self.font = font  # nombre de la fuente en CRTSimulation (cambia con la escala)
+        self.color = color
+        self.radius = radius
+        self.border_radius = radius if border_radius is None else border_radius
+        self.mode = mode  # None: botón de acción, siempre con su color
+        self.requires = requires  # atributo de CRTSimulation que debe existir para habilitarlo
+        self.on_click = on_click
+
+    def is_enabled(self, crt):
+        return self.requires is None or getattr(crt, self.requires) is not None
+
+    def is_active(self, crt):
+        return self.mode is None or crt.current_mode == self.mode
+
+    def state(self, crt):
+        return (self.is_active(crt), self.is_enabled(crt), self.hovered)
+
+    def click(self, crt, pos):
+        self.on_click()
+
+    def render(self, crt, surface, origin):
+        layout = crt.layout
+        rect = self.local_rect(layout, origin, *self.rect)
+        active = self.is_active(crt)
+        enabled = self.is_enabled(crt)
+
+        crt.draw_rounded_rect(surface, self.color if active else crt.LIGHT_GRAY, rect, self.radius)
+        if self.hovered and enabled and not active:
+            hover_surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+            hover_surface.fill((*crt.PRIMARY_BLUE[:3], 30))
+            surface.blit(hover_surface, rect.topleft)
+        pygame.draw.rect(surface, crt.DARK_GRAY, rect, layout.length(2), border_radius=layout.length(self.border_radius))
+
+        if active:
+            text_color = crt.WHITE
+        elif not enabled:
+            text_color = crt.MEDIUM_GRAY
+        else:
+            text_color = crt.DARK_GRAY
+        text = crt.text_cache.render(getattr(crt, self.font), self.label, True, text_color)
+        surface.blit(text, text.get_rect(center=rect.center))
+
+class RatioCell(Widget):
+    """Celda del grid de proporciones: miniatura de la figura y texto del ratio"""
+    __slots__ = ('index', 'thumbnail')
+
+    def __init__(self, index, rect):
+        super().__init__(('grid_cell', index), rect, group='grid')
+        self.index = index
+        self.thumbnail = None
+
+    @property
+    def region(self):
+        # La sombra de la celda seleccionada sobresale 2 px
+        return pygame.Rect(self.rect.x, self.rect.y, self.rect.width + 2, self.rect.height + 2)
+
+    def is_enabled(self, crt):
+        return crt.current_mode == Mode.LISSAJOUS and self.index < len(crt.lissajous_ratios)
+
+    def thumbnail_key(self, crt):
+        """Clave de la miniatura con la fase, las formas de onda, el voltaje y los colores actuales"""
+        ratio = crt.lissajous_ratios[self.index]
+        # Diferencia de fase de la figura, igual que en FigureCache
+        phase = crt.phase_vertical - ratio[1] * crt.phase_horizontal / ratio[0]
+        palette = (crt.phosphor_screen.phosphor.color, crt.visualization.THUMBNAIL_BACKGROUND)
+        shapes = (crt.engine.channels['horizontal'].shape, crt.engine.channels['vertical'].shape)
+        return crt.thumbnails.key(ratio, phase, palette, shapes, crt.acceleration_voltage)
+
+    def state(self, crt):
+        # self.thumbnail lo asigna RatioGrid.update_thumbnails (None mientras no esté lista)
+        ratio = crt.lissajous_ratios[self.index]
+        return (self.index == crt.selected_ratio_index, self.hovered, ratio,
+                id(self.thumbnail) if self.thumbnail else None)
+
+    def click(self, crt, pos):
+        crt.handle_grid_click(self.index)
+
+    def render(self, crt, surface, origin):
+        layout = crt.layout
+        selected = self.index == crt.selected_ratio_index
+        ratio = crt.lissajous_ratios[self.index]
+        surface.fill(crt.WHITE)  # interior del contenedor del grid
+        cell_rect = self.local_rect(layout, origin, *self.rect)
+
+        if selected:
+            # Sombra y celda seleccionada con efecto de vidrio
+            shadow_rect = self.local_rect(layout, origin, self.rect.x + 2, self.rect.y + 2, *self.rect.size)
+            crt.draw_rounded_rect(surface, (0, 0, 0, 30), shadow_rect, 8)
+            crt.draw_rounded_rect(surface, crt.PRIMARY_BLUE, cell_rect, 8)
+            crt.visualization.draw_glass_effect(surface, cell_rect, 40)
+            text_color = crt.WHITE
+        else:
+            crt.draw_rounded_rect(surface, crt.LIGHT_GRAY, cell_rect, 8)
+            text_color = crt.DARK_GRAY
+            if self.hovered:
+                hover_surface = pygame.Surface(cell_rect.size, pygame.SRCALPHA)
+                hover_surface.fill((*crt.PRIMARY_BLUE[:3], 30))
+                surface.blit(hover_surface, cell_rect.topleft)
+
+        pygame.draw.rect(surface, crt.DARK_GRAY, cell_rect, 1, border_radius=layout.length(8))
+
+        # Miniatura arriba (o un recuadro vacío mientras se genera)
+        preview_rect = pygame.Rect(0, 0, crt.thumbnails.size, crt.thumbnails.size)
+        preview_rect.midtop = (cell_rect.centerx, cell_rect.y + layout.length(3))
+        if self.thumbnail is not None:
+            surface.blit(self.thumbnail, preview_rect)
+        else:
+            surface.fill(crt.visualization.THUMBNAIL_BACKGROUND, preview_rect)
+
+        # Texto del ratio debajo
+        text_surface = crt.text_cache.render(crt.font_tiny, f"{ratio[0]}:{ratio[1]}", True, text_color)
+        surface.blit(text_surface, text_surface.get_rect(center=(cell_rect.centerx, cell_rect.bottom - layout.length(7))))
+
+class RatioGrid(Widget):
+    """Grid 4x5 de proporciones de Lissajous: título, contenedor y celdas"""
+    __slots__ = ('cells',)
+
+    COLUMNS = 4
+    ROWS = 5
+
+    def __init__(self, rect=(945, 310, 255, 335)):
+        super().__init__('grid', rect, group='grid')
+        self.cells = [RatioCell(i, (955 + (i % self.COLUMNS) * 60, 340 + (i // self.COLUMNS) * 60, 55, 55))
+                      for i in range(self.COLUMNS * self.ROWS)]
+
+    def state(self, crt):
+        return crt.current_mode == Mode.LISSAJOUS
+
+    def render(self, crt, surface, origin):
+        if not self.state(crt):
+            return  # fuera del modo Lissajous la región queda con el fondo
+        layout = crt.layout
+        title = crt.text_cache.render(crt.font_medium, "Ratios de Frecuencia", True, crt.DARK_GRAY)
+        surface.blit(title, self.local_point(layout, origin, 950, 315))
+
+        container = self.local_rect(layout, origin, 950, 335, 245, 305)
+        crt.draw_rounded_rect(surface, crt.WHITE, container, 12)
+        pygame.draw.rect(surface, crt.MEDIUM_GRAY, container, layout.length(2), border_radius=layout.length(12))
+
+    def draw(self, crt, force=False):
+        """Al cambiar de modo se redibuja el contenedor completo (o se borra)"""
+        container_redrawn = super().draw(crt, force)
+        if not self.state(crt):
+            return container_redrawn
+
+        self.update_thumbnails(crt)
+        for cell in self.cells[:len(crt.lissajous_ratios)]:
+            cell.draw(crt, force=container_redrawn)
+        return container_redrawn
+
+    def update_thumbnails(self, crt):
+        """Recoge las miniaturas terminadas, encarga las que faltan y se las asigna a las celdas"""
+        thumbnails = crt.thumbnails
+        thumbnails.poll()
+        cells = self.cells[:len(crt.lissajous_ratios)]
+        keys = [cell.thumbnail_key(crt) for cell in cells]
+        thumbnails.request(keys)
+        for cell, key in zip(cells, keys):
+            cell.thumbnail = thumbnails.get(key)
@@ -0,0 +1,10 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def spawn_pool(workers, initializer=None):
+    """Pool de procesos de trabajo iniciados con "spawn".
+
+    Con "spawn" los procesos no heredan el estado de SDL de la ventana.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                               mp_context=multiprocessing.get_context("spawn"))